@@ -0,0 +1,103 @@
+"""Add partitions free-list and unique approved partition index.
+
+Revision ID: 5d2c8e1f7a36
+Revises: 9a4e6b7c2d10
+Create Date: 2025-10-22 14:18:06.551873
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2c8e1f7a36"
+down_revision: Union[str, Sequence[str], None] = "9a4e6b7c2d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Dialects supporting partial (filtered) indexes.
+PARTIAL_INDEX_DIALECTS = ("sqlite", "postgresql")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = op.create_table(
+        "partitions",
+        sa.Column("partition_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("participant_id", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("partition_id"),
+        sa.UniqueConstraint("participant_id", name="uq_partitions_participant_id"),
+    )
+
+    bind = op.get_bind()
+    requests = sa.table(
+        "requests",
+        sa.column("participant_id", sa.String()),
+        sa.column("status", sa.String()),
+        sa.column("partition_id", sa.Integer()),
+        sa.column("timestamp", sa.DateTime()),
+        sa.column("public_key_pem", sa.String()),
+        sa.column("key_fingerprint", sa.String()),
+    )
+    rows = bind.execute(
+        sa.select(requests.c.participant_id, requests.c.partition_id)
+        .where(requests.c.status == "approved", requests.c.partition_id.isnot(None))
+        .order_by(requests.c.timestamp.asc(), requests.c.participant_id.asc())
+    ).all()
+
+    # Seed the free-list from existing approvals. If a partition was ever
+    # approved twice, the earliest approval keeps it and the others go back
+    # to pending so an administrator can re-assign them. Their keys are
+    # dropped too, so they leave the authorized keys CSV at the next
+    # rebuild (done on startup) and get new keys when approved again.
+    holders = {}
+    for participant_id, partition_id in rows:
+        if partition_id in holders:
+            bind.execute(
+                requests.update()
+                .where(requests.c.participant_id == participant_id)
+                .values(
+                    status="pending",
+                    partition_id=None,
+                    public_key_pem=None,
+                    key_fingerprint=None,
+                )
+            )
+        else:
+            holders[partition_id] = participant_id
+    if holders:
+        op.bulk_insert(
+            partitions,
+            [
+                {"partition_id": i, "participant_id": holders.get(i)}
+                for i in range(max(holders) + 1)
+            ],
+        )
+
+    if bind.dialect.name in PARTIAL_INDEX_DIALECTS:
+        op.create_index(
+            "ix_partitions_free",
+            "partitions",
+            ["partition_id"],
+            sqlite_where=sa.text("participant_id IS NULL"),
+            postgresql_where=sa.text("participant_id IS NULL"),
+        )
+        op.create_index(
+            "ux_requests_approved_partition",
+            "requests",
+            ["partition_id"],
+            unique=True,
+            sqlite_where=sa.text("status = 'approved'"),
+            postgresql_where=sa.text("status = 'approved'"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name in PARTIAL_INDEX_DIALECTS:
+        op.drop_index("ux_requests_approved_partition", table_name="requests")
+        op.drop_index("ix_partitions_free", table_name="partitions")
+    op.drop_table("partitions")
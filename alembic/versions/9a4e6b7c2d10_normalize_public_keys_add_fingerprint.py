@@ -0,0 +1,96 @@
+"""Normalize stored public keys to OpenSSH and add key_fingerprint.
+
+Revision ID: 9a4e6b7c2d10
+Revises: 3c5f2a9d81b4
+Create Date: 2025-10-21 09:41:52.230117
+
+"""
+
+import base64
+import hashlib
+import binascii
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from cryptography.hazmat.primitives import serialization
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4e6b7c2d10"
+down_revision: Union[str, Sequence[str], None] = "3c5f2a9d81b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+requests_table = sa.table(
+    "requests",
+    sa.column("participant_id", sa.String()),
+    sa.column("public_key_pem", sa.String()),
+    sa.column("key_fingerprint", sa.String()),
+)
+
+
+def _to_openssh(participant_id: str, key_str: str) -> str | None:
+    """Converts a legacy PEM public key to a commented OpenSSH string."""
+    if key_str.startswith("ecdsa-sha2-nistp384"):
+        return key_str
+    if "-----BEGIN PUBLIC KEY-----" not in key_str:
+        return None
+    public_key = serialization.load_pem_public_key(key_str.encode("utf-8"))
+    key_body = public_key.public_bytes(
+        encoding=serialization.Encoding.OpenSSH,
+        format=serialization.PublicFormat.OpenSSH,
+    ).decode("utf-8")
+    return f"{key_body} {participant_id}"
+
+
+def _fingerprint(key_str: str) -> str | None:
+    """Returns the OpenSSH SHA256 fingerprint, or None for a malformed key."""
+    parts = key_str.split()
+    if len(parts) < 2:
+        return None
+    try:
+        blob = base64.b64decode(parts[1], validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    digest = base64.b64encode(hashlib.sha256(blob).digest()).decode("ascii")
+    return f"SHA256:{digest.rstrip('=')}"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("requests", sa.Column("key_fingerprint", sa.String(), nullable=True))
+    op.create_index(
+        "ix_requests_key_fingerprint", "requests", ["key_fingerprint"], unique=False
+    )
+
+    # Data migration: convert every stored key once, so the registry rebuild
+    # no longer has to parse PEM keys.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(
+            requests_table.c.participant_id, requests_table.c.public_key_pem
+        ).where(requests_table.c.public_key_pem.isnot(None))
+    ).all()
+    for participant_id, key_str in rows:
+        try:
+            openssh_key = _to_openssh(participant_id, key_str)
+        except ValueError:
+            openssh_key = None
+        if openssh_key is None:
+            # Leave unknown formats untouched; the registry rebuild skips them.
+            continue
+        bind.execute(
+            requests_table.update()
+            .where(requests_table.c.participant_id == participant_id)
+            .values(
+                public_key_pem=openssh_key, key_fingerprint=_fingerprint(openssh_key)
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_requests_key_fingerprint", table_name="requests")
+    op.drop_column("requests", "key_fingerprint")
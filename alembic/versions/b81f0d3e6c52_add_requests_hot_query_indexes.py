@@ -0,0 +1,40 @@
+"""Add indexes for the requests table hot queries.
+
+Revision ID: b81f0d3e6c52
+Revises: 5d2c8e1f7a36
+Create Date: 2025-10-23 11:05:47.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b81f0d3e6c52"
+down_revision: Union[str, Sequence[str], None] = "5d2c8e1f7a36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_requests_handle_email_code",
+        "requests",
+        ["hf_handle", "email", "activation_code"],
+    )
+    op.create_index(
+        "ix_requests_status_activated_timestamp",
+        "requests",
+        ["status", "is_activated", "timestamp"],
+    )
+    op.create_index("ix_requests_status_timestamp", "requests", ["status", "timestamp"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_requests_status_timestamp", table_name="requests")
+    op.drop_index("ix_requests_status_activated_timestamp", table_name="requests")
+    op.drop_index("ix_requests_handle_email_code", table_name="requests")
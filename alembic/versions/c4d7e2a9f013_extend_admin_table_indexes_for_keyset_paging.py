@@ -0,0 +1,48 @@
+"""Extend the admin table indexes with participant_id for keyset paging.
+
+Revision ID: c4d7e2a9f013
+Revises: b81f0d3e6c52
+Create Date: 2025-10-24 09:42:18.316540
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d7e2a9f013"
+down_revision: Union[str, Sequence[str], None] = "b81f0d3e6c52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The admin tables page on (timestamp, participant_id); with the
+    # tie-breaker in the index, a page is read in index order without a sort.
+    op.create_index(
+        "ix_requests_status_activated_timestamp_id",
+        "requests",
+        ["status", "is_activated", "timestamp", "participant_id"],
+    )
+    op.create_index(
+        "ix_requests_status_timestamp_id",
+        "requests",
+        ["status", "timestamp", "participant_id"],
+    )
+    op.drop_index("ix_requests_status_activated_timestamp", table_name="requests")
+    op.drop_index("ix_requests_status_timestamp", table_name="requests")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_requests_status_activated_timestamp",
+        "requests",
+        ["status", "is_activated", "timestamp"],
+    )
+    op.create_index("ix_requests_status_timestamp", "requests", ["status", "timestamp"])
+    op.drop_index("ix_requests_status_timestamp_id", table_name="requests")
+    op.drop_index("ix_requests_status_activated_timestamp_id", table_name="requests")
@@ -0,0 +1,54 @@
+"""Add requests_archive table for retired requests.
+
+Revision ID: d8a3f51c9e27
+Revises: c4d7e2a9f013
+Create Date: 2025-10-29 09:41:37.205816
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a3f51c9e27"
+down_revision: Union[str, Sequence[str], None] = "c4d7e2a9f013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "requests_archive",
+        sa.Column("participant_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("partition_id", sa.Integer(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("hf_handle", sa.String(), nullable=True),
+        sa.Column("activation_code", sa.String(), nullable=True),
+        sa.Column("is_activated", sa.Integer(), nullable=False),
+        sa.Column("public_key_pem", sa.String(), nullable=True),
+        sa.Column("key_fingerprint", sa.String(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.Column("archive_reason", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("participant_id"),
+    )
+    op.create_index(
+        "ix_requests_archive_handle_email",
+        "requests_archive",
+        ["hf_handle", "email"],
+    )
+    op.create_index(
+        "ix_requests_archive_archived_at", "requests_archive", ["archived_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_requests_archive_archived_at", table_name="requests_archive")
+    op.drop_index("ix_requests_archive_handle_email", table_name="requests_archive")
+    op.drop_table("requests_archive")
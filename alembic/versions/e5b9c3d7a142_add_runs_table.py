@@ -0,0 +1,55 @@
+"""Add runs table for the federated run queue and history.
+
+Revision ID: e5b9c3d7a142
+Revises: d8a3f51c9e27
+Create Date: 2025-11-03 10:18:52.640317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b9c3d7a142"
+down_revision: Union[str, Sequence[str], None] = "d8a3f51c9e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "runs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("run_id", sa.String(), nullable=False),
+        sa.Column("app", sa.String(), nullable=False),
+        sa.Column("num_partitions", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("exit_code", sa.Integer(), nullable=True),
+        sa.Column("duration", sa.Float(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_runs_status_priority_id", "runs", ["status", "priority", "id"])
+    op.create_index("ix_runs_app_finished_at", "runs", ["app", "finished_at"])
+    op.create_index("ix_runs_run_id", "runs", ["run_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_runs_run_id", table_name="runs")
+    op.drop_index("ix_runs_app_finished_at", table_name="runs")
+    op.drop_index("ix_runs_status_priority_id", table_name="runs")
+    op.drop_table("runs")
@@ -0,0 +1,37 @@
+"""Helpers shared by the benchmark scripts."""
+
+import os
+import tempfile
+
+
+def percentiles(samples: list) -> dict:
+    """Returns p50/p95/p99 of latency samples given in milliseconds."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    samples = sorted(samples)
+
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))], 4)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def temp_database_url(prefix: str = "blossomtune-bench-") -> str:
+    """Returns the URL of a SQLite file in a fresh temporary directory."""
+    tmp_dir = tempfile.mkdtemp(prefix=prefix)
+    return f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+
+def upgrade_database(db_url: str, revision: str = "head") -> None:
+    """Applies the Alembic migrations to the given database."""
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    from blossomtune_gradio import config as cfg
+
+    # alembic/env.py reads the URL from the application configuration.
+    cfg.SQLALCHEMY_URL = db_url
+    alembic_cfg = AlembicConfig()
+    alembic_cfg.set_main_option("script_location", "alembic")
+    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+    command.upgrade(alembic_cfg, revision)
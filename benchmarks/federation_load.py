@@ -0,0 +1,290 @@
+"""
+Benchmark: load test of the federation workflow.
+
+Seeds a temporary SQLite database with N participants (pending, activated,
+approved and denied), then drives the registration, activation, approval,
+status check, partition lookup and admin refresh flows concurrently and
+prints latency percentiles and throughput per flow as JSON.
+
+Mail and DNS are stubbed: activation emails are only queued in the outbox
+(no workers are started) and MX lookups are answered by a StubResolver.
+Keys, certificates and Blossomfiles are written to a temporary directory.
+
+The synchronous flows run on a thread pool, as Gradio runs sync callbacks.
+The admin refresh is a coroutine and runs as concurrent tasks on a single
+event loop, as Gradio runs async callbacks.
+
+Usage:
+    python -m benchmarks.federation_load [--participants 1000] [--threads 8] \\
+        [--ops 200] [--flows register,activate,approve,status,partition,refresh]
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentiles, temp_database_url, upgrade_database
+
+FLOWS = ("register", "activate", "approve", "status", "partition", "refresh")
+
+
+def _configure_environment() -> str:
+    """Points the application at temporary storage; must run before importing it."""
+    work_dir = tempfile.mkdtemp(prefix="blossomtune-bench-")
+    for name in ("keys", "certs", "blossomfiles"):
+        os.makedirs(os.path.join(work_dir, name))
+    with open(os.path.join(work_dir, "certs", "ca.crt"), "w") as f:
+        f.write("-----BEGIN CERTIFICATE-----\nbenchmark\n-----END CERTIFICATE-----\n")
+    os.environ.update(
+        {
+            "SQLALCHEMY_URL": temp_database_url(),
+            "AUTH_KEYS_DIR": os.path.join(work_dir, "keys"),
+            "BLOSSOMTUNE_TLS_CERT_PATH": os.path.join(work_dir, "certs"),
+            "BLOSSOMFILE_CACHE_DIR": os.path.join(work_dir, "blossomfiles"),
+            "OUTBOX_WORKERS": "0",
+            "AUTH_KEY_POOL_SIZE": "0",
+        }
+    )
+    return os.environ["SQLALCHEMY_URL"]
+
+
+def _seed(n: int, rng: random.Random) -> dict:
+    """
+    Seeds N participants: 30% pending and not activated, 40% pending and
+    activated, 20% approved and 10% denied. Returns them grouped by state.
+    """
+    from sqlalchemy import insert
+
+    from blossomtune_gradio.database import SessionLocal, Request, Partition
+
+    start = datetime(2025, 1, 1)
+    groups = {"unactivated": [], "activated": [], "approved": [], "denied": []}
+    rows, partitions = [], []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.3:
+            group, status, activated = "unactivated", "pending", 0
+        elif roll < 0.7:
+            group, status, activated = "activated", "pending", 1
+        elif roll < 0.9:
+            group, status, activated = "approved", "approved", 1
+        else:
+            group, status, activated = "denied", "denied", 1
+        participant = {
+            "participant_id": f"P{i:06d}",
+            "hf_handle": f"user{i}",
+            "email": f"user{i}@example.com",
+            "activation_code": f"CODE{i:06d}",
+        }
+        partition_id = len(partitions) if status == "approved" else None
+        if partition_id is not None:
+            partitions.append(
+                {"partition_id": partition_id, "participant_id": f"P{i:06d}"}
+            )
+        rows.append(
+            {
+                **participant,
+                "status": status,
+                "is_activated": activated,
+                "partition_id": partition_id,
+                "timestamp": start + timedelta(seconds=i),
+            }
+        )
+        groups[group].append(participant)
+
+    with SessionLocal() as db:
+        db.execute(insert(Request.__table__), rows)
+        if partitions:
+            db.execute(insert(Partition.__table__), partitions)
+        db.commit()
+    return groups
+
+
+def _run_threaded(fn, items: list, threads: int) -> dict:
+    """Calls fn(item) for every item on a thread pool and reports the timings."""
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = fn(item)
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(timed, items))
+    return _report(results, time.perf_counter() - start)
+
+
+def _run_async(coro_fn, items: list, concurrency: int) -> dict:
+    """Awaits coro_fn(item) for every item, at most `concurrency` at a time."""
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(item):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    ok = await coro_fn(item)
+                except Exception:
+                    ok = False
+                return (time.perf_counter() - start) * 1000, ok
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(item) for item in items))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    return _report(results, elapsed)
+
+
+def _report(results: list, elapsed: float) -> dict:
+    samples = [latency for latency, _ in results]
+    return {
+        "ops": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+        **percentiles(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="Operations per flow.")
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    args = parser.parse_args()
+    flows = [flow for flow in args.flows.split(",") if flow]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"Unknown flow(s): {', '.join(sorted(unknown))}")
+
+    db_url = _configure_environment()
+    upgrade_database(db_url)
+
+    from blossomtune_gradio import federation as fed
+    from blossomtune_gradio import resolver
+    from blossomtune_gradio.config_store import config_store
+    from blossomtune_gradio.settings import settings
+
+    resolver.set_default_resolver(
+        resolver.CachingResolver(resolver.StubResolver({"example.com": 300}))
+    )
+    rng = random.Random(42)
+    groups = _seed(args.participants, rng)
+    # Keep registration on the insert path rather than "federation full".
+    config_store.set("max_num_nodes", args.participants * 10 + args.ops)
+
+    def sample(group: str) -> list:
+        pool = groups[group]
+        return rng.sample(pool, min(args.ops, len(pool)))
+
+    results = {
+        "participants": args.participants,
+        "threads": args.threads,
+        "ops_per_flow": args.ops,
+    }
+    approved_now = []
+
+    if "register" in flows:
+        registration_md = settings.get_text("registration_submitted_md")
+
+        def register(i):
+            _, message, _ = fed.check_participant_status(
+                f"new{i}", f"new{i}@example.com", ""
+            )
+            return message == registration_md
+
+        results["register"] = _run_threaded(register, range(args.ops), args.threads)
+
+    if "activate" in flows:
+        activation_md = settings.get_text("activation_successful_md")
+
+        def activate(p):
+            _, message, _ = fed.check_participant_status(
+                p["hf_handle"], p["email"], p["activation_code"]
+            )
+            return message == activation_md
+
+        results["activate"] = _run_threaded(
+            activate, sample("unactivated"), args.threads
+        )
+
+    if "approve" in flows:
+        from blossomtune_gradio import partitions
+        from blossomtune_gradio.database import SessionLocal
+
+        targets = sample("activated")
+        # Distinct free partitions, as an admin would pick: this measures the
+        # approval itself rather than races for the same suggested ID.
+        with SessionLocal() as db:
+            free_ids = partitions.next_free_many(db, len(targets))
+
+        def approve(item):
+            p, partition_id = item
+            ok, _ = fed.manage_request(
+                p["participant_id"], str(partition_id), "approve"
+            )
+            if ok:
+                approved_now.append(p)
+            return ok
+
+        results["approve"] = _run_threaded(
+            approve, list(zip(targets, free_ids)), args.threads
+        )
+
+    if "status" in flows:
+        # Participants approved above have keys, so their Blossomfile is built.
+        targets = approved_now or sample("approved")
+
+        def status(p):
+            approved, _, _ = fed.check_participant_status(
+                p["hf_handle"], p["email"], p["activation_code"]
+            )
+            return approved
+
+        results["status"] = _run_threaded(
+            status, [rng.choice(targets) for _ in range(args.ops)], args.threads
+        )
+
+    if "partition" in flows:
+        results["partition"] = _run_threaded(
+            lambda _: fed.get_next_partion_id() >= 0, range(args.ops), args.threads
+        )
+
+    if "refresh" in flows:
+        from blossomtune_gradio.ui import callbacks
+        from blossomtune_gradio.ui import components
+
+        async def refresh(seen_revision):
+            updates = await callbacks.get_full_status_update(
+                dict(components.pending_view_state.value),
+                dict(components.approved_view_state.value),
+                seen_revision,
+                None,
+                None,
+            )
+            return bool(updates)
+
+        # Half the clients have never rendered the tables, half are current.
+        revision = fed.get_federation_revision()
+        results["refresh"] = _run_async(
+            refresh,
+            [None if i % 2 else revision for i in range(args.ops)],
+            args.threads,
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
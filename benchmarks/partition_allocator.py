@@ -0,0 +1,136 @@
+"""
+Benchmark: partition allocation at scale.
+
+Seeds a temporary SQLite database with N approved participants (10k by
+default) holding partitions 0..N-1, frees a random sample of them, and
+compares the legacy "load every partition and scan" lookup with the
+free-list allocator.
+
+Usage:
+    python -m benchmarks.partition_allocator [--partitions 10000] [--rounds 200]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+
+def _timed(fn, rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--partitions", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--freed", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="blossomtune-bench-")
+    db_url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    # Must be set before the application modules read their configuration.
+    os.environ["SQLALCHEMY_URL"] = db_url
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+    from sqlalchemy import insert
+
+    from blossomtune_gradio import partitions
+    from blossomtune_gradio.database import SessionLocal, Request, Partition
+
+    alembic_cfg = AlembicConfig()
+    alembic_cfg.set_main_option("script_location", "alembic")
+    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+    command.upgrade(alembic_cfg, "head")
+
+    # Seed with Core inserts; the free-list is written directly to match.
+    n = args.partitions
+    freed = set(random.Random(42).sample(range(n), min(args.freed, n)))
+    with SessionLocal() as db:
+        db.execute(
+            insert(Request.__table__),
+            [
+                {
+                    "participant_id": f"P{i:06d}",
+                    "status": "denied" if i in freed else "approved",
+                    "partition_id": None if i in freed else i,
+                    "is_activated": 1,
+                }
+                for i in range(n)
+            ],
+        )
+        db.execute(
+            insert(Partition.__table__),
+            [
+                {
+                    "partition_id": i,
+                    "participant_id": None if i in freed else f"P{i:06d}",
+                }
+                for i in range(n)
+            ],
+        )
+        db.commit()
+
+    def legacy_next_free():
+        with SessionLocal() as db:
+            used_ids = {
+                row[0]
+                for row in db.query(Request.partition_id).filter(
+                    Request.status == "approved", Request.partition_id.isnot(None)
+                )
+            }
+        next_id = 0
+        while next_id in used_ids:
+            next_id += 1
+        return next_id
+
+    def free_list_next_free():
+        with SessionLocal() as db:
+            return partitions.next_free(db)
+
+    def free_list_bulk():
+        with SessionLocal() as db:
+            return partitions.next_free_many(db, 100)
+
+    def approve_then_deny():
+        with SessionLocal() as db:
+            request = db.get(Request, "P_BENCH") or Request(
+                participant_id="P_BENCH", is_activated=1
+            )
+            db.add(request)
+            request.status = "approved"
+            request.partition_id = partitions.next_free(db)
+            db.commit()
+            request.status = "denied"
+            request.partition_id = None
+            db.commit()
+
+    assert legacy_next_free() == free_list_next_free() == min(freed, default=n)
+
+    results = {
+        "partitions": n,
+        "free_partitions": len(freed),
+        "legacy_scan_next_free": _timed(legacy_next_free, args.rounds),
+        "free_list_next_free": _timed(free_list_next_free, args.rounds),
+        "free_list_next_free_many_100": _timed(free_list_bulk, args.rounds),
+        "free_list_approve_and_deny": _timed(approve_then_deny, args.rounds),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
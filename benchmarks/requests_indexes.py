@@ -0,0 +1,171 @@
+"""
+Benchmark: requests table hot queries before and after the index migration.
+
+Seeds a temporary SQLite database with N synthetic requests (100k by
+default) at the revision preceding the hot-query indexes, times the
+queries used by the join flow, the admin tables and request management,
+then upgrades to head and repeats. Prints query plans and latencies as JSON.
+
+Usage:
+    python -m benchmarks.requests_indexes [--requests 100000] [--rounds 50]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+# The revision right before the hot-query indexes were added.
+BASELINE_REVISION = "5d2c8e1f7a36"
+
+
+def _timed(fn, rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+
+def _seed(db, n: int, rng: random.Random):
+    from sqlalchemy import insert
+    from blossomtune_gradio.database import Request, Partition
+
+    start = datetime(2025, 1, 1)
+    rows, partitions = [], []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.2:
+            status, partition_id = "approved", len(partitions)
+            partitions.append({"partition_id": partition_id, "participant_id": f"P{i}"})
+        else:
+            status, partition_id = ("denied" if roll < 0.3 else "pending"), None
+        rows.append(
+            {
+                "participant_id": f"P{i}",
+                "status": status,
+                "timestamp": start + timedelta(seconds=i),
+                "partition_id": partition_id,
+                "email": f"user{i}@example.com",
+                "hf_handle": f"user{i}",
+                "activation_code": f"CODE{i:08d}",
+                "is_activated": int(rng.random() < 0.5),
+            }
+        )
+    db.execute(insert(Request.__table__), rows)
+    db.execute(insert(Partition.__table__), partitions)
+    db.commit()
+    return len(partitions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="blossomtune-bench-")
+    db_url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    # Must be set before the application modules read their configuration.
+    os.environ["SQLALCHEMY_URL"] = db_url
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+    from sqlalchemy import text
+
+    from blossomtune_gradio.database import SessionLocal, Request
+
+    alembic_cfg = AlembicConfig()
+    alembic_cfg.set_main_option("script_location", "alembic")
+    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+    command.upgrade(alembic_cfg, BASELINE_REVISION)
+
+    rng = random.Random(42)
+    with SessionLocal() as db:
+        num_approved = _seed(db, args.requests, rng)
+
+    def queries(db):
+        i = rng.randrange(args.requests)
+        return {
+            "participant_lookup": db.query(Request).filter(
+                Request.hf_handle == f"user{i}",
+                Request.email == f"user{i}@example.com",
+                Request.activation_code == f"CODE{i:08d}",
+            ),
+            "pending_table": db.query(
+                Request.participant_id, Request.hf_handle, Request.email
+            )
+            .filter(Request.status == "pending", Request.is_activated == 1)
+            .order_by(Request.timestamp.asc()),
+            "approved_table": db.query(
+                Request.participant_id,
+                Request.hf_handle,
+                Request.email,
+                Request.partition_id,
+            )
+            .filter(Request.status == "approved")
+            .order_by(Request.timestamp.desc()),
+            "approved_count": db.query(Request).filter(Request.status == "approved"),
+            "partition_in_use": db.query(Request).filter(
+                Request.partition_id == rng.randrange(max(num_approved, 1)),
+                Request.status == "approved",
+            ),
+        }
+
+    def measure():
+        report = {}
+        with SessionLocal() as db:
+            db.execute(text("ANALYZE"))
+            for name, query in queries(db).items():
+                sql = str(
+                    query.statement.compile(
+                        dialect=db.get_bind().dialect,
+                        compile_kwargs={"literal_binds": True},
+                    )
+                )
+                plan = [
+                    row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+                ]
+
+                def run(name=name):
+                    with SessionLocal() as session:
+                        query = queries(session)[name]
+                        if name == "approved_count":
+                            query.count()
+                        elif name in ("participant_lookup", "partition_in_use"):
+                            query.first()
+                        else:
+                            query.all()
+
+                report[name] = {"plan": plan, **_timed(run, args.rounds)}
+        return report
+
+    before = measure()
+    command.upgrade(alembic_cfg, "head")
+    after = measure()
+
+    print(
+        json.dumps(
+            {
+                "requests": args.requests,
+                "approved": num_approved,
+                "before": before,
+                "after": after,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
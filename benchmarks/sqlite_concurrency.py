@@ -0,0 +1,148 @@
+"""
+Benchmark: concurrent reader/writer throughput with and without the SQLite profile.
+
+For each configuration a fresh SQLite database is seeded with N requests,
+then reader threads (the admin table queries) and writer threads (join
+requests and approvals) run for a fixed duration. Prints operations per
+second, latency percentiles and "database is locked" errors as JSON.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency [--readers 8] [--writers 4] [--duration 5]
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+
+from benchmarks.common import percentiles, temp_database_url, upgrade_database
+
+
+def _run(tuned: bool, args) -> dict:
+    from sqlalchemy import insert
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+
+    from blossomtune_gradio.database import create_db_engine, Request
+
+    db_url = temp_database_url()
+    upgrade_database(db_url)
+
+    engine = create_db_engine(db_url, tuned=tuned)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        db.execute(
+            insert(Request.__table__),
+            [
+                {
+                    "participant_id": f"P{i}",
+                    "status": "pending",
+                    "timestamp": datetime.utcnow(),
+                    "email": f"user{i}@example.com",
+                    "hf_handle": f"user{i}",
+                    "activation_code": f"CODE{i}",
+                    "is_activated": i % 2,
+                }
+                for i in range(args.requests)
+            ],
+        )
+        db.commit()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {
+        "read": [],
+        "write": [],
+        "locked_errors": 0,
+    }
+
+    def reader():
+        samples = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.query(Request).filter(
+                        Request.status == "pending", Request.is_activated == 1
+                    ).order_by(Request.timestamp.asc()).limit(50).all()
+                    db.query(Request).filter(Request.status == "approved").count()
+            except OperationalError:
+                with lock:
+                    stats["locked_errors"] += 1
+                continue
+            samples.append((time.perf_counter() - start) * 1000)
+        with lock:
+            stats["read"].extend(samples)
+
+    def writer(worker_id: int):
+        rng = random.Random(worker_id)
+        samples, seq = [], 0
+        while not stop.is_set():
+            seq += 1
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.add(
+                        Request(
+                            participant_id=f"W{worker_id}_{seq}",
+                            status="pending",
+                            timestamp=datetime.utcnow(),
+                            hf_handle=f"w{worker_id}_{seq}",
+                            email=f"w{worker_id}_{seq}@example.com",
+                            activation_code=f"C{worker_id}_{seq}",
+                            is_activated=0,
+                        )
+                    )
+                    target = db.get(Request, f"P{rng.randrange(args.requests)}")
+                    target.is_activated = 1
+                    db.commit()
+            except OperationalError:
+                with lock:
+                    stats["locked_errors"] += 1
+                continue
+            samples.append((time.perf_counter() - start) * 1000)
+        with lock:
+            stats["write"].extend(samples)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "reads_per_s": round(len(stats["read"]) / args.duration, 1),
+        "writes_per_s": round(len(stats["write"]) / args.duration, 1),
+        "read_latency": percentiles(stats["read"]),
+        "write_latency": percentiles(stats["write"]),
+        "locked_errors": stats["locked_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = {
+        "requests": args.requests,
+        "readers": args.readers,
+        "writers": args.writers,
+        "duration_s": args.duration,
+        "default": _run(False, args),
+        "tuned": _run(True, args),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
 from blossomtune_gradio import config as cfg
 from blossomtune_gradio import database as db
+from blossomtune_gradio import outbox
+from blossomtune_gradio import retention
+from blossomtune_gradio import runs
+from blossomtune_gradio.registry import participant_registry
+from blossomtune_gradio import federation as fed
 from blossomtune_gradio.gradio_app import demo
+from blossomtune_gradio.routes import routes
 
 
 if __name__ == "__main__":
     if cfg.RUN_MIGRATIONS_ON_STARTUP:
         db.run_migrations()
-    demo.launch()
+    fed.sync_authorized_keys()
+    participant_registry.refresh()
+    outbox.worker_pool.start()
+    retention.worker.start()
+    runs.dispatcher.start()
+    if fed.key_pool is not None:
+        fed.key_pool.start()
+    demo.launch(app_kwargs={"routes": routes})
@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from sqlalchemy import String, and_, func, literal, or_, select, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.database import AsyncSessionLocal, Request
+
+# Sortable columns. Nullable ones are coalesced so that the keyset
+# comparison is well-defined for every row.
+SORT_KEYS = {
+    "timestamp": Request.timestamp,
+    "participant_id": Request.participant_id,
+    "hf_handle": func.coalesce(Request.hf_handle, ""),
+    "email": func.coalesce(Request.email, ""),
+    "partition_id": func.coalesce(Request.partition_id, -1),
+}
+
+
+class TableSpec(NamedTuple):
+    """Columns, row filter and default ordering of an admin table."""
+
+    columns: Tuple[Any, ...]
+    criteria: Tuple[Any, ...]
+    sortable: Tuple[str, ...]
+    default_sort: str
+    default_descending: bool
+
+
+TABLES: Dict[str, TableSpec] = {
+    "pending": TableSpec(
+        columns=(Request.participant_id, Request.hf_handle, Request.email),
+        criteria=(Request.status == "pending", Request.is_activated == 1),
+        sortable=("timestamp", "participant_id", "hf_handle", "email"),
+        default_sort="timestamp",
+        default_descending=False,
+    ),
+    "approved": TableSpec(
+        columns=(
+            Request.participant_id,
+            Request.hf_handle,
+            Request.email,
+            Request.partition_id,
+        ),
+        criteria=(Request.status == "approved",),
+        sortable=("timestamp", "participant_id", "hf_handle", "email", "partition_id"),
+        default_sort="timestamp",
+        default_descending=True,
+    ),
+}
+
+
+class Page(NamedTuple):
+    """
+    One page of an admin table.
+
+    `next_cursor` is the keyset position to pass as `after` to fetch the
+    following page, or None on the last page.
+    """
+
+    rows: List[list]
+    next_cursor: Tuple[Any, str] | None
+    total: int
+
+
+def _spec(table: str) -> TableSpec:
+    try:
+        return TABLES[table]
+    except KeyError:
+        raise ValueError(f"Unknown admin table '{table}'.") from None
+
+
+def _search_criteria(search: str | None) -> list:
+    """Matches a search term against handle, email, participant or partition."""
+    term = (search or "").strip()
+    if not term:
+        return []
+    pattern = "%{}%".format(
+        term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    matches = [
+        Request.hf_handle.ilike(pattern, escape="\\"),
+        Request.email.ilike(pattern, escape="\\"),
+        Request.participant_id.ilike(pattern, escape="\\"),
+    ]
+    if term.isdigit():
+        matches.append(Request.partition_id == int(term))
+    return [or_(*matches)]
+
+
+def page_query(
+    table: str,
+    search: str | None = None,
+    sort_by: str | None = None,
+    descending: bool | None = None,
+    after: Tuple[Any, str] | None = None,
+    page_size: int | None = None,
+):
+    """
+    Builds the keyset-paged query for one page of an admin table.
+
+    Rows are ordered by the sort column with the participant ID as a
+    tie-breaker, and a page starts strictly after the `after` cursor, so
+    fetching page N never scans the N-1 pages before it. One extra row is
+    selected to tell whether a next page exists.
+    """
+    spec = _spec(table)
+    sort_by = sort_by or spec.default_sort
+    if sort_by not in spec.sortable:
+        raise ValueError(f"Column '{sort_by}' is not sortable in table '{table}'.")
+    descending = spec.default_descending if descending is None else descending
+    page_size = page_size or cfg.ADMIN_PAGE_SIZE
+
+    sort_key = SORT_KEYS[sort_by]
+    keyset = tuple_(sort_key, Request.participant_id)
+    # The cursor keeps the raw database value. SQLite stores timestamps as
+    # text in the format of whoever wrote them (the column default has no
+    # microseconds), so a value parsed into a datetime and bound back would
+    # no longer compare equal to the row it came from.
+    cursor_key = type_coerce(sort_key, String).label("sort_key")
+    query = select(*spec.columns, cursor_key).where(
+        and_(*spec.criteria, *_search_criteria(search))
+    )
+    if after is not None:
+        position = tuple_(literal(after[0]), literal(after[1]))
+        query = query.where(keyset < position if descending else keyset > position)
+    if descending:
+        query = query.order_by(sort_key.desc(), Request.participant_id.desc())
+    else:
+        query = query.order_by(sort_key.asc(), Request.participant_id.asc())
+    return query.limit(page_size + 1)
+
+
+def count_query(table: str, search: str | None = None):
+    """Counts the rows of an admin table matching the search term."""
+    spec = _spec(table)
+    return (
+        select(func.count())
+        .select_from(Request)
+        .where(and_(*spec.criteria, *_search_criteria(search)))
+    )
+
+
+def _to_page(result_rows, total: int, page_size: int | None) -> Page:
+    page_size = page_size or cfg.ADMIN_PAGE_SIZE
+    rows = [list(row) for row in result_rows]
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = (last[-1], last[0])
+    # Drop the trailing sort key column used for the cursor.
+    return Page([row[:-1] for row in rows], next_cursor, total)
+
+
+def fetch_page(db: Session, table: str, page_size: int | None = None, **kwargs) -> Page:
+    """Fetches one page of an admin table; see `page_query` for the arguments."""
+    rows = db.execute(page_query(table, page_size=page_size, **kwargs)).all()
+    total = db.scalar(count_query(table, kwargs.get("search")))
+    return _to_page(rows, total, page_size)
+
+
+async def fetch_page_async(table: str, page_size: int | None = None, **kwargs) -> Page:
+    """Async variant of `fetch_page`, for the Gradio callbacks."""
+    async with AsyncSessionLocal() as db:
+        rows = (
+            await db.execute(page_query(table, page_size=page_size, **kwargs))
+        ).all()
+        total = await db.scalar(count_query(table, kwargs.get("search")))
+    return _to_page(rows, total, page_size)
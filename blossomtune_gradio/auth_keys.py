@@ -1,5 +1,12 @@
 import os
+import uuid
+import base64
+import binascii
+import hashlib
+import tempfile
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization
@@ -8,72 +15,294 @@ from cryptography.hazmat.primitives import serialization
 log = logging.getLogger(__name__)
 
 
-def _sanitize_key(participant_id: str, key_str: str) -> str | None:
+def key_fingerprint(public_key_ssh_string: str) -> str | None:
     """
-    Inspects a key string and converts it to the required OpenSSH format if necessary.
-    This provides resilience against old, PEM-formatted keys in the database.
+    Computes the OpenSSH SHA256 fingerprint of a public key string.
+
+    This matches the output of `ssh-keygen -l`, e.g. `SHA256:abc...`, and
+    needs no cryptography calls beyond hashing the base64 key blob.
+
+    Returns:
+        The fingerprint, or None if the string is not an OpenSSH key.
     """
-    if not key_str:
+    parts = (public_key_ssh_string or "").split()
+    if len(parts) < 2:
         return None
-    # If the key is already in the correct OpenSSH format, return it as is.
-    if key_str.startswith("ecdsa-sha2-nistp384"):
-        return key_str
-    # If the key is in the old PEM format, attempt to convert it.
-    if "-----BEGIN PUBLIC KEY-----" in key_str:
-        log.warning(
-            f"Found PEM-formatted key for participant {participant_id}. Converting to OpenSSH."
-        )
+    try:
+        blob = base64.b64decode(parts[1], validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    digest = base64.b64encode(hashlib.sha256(blob).digest()).decode("ascii")
+    return f"SHA256:{digest.rstrip('=')}"
+
+
+# Bumped every time the authorized keys CSV content actually changes.
+_registry_generation = 0
+_registry_lock = threading.Lock()
+
+
+def get_registry_generation() -> int:
+    """Returns how many times this process has changed the authorized keys CSV."""
+    return _registry_generation
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    """
+    Writes a file through a fsynced temp file and os.replace, so that
+    readers such as the Superlink never see partial content.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # Persist the rename itself.
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
         try:
-            public_key = serialization.load_pem_public_key(key_str.encode("utf-8"))
-            key_body = public_key.public_bytes(
-                encoding=serialization.Encoding.OpenSSH,
-                format=serialization.PublicFormat.OpenSSH,
-            ).decode("utf-8")
-            # Re-add the participant_id as a comment to conform to the 3-part format.
-            return f"{key_body} {participant_id}"
-        except Exception as e:
-            log.error(f"Could not convert PEM key for {participant_id}: {e}")
-            return None
-    # If the key format is unknown, log an error and skip it.
-    log.error(f"Unknown public key format for participant {participant_id}. Skipping.")
-    return None
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
 
 def rebuild_authorized_keys_csv(
     key_dir: str, authorized_participants: List[Tuple[str, str]]
-):
+) -> bool:
     """
     Overwrites the public key file with a fresh list from a trusted source,
     using the specific single-line, comma-separated format expected by Flower.
+
+    `authorized_participants` holds (participant_id, public key) rows as
+    stored: keys are normalized to OpenSSH when written, so they are used
+    as is, without parsing. The file is replaced atomically, and left
+    untouched if its content would not change.
+
+    Returns:
+        True if the file was rewritten, False if it was already up to date.
     """
+    global _registry_generation
     csv_path = os.path.join(key_dir, "authorized_supernodes.csv")
-    log.info(f"Rebuilding authorized keys file at: {csv_path}")
 
-    # Sanitize each key before adding it to the list.
-    public_keys = [
-        sanitized_key
-        for p_id, key_string in authorized_participants
-        if (sanitized_key := _sanitize_key(p_id, key_string)) is not None
-    ]
+    # Keys are stored in OpenSSH format, normalized when they are written.
+    public_keys = [key_string for _, key_string in authorized_participants]
 
-    # Join all valid public keys into a single comma-separated string.
-    content = ",".join(public_keys)
+    # Join all valid public keys into a single comma-separated string,
+    # followed by a newline.
+    content = (",".join(public_keys) + "\n").encode("utf-8")
+    digest = hashlib.sha256(content).digest()
 
-    # Write the single line to the file, followed by a newline.
-    with open(csv_path, "w") as f:
-        f.write(content + "\n")
+    with _registry_lock:
+        try:
+            with open(csv_path, "rb") as f:
+                unchanged = hashlib.sha256(f.read()).digest() == digest
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            log.info(f"Authorized keys at {csv_path} are unchanged; skipping write.")
+            return False
+
+        _write_atomically(csv_path, content)
+        _registry_generation += 1
+
+    log.info(
+        f"Successfully rebuilt {csv_path} with {len(public_keys)} keys "
+        f"(generation {_registry_generation})."
+    )
+    return True
+
+
+def generate_serialized_key_pair() -> Tuple[bytes, str]:
+    """
+    Generates a SECP384R1 key pair and serializes it.
+
+    Returns:
+        A tuple containing the PKCS8 PEM private key bytes and the OpenSSH
+        public key body (type and key data, without a comment).
+    """
+    private_key = ec.generate_private_key(ec.SECP384R1())
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    key_body = (
+        private_key.public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.OpenSSH,
+            format=serialization.PublicFormat.OpenSSH,
+        )
+        .decode("utf-8")
+    )
+    return private_pem, key_body
 
-    log.info(f"Successfully rebuilt {csv_path} with {len(public_keys)} keys.")
+
+def _write_private_file(path: str, content: bytes) -> None:
+    """Writes a file that is only ever readable by the owner (0600)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.chmod(path, 0o600)
+
+
+class KeyPool:
+    """
+    A pool of pre-generated EC key pairs stored under `<key_dir>/.pool`.
+
+    A background thread keeps the pool topped up to `depth` keys, optionally
+    spreading generation across a thread pool. The work is done by OpenSSL,
+    which releases the GIL, and threads avoid forking a process that
+    already runs other threads holding locks. Claiming a key is a file
+    rename, so approving a participant no longer waits on key generation.
+    """
+
+    def __init__(
+        self,
+        key_dir: str,
+        depth: int = 16,
+        workers: int = 1,
+        refill_interval: float = 30.0,
+    ):
+        self.key_dir = key_dir
+        self.pool_dir = os.path.join(key_dir, ".pool")
+        self.depth = depth
+        self.workers = workers
+        self.refill_interval = refill_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._fill_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _ensure_dir(self) -> None:
+        os.makedirs(self.pool_dir, mode=0o700, exist_ok=True)
+
+    def _available_ids(self) -> List[str]:
+        """Returns the IDs of complete pooled keys, oldest name first."""
+        try:
+            names = os.listdir(self.pool_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-4] for n in names if n.endswith(".key") and n[0] != ".")
+
+    def size(self) -> int:
+        return len(self._available_ids())
+
+    def _store(self, private_pem: bytes, key_body: str) -> None:
+        """Adds one key to the pool; it only becomes claimable once complete."""
+        key_id = uuid.uuid4().hex
+        with open(os.path.join(self.pool_dir, f"{key_id}.pub"), "w") as f:
+            f.write(key_body)
+        tmp_path = os.path.join(self.pool_dir, f".{key_id}.key.tmp")
+        _write_private_file(tmp_path, private_pem)
+        os.replace(tmp_path, os.path.join(self.pool_dir, f"{key_id}.key"))
+
+    def fill(self) -> int:
+        """Generates keys until the pool reaches its depth. Returns the count."""
+        with self._fill_lock:
+            self._ensure_dir()
+            missing = self.depth - self.size()
+            if missing <= 0:
+                return 0
+            if self.workers > 1:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="key-pool"
+                    )
+                pairs = self._executor.map(_generate_for_pool, range(missing))
+            else:
+                pairs = (generate_serialized_key_pair() for _ in range(missing))
+            for private_pem, key_body in pairs:
+                self._store(private_pem, key_body)
+            log.info(f"Added {missing} key(s) to the key pool at {self.pool_dir}.")
+            return missing
+
+    def claim(self, participant_id: str) -> Tuple[str, str, str] | None:
+        """
+        Assigns a pooled key pair to a participant.
+
+        Returns:
+            The same tuple as `AuthKeyGenerator.generate_participant_keys`,
+            or None if the pool is empty.
+        """
+        priv_key_path = os.path.join(self.key_dir, f"{participant_id}.key")
+        for key_id in self._available_ids():
+            try:
+                # The rename is the claim: only one caller can win it.
+                os.rename(os.path.join(self.pool_dir, f"{key_id}.key"), priv_key_path)
+            except FileNotFoundError:
+                continue
+            pool_pub_path = os.path.join(self.pool_dir, f"{key_id}.pub")
+            with open(pool_pub_path, "r") as f:
+                key_body = f.read().strip()
+            os.remove(pool_pub_path)
+
+            public_key_ssh_string = f"{key_body} {participant_id}"
+            pub_key_path = os.path.join(self.key_dir, f"{participant_id}.pub")
+            with open(pub_key_path, "w") as f:
+                f.write(public_key_ssh_string)
+            log.info(f"Assigned pooled key pair to {participant_id}.")
+            self._wakeup.set()
+            return priv_key_path, pub_key_path, public_key_ssh_string
+        log.warning("Key pool is empty, falling back to inline key generation.")
+        self._wakeup.set()
+        return None
+
+    def start(self) -> None:
+        """Starts the background thread that keeps the pool topped up."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._refill_loop, name="key-pool", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _refill_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.fill()
+            except Exception as e:
+                log.error(f"Key pool refill failed: {e}")
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
+
+
+def _generate_for_pool(_: int) -> Tuple[bytes, str]:
+    return generate_serialized_key_pair()
 
 
 class AuthKeyGenerator:
     """
     Handles the generation of Elliptic Curve (EC) key pairs for Flower
     SuperNode authentication.
+
+    If a `KeyPool` is given, keys are claimed from it first and only
+    generated inline when the pool is empty.
     """
 
-    def __init__(self, key_dir: str = "keys"):
+    def __init__(self, key_dir: str = "keys", key_pool: KeyPool | None = None):
         self.key_dir = key_dir
+        self.key_pool = key_pool
         os.makedirs(self.key_dir, exist_ok=True)
         log.info(f"Authentication key directory set to: {self.key_dir}")
 
@@ -118,6 +347,11 @@ class AuthKeyGenerator:
             - The file path to the generated public key.
             - The public key as a single-line OpenSSH string with a comment.
         """
+        if self.key_pool is not None:
+            claimed = self.key_pool.claim(participant_id)
+            if claimed is not None:
+                return claimed
+
         private_key = self._generate_key_pair()
         public_key = private_key.public_key()
 
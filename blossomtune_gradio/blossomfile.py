@@ -1,12 +1,37 @@
+import io
 import os
+import hmac
 import json
+import time
+import shutil
+import hashlib
 import zipfile
 import logging
+import tempfile
 from typing import Dict, Any
+from urllib.parse import urlencode
+
+from blossomtune_gradio import config as cfg
 
 # Configure logging for the module
 log = logging.getLogger(__name__)
 
+# Fixed member timestamp, so identical inputs always produce identical bytes.
+ZIP_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def _blossom_config(
+    superlink_address: str, partition_id: int, num_partitions: int
+) -> Dict[str, Any]:
+    """Builds the contents of blossom.json."""
+    return {
+        "superlink_address": superlink_address,
+        "node_config": {
+            "partition-id": partition_id,
+            "num-partitions": num_partitions,
+        },
+    }
+
 
 def create_blossomfile(
     participant_id: str,
@@ -43,13 +68,7 @@ def create_blossomfile(
     log.info(f"Creating Blossomfile for {participant_id} at {blossomfile_path}")
 
     # 1. Create the blossom.json configuration data
-    blossom_config: Dict[str, Any] = {
-        "superlink_address": superlink_address,
-        "node_config": {
-            "partition-id": partition_id,
-            "num-partitions": num_partitions,
-        },
-    }
+    blossom_config = _blossom_config(superlink_address, partition_id, num_partitions)
 
     # 2. Define the files to be included in the archive
     files_to_add = {
@@ -85,3 +104,345 @@ def create_blossomfile(
 
     log.info(f"Successfully created Blossomfile: {blossomfile_path}")
     return blossomfile_path
+
+
+class InMemoryBlossomfile:
+    """
+    A Blossomfile archive held in memory, ready to be served over HTTP.
+
+    The archive is byte-for-byte reproducible for the same inputs, so its
+    ETag is stable across rebuilds and processes.
+    """
+
+    content_type = "application/zip"
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.data = data
+        self._etag: str | None = None
+
+    @property
+    def content_length(self) -> int:
+        return len(self.data)
+
+    @property
+    def etag(self) -> str:
+        """A strong ETag derived from the SHA-256 of the archive bytes."""
+        if self._etag is None:
+            self._etag = f'"{hashlib.sha256(self.data).hexdigest()}"'
+        return self._etag
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Returns True if an If-None-Match header already names this archive."""
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or self.etag in candidates
+
+    def http_headers(self) -> Dict[str, str]:
+        """Response headers for serving the archive as a download."""
+        return {
+            "Content-Type": self.content_type,
+            "Content-Length": str(self.content_length),
+            "Content-Disposition": f'attachment; filename="{self.filename}"',
+            "ETag": self.etag,
+        }
+
+
+def _read_credentials(
+    ca_cert_path: str, auth_key_path: str, auth_pub_path: str
+) -> Dict[str, bytes]:
+    """
+    Reads the credential files, keyed by their name in the archive.
+
+    Raises:
+        FileNotFoundError: If any of the credential files is missing.
+    """
+    credentials = {}
+    for src_path, arc_name in (
+        (ca_cert_path, "ca.crt"),
+        (auth_key_path, "auth.key"),
+        (auth_pub_path, "auth.pub"),
+    ):
+        try:
+            with open(src_path, "rb") as f:
+                credentials[arc_name] = f.read()
+        except FileNotFoundError:
+            log.error(f"Credential file not found: {src_path}. Aborting.")
+            raise FileNotFoundError(f"Required credential file not found: {src_path}")
+    return credentials
+
+
+def _archive(
+    participant_id: str,
+    credentials: Dict[str, bytes],
+    superlink_address: str,
+    partition_id: int,
+    num_partitions: int,
+) -> InMemoryBlossomfile:
+    """Zips blossom.json and the credentials into an in-memory archive."""
+    members = {
+        "blossom.json": json.dumps(
+            _blossom_config(superlink_address, partition_id, num_partitions),
+            indent=2,
+        ).encode("utf-8"),
+        **credentials,
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arc_name, content in members.items():
+            info = zipfile.ZipInfo(arc_name, date_time=ZIP_MEMBER_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            mode = 0o600 if arc_name == "auth.key" else 0o644
+            info.external_attr = mode << 16
+            zf.writestr(info, content)
+
+    log.info(f"Built in-memory Blossomfile for {participant_id}.")
+    return InMemoryBlossomfile(f"{participant_id}-blossomfile.zip", buffer.getvalue())
+
+
+def build_blossomfile(
+    participant_id: str,
+    ca_cert_path: str,
+    auth_key_path: str,
+    auth_pub_path: str,
+    superlink_address: str,
+    partition_id: int,
+    num_partitions: int,
+) -> InMemoryBlossomfile:
+    """
+    Builds a participant's Blossomfile entirely in memory.
+
+    Produces the same archive members as `create_blossomfile`, without
+    touching the filesystem other than reading the credential files.
+
+    Raises:
+        FileNotFoundError: If any of the credential files is missing.
+    """
+    credentials = _read_credentials(ca_cert_path, auth_key_path, auth_pub_path)
+    return _archive(
+        participant_id, credentials, superlink_address, partition_id, num_partitions
+    )
+
+
+class BlossomfileCache:
+    """
+    A content-addressed, on-disk cache of generated Blossomfiles.
+
+    Each archive is stored under a directory named after a SHA-256 digest of
+    every input that ends up in it (credential file bytes, superlink address
+    and partition settings), so a repeated download is a lookup and any
+    change to the inputs naturally produces a new entry. The cache is bounded
+    by entry count and entry age.
+    """
+
+    _version = b"blossomfile-v1"
+    _tmp_prefix = ".tmp-"
+
+    def __init__(self, cache_dir: str, max_entries: int = 256, max_age: float = 86400):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+    def _digest(
+        self,
+        participant_id: str,
+        credentials: Dict[str, bytes],
+        superlink_address: str,
+        partition_id: int,
+        num_partitions: int,
+    ) -> str:
+        """Hashes all archive inputs."""
+        h = hashlib.sha256(self._version)
+        fields = [participant_id.encode(), superlink_address.encode()]
+        fields += [str(partition_id).encode(), str(num_partitions).encode()]
+        fields += list(credentials.values())
+        for field in fields:
+            # Length-prefix each field so concatenations cannot collide.
+            h.update(len(field).to_bytes(8, "big"))
+            h.update(field)
+        return h.hexdigest()
+
+    def _entries(self) -> list[tuple[float, str]]:
+        """Returns (mtime, path) for each cache entry, oldest first."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        return sorted(entries)
+
+    def get_or_create(
+        self,
+        participant_id: str,
+        ca_cert_path: str,
+        auth_key_path: str,
+        auth_pub_path: str,
+        superlink_address: str,
+        partition_id: int,
+        num_partitions: int,
+    ) -> str:
+        """
+        Returns the path to a cached Blossomfile, building it on a miss.
+
+        Takes the same arguments as `create_blossomfile`, minus `output_dir`.
+        The credential files are read once, both for the cache key and for
+        the archive, which is built in memory and written straight into the
+        cache entry.
+        """
+        credentials = _read_credentials(ca_cert_path, auth_key_path, auth_pub_path)
+        digest = self._digest(
+            participant_id,
+            credentials,
+            superlink_address,
+            partition_id,
+            num_partitions,
+        )
+        entry_dir = os.path.join(self.cache_dir, digest)
+        blossomfile_path = os.path.join(entry_dir, f"{participant_id}-blossomfile.zip")
+        if os.path.exists(blossomfile_path):
+            # Refresh the entry's mtime, which drives age and LRU eviction.
+            os.utime(entry_dir)
+            log.info(f"Blossomfile cache hit for {participant_id}.")
+            return blossomfile_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=self._tmp_prefix, dir=self.cache_dir)
+        try:
+            bundle = _archive(
+                participant_id,
+                credentials,
+                superlink_address,
+                partition_id,
+                num_partitions,
+            )
+            with open(os.path.join(tmp_dir, bundle.filename), "wb") as f:
+                f.write(bundle.data)
+            # Publish the entry atomically. If a concurrent request won the
+            # race, its identical archive is kept and ours is discarded.
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            if not os.path.exists(blossomfile_path):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict()
+        return blossomfile_path
+
+    def get(
+        self,
+        participant_id: str,
+        ca_cert_path: str,
+        auth_key_path: str,
+        auth_pub_path: str,
+        superlink_address: str,
+        partition_id: int,
+        num_partitions: int,
+    ) -> InMemoryBlossomfile:
+        """
+        Returns a Blossomfile loaded from the cache, building it on a miss.
+
+        Takes the same arguments as `get_or_create`.
+        """
+        path = self.get_or_create(
+            participant_id,
+            ca_cert_path,
+            auth_key_path,
+            auth_pub_path,
+            superlink_address,
+            partition_id,
+            num_partitions,
+        )
+        with open(path, "rb") as f:
+            return InMemoryBlossomfile(os.path.basename(path), f.read())
+
+    def evict(self) -> int:
+        """Removes expired entries, then the oldest ones above max_entries."""
+        now = time.time()
+        entries = self._entries()
+        removed = 0
+        live = []
+        for mtime, path in entries:
+            if now - mtime > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+            elif not os.path.basename(path).startswith(self._tmp_prefix):
+                live.append(path)
+        for path in live[: max(0, len(live) - self.max_entries)]:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def invalidate(self, participant_id: str) -> int:
+        """Removes every cached Blossomfile belonging to a participant."""
+        filename = f"{participant_id}-blossomfile.zip"
+        removed = 0
+        for _, path in self._entries():
+            if os.path.exists(os.path.join(path, filename)):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            log.info(
+                f"Invalidated {removed} cached Blossomfile(s) for {participant_id}."
+            )
+        return removed
+
+    def clear(self) -> None:
+        """Drops the whole cache, e.g. after the CA certificate is rotated."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        log.info(f"Cleared Blossomfile cache at {self.cache_dir}.")
+
+
+# Shared cache used by the participant status flow.
+blossomfile_cache = BlossomfileCache(
+    cache_dir=cfg.BLOSSOMFILE_CACHE_DIR,
+    max_entries=cfg.BLOSSOMFILE_CACHE_MAX_ENTRIES,
+    max_age=cfg.BLOSSOMFILE_CACHE_MAX_AGE,
+)
+
+
+def _download_signature(participant_id: str, expires: int) -> str:
+    message = f"{participant_id}:{expires}".encode()
+    key = cfg.BLOSSOMFILE_URL_SECRET.encode()
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
+def download_url(participant_id: str, now: float | None = None) -> str:
+    """
+    Returns a signed, expiring link to a participant's Blossomfile.
+
+    The link is relative to the app root, where `routes.download_blossomfile`
+    serves it; it stays valid for BLOSSOMFILE_URL_TTL seconds.
+    """
+    expires = int((time.time() if now is None else now) + cfg.BLOSSOMFILE_URL_TTL)
+    query = urlencode(
+        {
+            "expires": expires,
+            "signature": _download_signature(participant_id, expires),
+        }
+    )
+    return f"blossomfile/{participant_id}?{query}"
+
+
+def verify_download(
+    participant_id: str,
+    expires: str | None,
+    signature: str | None,
+    now: float | None = None,
+) -> bool:
+    """Returns True if a download link is authentic and has not expired."""
+    try:
+        expires_at = int(expires or "")
+    except ValueError:
+        return False
+    if expires_at < (time.time() if now is None else now):
+        return False
+    expected = _download_signature(participant_id, expires_at)
+    return hmac.compare_digest(expected, signature or "")
@@ -1,4 +1,6 @@
 import os
+import secrets
+import tempfile
 
 from blossomtune_gradio import util
 
@@ -15,6 +17,13 @@ DB_PATH = (
 )
 SQLALCHEMY_URL = os.getenv("SQLALCHEMY_URL", f"sqlite:///{os.path.abspath(DB_PATH)}")
 MAX_NUM_NODES = int(os.getenv("MAX_NUM_NODES", "20"))
+# Rows per page in the admin request tables.
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "25"))
+# Seconds between checks of the config table version stamp for outside writes.
+CONFIG_REFRESH_INTERVAL = float(os.getenv("CONFIG_REFRESH_INTERVAL", "5"))
+# Seconds between checks of the federation revision for outside writes to the
+# in-memory participant registry.
+REGISTRY_REFRESH_INTERVAL = float(os.getenv("REGISTRY_REFRESH_INTERVAL", "5"))
 SMTP_SENDER = os.getenv("SMTP_SENDER", "hello@ethicalabs.ai")
 SMTP_SERVER = os.getenv("SMTP_SERVER", "localhost")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "1025"))
@@ -22,10 +31,89 @@ SMTP_REQUIRE_TLS = util.strtobool(os.getenv("SMTP_REQUIRE_TLS", "false"))
 SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "smtp")
+
+# DNS - MX lookup cache used for email validation
+DNS_CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "1024"))
+DNS_CACHE_MAX_TTL = float(os.getenv("DNS_CACHE_MAX_TTL", "3600"))
+DNS_NEGATIVE_TTL = float(os.getenv("DNS_NEGATIVE_TTL", "60"))
+
+# Email outbox - background delivery of queued emails
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BACKOFF = float(os.getenv("OUTBOX_RETRY_BACKOFF", "30"))
+
+# Rate limiting of the join/activate form: token buckets keyed by HF handle,
+# email and client IP. A bucket holds BURST requests and regains one every
+# REFILL seconds. The sqlite backend shares the buckets between processes.
+RATE_LIMIT_ENABLED = util.strtobool(os.getenv("RATE_LIMIT_ENABLED", "true"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # Or sqlite
+RATE_LIMIT_DB_PATH = os.getenv(
+    "RATE_LIMIT_DB_PATH", os.path.join(os.path.dirname(DB_PATH), "ratelimit.db")
+)
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+RATE_LIMIT_REFILL = float(os.getenv("RATE_LIMIT_REFILL", "60"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "20"))
+RATE_LIMIT_IP_REFILL = float(os.getenv("RATE_LIMIT_IP_REFILL", "10"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Take the client IP from X-Forwarded-For. Trusted by default only on Spaces
+# (which sets SPACE_ID), where the proxy appends the real address; anywhere
+# else clients could pick their own IP bucket by sending the header.
+RATE_LIMIT_TRUST_FORWARDED = util.strtobool(
+    os.getenv(
+        "RATE_LIMIT_TRUST_FORWARDED", "true" if os.getenv("SPACE_ID") else "false"
+    )
+)
+
+# Retention - stale requests are moved to the requests_archive table.
+# Ages are in days since the request was made; 0 disables a policy.
+RETENTION_UNACTIVATED_DAYS = float(os.getenv("RETENTION_UNACTIVATED_DAYS", "7"))
+RETENTION_DENIED_DAYS = float(os.getenv("RETENTION_DENIED_DAYS", "30"))
+RETENTION_ABANDONED_DAYS = float(os.getenv("RETENTION_ABANDONED_DAYS", "0"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))  # seconds
+
+# SQLite tuning profile, applied to every new connection (ignored for other
+# databases). Cache size follows SQLite semantics: negative values are KiB.
+SQLITE_TUNING = util.strtobool(os.getenv("SQLITE_TUNING", "true"))
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY").upper()
+
+# Connection pool sizing
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 SUPERLINK_HOST = os.getenv("SUPERLINK_HOST", "127.0.0.1")
 SUPERLINK_PORT = int(os.getenv("SUPERLINK_PORT", 9092))
 SUPERLINK_CONTROL_API_PORT = int(os.getenv("SUPERLINK_CONTROL_API_PORT", 9093))
 SUPERLINK_MODE = os.getenv("SUPERLINK_MODE", "internal").lower()  # Or external
+# Process supervisor: bytes read from a process's output at a time, and
+# seconds a stopped process is given to exit before it is killed.
+SUPERVISOR_CHUNK_SIZE = int(os.getenv("SUPERVISOR_CHUNK_SIZE", "65536"))
+SUPERVISOR_STOP_TIMEOUT = float(os.getenv("SUPERVISOR_STOP_TIMEOUT", "10"))
+# Federated runs: concurrent `flwr run` invocations allowed, minimum seconds
+# between two launches (each submits to the Superlink Control API), log lines
+# kept per run and finished runs kept in memory.
+RUNNER_MAX_CONCURRENT = int(os.getenv("RUNNER_MAX_CONCURRENT", "2"))
+RUNNER_LAUNCH_INTERVAL = float(os.getenv("RUNNER_LAUNCH_INTERVAL", "2"))
+RUNNER_LOG_LINES = int(os.getenv("RUNNER_LOG_LINES", "1000"))
+RUNNER_HISTORY = int(os.getenv("RUNNER_HISTORY", "50"))
+# Seconds between checks of the run queue when nothing wakes the dispatcher.
+RUN_DISPATCH_INTERVAL = float(os.getenv("RUN_DISPATCH_INTERVAL", "5"))
+# UI log: every source (superlink, runner:<run id>, email, ...) keeps its own
+# ring buffer of at most LOG_MAX_LINES lines and LOG_MAX_BYTES bytes; runs
+# keep RUNNER_LOG_LINES lines. LOG_SOURCE_BUDGETS overrides either, given as
+# "source=lines:bytes,..." where source is a full name or a kind like runner.
+LOG_MAX_LINES = int(os.getenv("LOG_MAX_LINES", "1000"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(256 * 1024)))
+LOG_SOURCE_BUDGETS = util.parse_log_budgets(os.getenv("LOG_SOURCE_BUDGETS", ""))
+# Seconds between checks of the UI log for new lines by each open log view.
+LOG_STREAM_INTERVAL = float(os.getenv("LOG_STREAM_INTERVAL", "1"))
 RUN_MIGRATIONS_ON_STARTUP = util.strtobool(
     os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true")
 )  # Set to false in prod.
@@ -64,6 +152,22 @@ AUTH_KEYS_CSV_PATH = os.getenv(
     os.path.join(AUTH_KEYS_DIR, "authorized_supernodes.csv"),
 )
 
+# EC Auth - Pre-generated key pool (0 disables the pool)
+AUTH_KEY_POOL_SIZE = int(os.getenv("AUTH_KEY_POOL_SIZE", "0"))
+AUTH_KEY_POOL_WORKERS = int(os.getenv("AUTH_KEY_POOL_WORKERS", "1"))
+
+# Blossomfile cache - generated participant bundles, keyed by content hash
+BLOSSOMFILE_CACHE_DIR = os.getenv(
+    "BLOSSOMFILE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "blossomtune-blossomfiles"),
+)
+BLOSSOMFILE_CACHE_MAX_ENTRIES = int(os.getenv("BLOSSOMFILE_CACHE_MAX_ENTRIES", "256"))
+BLOSSOMFILE_CACHE_MAX_AGE = float(os.getenv("BLOSSOMFILE_CACHE_MAX_AGE", "86400"))
+# Signed download links: the key signing them (random per process unless set)
+# and how many seconds a link stays valid.
+BLOSSOMFILE_URL_SECRET = os.getenv("BLOSSOMFILE_URL_SECRET") or secrets.token_hex(32)
+BLOSSOMFILE_URL_TTL = float(os.getenv("BLOSSOMFILE_URL_TTL", "3600"))
+
 # Flower Apps
 FLOWER_APPS = os.getenv("FLOWER_APPS", ["flower_apps.quickstart_huggingface"])
 FLOWER_APPS = (
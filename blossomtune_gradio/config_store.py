@@ -0,0 +1,211 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Mapping, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.database import (
+    DIALECT_INSERTS,
+    SessionLocal,
+    Config,
+    increment_counter,
+    read_counter,
+)
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+# Row of the config table holding the version stamp, bumped on every write.
+VERSION_KEY = "config_version"
+
+
+def default_superlink_address() -> str:
+    """Returns the host:port participants use to reach the Superlink."""
+    hostname = (
+        "localhost"
+        if not cfg.SPACE_ID
+        else f"{cfg.SPACE_ID.split('/')[1]}-{cfg.SPACE_ID.split('/')[0]}.hf.space"
+    )
+    return f"{cfg.SUPERLINK_HOST or hostname}:{cfg.SUPERLINK_PORT}"
+
+
+class ConfigOption(NamedTuple):
+    """A typed key of the config table, with a default used when it is unset."""
+
+    type: Callable[[Any], Any]
+    default: Callable[[], Any]
+
+
+OPTIONS: Dict[str, ConfigOption] = {
+    "num_partitions": ConfigOption(int, lambda: 10),
+    "max_num_nodes": ConfigOption(int, lambda: cfg.MAX_NUM_NODES),
+    "superlink_address": ConfigOption(str, default_superlink_address),
+    "runner_app": ConfigOption(str, lambda: ""),
+}
+
+
+def upsert(db: Session, key: str, value: str) -> None:
+    """
+    Writes a config value with a single INSERT ... ON CONFLICT DO UPDATE.
+
+    Dialects without ON CONFLICT support fall back to Session.merge.
+    """
+    dialect_insert = DIALECT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        db.merge(Config(key=key, value=value))
+        return
+    stmt = dialect_insert(Config).values(key=key, value=value)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Config.key], set_={"value": stmt.excluded.value}
+        )
+    )
+
+
+def bump_version(db: Session) -> int:
+    """Atomically increments the version stamp and returns the new value."""
+    return increment_counter(db.connection(), VERSION_KEY)
+
+
+class ConfigStore:
+    """
+    Typed, cached access to the key/value `config` table.
+
+    Reads are served from memory. At most once per `refresh_interval`
+    seconds a read checks the version stamp row, and reloads the whole
+    table only when another process has written since. Writes go through
+    to the database in one transaction with a version bump, then update
+    the cache.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.refresh_interval = (
+            cfg.CONFIG_REFRESH_INTERVAL
+            if refresh_interval is None
+            else refresh_interval
+        )
+        self.clock = clock
+        self._values: Dict[str, str] = {}
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """The version stamp of the cached values (0 if never written)."""
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def invalidate(self) -> None:
+        """Drops the cache; the next read reloads the table."""
+        with self._lock:
+            self._values = {}
+            self._version = None
+
+    def needs_refresh(self) -> bool:
+        """Returns True if the next read would query the database."""
+        with self._lock:
+            return (
+                self._version is None
+                or self.clock() - self._checked_at >= self.refresh_interval
+            )
+
+    def refresh(self) -> None:
+        """Reloads the cache if it is empty, or stale and behind the database."""
+        with self._lock:
+            self._refresh()
+
+    async def refresh_async(self) -> None:
+        """Runs `refresh` in a worker thread, only if it would query."""
+        if self.needs_refresh():
+            await asyncio.to_thread(self.refresh)
+
+    def _refresh(self) -> None:
+        now = self.clock()
+        if self._version is not None and now - self._checked_at < self.refresh_interval:
+            return
+        with SessionLocal() as db:
+            version = read_counter(db.connection(), VERSION_KEY)
+            if version != self._version:
+                self._values = {
+                    row.key: row.value
+                    for row in db.execute(select(Config.key, Config.value))
+                    if row.key != VERSION_KEY
+                }
+                self._version = version
+        self._checked_at = now
+
+    def _parse(self, key: str, raw: str | None) -> Any:
+        option = OPTIONS[key]
+        if raw is None:
+            return option.default()
+        try:
+            return option.type(raw)
+        except (TypeError, ValueError):
+            log.warning(f"Ignoring invalid value {raw!r} for config key '{key}'.")
+            return option.default()
+
+    def get(self, key: str) -> Any:
+        """Returns the typed value of a config key, or its default if unset."""
+        if key not in OPTIONS:
+            raise KeyError(f"Unknown config key '{key}'.")
+        with self._lock:
+            self._refresh()
+            raw = self._values.get(key)
+        return self._parse(key, raw)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the typed values of all known keys."""
+        with self._lock:
+            self._refresh()
+            values = dict(self._values)
+        return {key: self._parse(key, values.get(key)) for key in OPTIONS}
+
+    def set(self, key: str, value: Any) -> int:
+        """Writes a single key; see `set_many`."""
+        return self.set_many({key: value})
+
+    def set_many(self, values: Mapping[str, Any]) -> int:
+        """
+        Writes several keys in one transaction and bumps the version stamp.
+
+        Returns:
+            The new version stamp.
+
+        Raises:
+            KeyError: For a key not declared in OPTIONS.
+            ValueError: For a value that cannot be converted to the key's type.
+        """
+        serialized = {}
+        for key, value in values.items():
+            if key not in OPTIONS:
+                raise KeyError(f"Unknown config key '{key}'.")
+            serialized[key] = str(OPTIONS[key].type(value))
+
+        with self._lock:
+            with SessionLocal() as db:
+                for key, value in serialized.items():
+                    upsert(db, key, value)
+                version = bump_version(db)
+                db.commit()
+            if self._version is not None and version == self._version + 1:
+                # Nobody else wrote in between: apply our change in place.
+                self._values.update(serialized)
+                self._version = version
+                self._checked_at = self.clock()
+            else:
+                self._version = None
+        return version
+
+
+# Shared store used by the federation and processing modules.
+config_store = ConfigStore()
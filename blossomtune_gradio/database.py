@@ -1,16 +1,205 @@
-from alembic import config
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, func
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+import time
+import functools
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    create_engine,
+    event,
+    inspect,
+    insert,
+    select,
+    text,
+    update,
+    Column,
+    String,
+    Integer,
+    DateTime,
+    Float,
+    Index,
+    UniqueConstraint,
+    cast,
+    func,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker, declarative_base, validates
 
 
 from blossomtune_gradio import config as cfg
+from blossomtune_gradio.auth_keys import key_fingerprint
 
 
 Base = declarative_base()
-engine = create_engine(cfg.SQLALCHEMY_URL)
+
+
+def utcnow() -> datetime:
+    """
+    Returns the current UTC time as a naive datetime, the form stored in
+    the DateTime columns (and written by `func.now()` on SQLite).
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def sqlite_pragmas() -> dict:
+    """Returns the configured SQLite tuning profile as PRAGMA name/value pairs."""
+    return {
+        "journal_mode": cfg.SQLITE_JOURNAL_MODE,
+        "synchronous": cfg.SQLITE_SYNCHRONOUS,
+        "busy_timeout": cfg.SQLITE_BUSY_TIMEOUT,
+        "mmap_size": cfg.SQLITE_MMAP_SIZE,
+        "cache_size": cfg.SQLITE_CACHE_SIZE,
+        "temp_store": cfg.SQLITE_TEMP_STORE,
+    }
+
+
+def apply_sqlite_profile(engine: Engine, pragmas: dict | None = None) -> None:
+    """
+    Registers a connect hook running the tuning PRAGMAs on every new
+    DBAPI connection of a SQLite engine. Other dialects are left untouched.
+
+    WAL lets the status refreshes keep reading while an approval is being
+    written, and busy_timeout makes a blocked writer wait instead of failing
+    immediately with "database is locked".
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _pool_kwargs(url: URL) -> dict:
+    """Returns the configured pool sizing, unless the database is in-memory."""
+    # In-memory SQLite uses a single shared connection; pool sizing does not apply.
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": cfg.DB_POOL_SIZE,
+        "max_overflow": cfg.DB_MAX_OVERFLOW,
+        "pool_timeout": cfg.DB_POOL_TIMEOUT,
+    }
+
+
+def create_db_engine(url: str | None = None, tuned: bool | None = None) -> Engine:
+    """
+    Creates an engine with explicit pool sizing and, for SQLite, the tuning
+    profile from the configuration.
+    """
+    url = make_url(url or cfg.SQLALCHEMY_URL)
+    new_engine = create_engine(url, **_pool_kwargs(url))
+    if cfg.SQLITE_TUNING if tuned is None else tuned:
+        apply_sqlite_profile(new_engine)
+    return new_engine
+
+
+# Async drivers used in place of the default synchronous ones. Only aiosqlite
+# is a declared dependency; PostgreSQL needs asyncpg installed separately.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str | URL) -> URL:
+    """Maps a database URL to the equivalent one using an async driver."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def create_async_db_engine(
+    url: str | None = None, tuned: bool | None = None, poolclass=None
+) -> AsyncEngine:
+    """
+    Async counterpart of `create_db_engine`, for the same database and models.
+
+    Passing a `poolclass` (e.g. NullPool) disables the configured pool sizing.
+
+    Raises:
+        ValueError: If the database has no async driver, or it is not installed.
+    """
+    url = async_url(url or cfg.SQLALCHEMY_URL)
+    kwargs = {"poolclass": poolclass} if poolclass else _pool_kwargs(url)
+    if not getattr(url.get_dialect(), "is_async", False):
+        raise ValueError(
+            f"SQLALCHEMY_URL uses '{url.drivername}', which has no async driver. "
+            "Use SQLite (aiosqlite) or PostgreSQL (asyncpg)."
+        )
+    try:
+        new_engine = create_async_engine(url, **kwargs)
+    except ImportError as e:
+        raise ValueError(
+            f"SQLALCHEMY_URL uses '{url.drivername}', whose async driver is not "
+            f"installed: install the '{e.name}' package."
+        ) from e
+    if cfg.SQLITE_TUNING if tuned is None else tuned:
+        apply_sqlite_profile(new_engine.sync_engine)
+    return new_engine
+
+
+engine = create_db_engine()
+
+
+class FederationSession(Session):
+    """
+    The session class of `SessionLocal` and `AsyncSessionLocal`.
+
+    The flush and commit hooks keeping the partitions, the federation
+    revision and the participant registry in sync with Request writes are
+    registered on this class only, so other sessions (migrations, scripts)
+    do not pay for them.
+    """
+
 
 # The sessionmaker factory generates new Session objects when called.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=FederationSession, autocommit=False, autoflush=False, bind=engine
+)
+
+# Async sessions keep attributes loaded after commit: refreshing them lazily
+# would need implicit IO, which is not allowed on the event loop. The factory
+# is bound to the async engine on first use.
+_async_sessions = async_sessionmaker(
+    sync_session_class=FederationSession, autoflush=False, expire_on_commit=False
+)
+_async_engine: AsyncEngine | None = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Returns the shared async engine, creating it on first use, so that a
+    database without an async driver only fails the async code paths.
+    """
+    global _async_engine
+    with _async_engine_lock:
+        if _async_engine is None:
+            _async_engine = create_async_db_engine()
+            _async_sessions.configure(bind=_async_engine)
+        return _async_engine
+
+
+def AsyncSessionLocal(**kwargs) -> AsyncSession:
+    """Opens a session on the shared async engine, like `SessionLocal`."""
+    get_async_engine()
+    return _async_sessions(**kwargs)
 
 
 class Request(Base):
@@ -20,6 +209,32 @@ class Request(Base):
     """
 
     __tablename__ = "requests"
+    __table_args__ = (
+        # Participant lookup in check_participant_status.
+        Index("ix_requests_handle_email_code", "hf_handle", "email", "activation_code"),
+        # Admin tables: filtered by status (and activation), keyset-paged on
+        # (timestamp, participant_id).
+        Index(
+            "ix_requests_status_activated_timestamp_id",
+            "status",
+            "is_activated",
+            "timestamp",
+            "participant_id",
+        ),
+        Index(
+            "ix_requests_status_timestamp_id", "status", "timestamp", "participant_id"
+        ),
+        # At most one approved participant per partition. Partial indexes are
+        # supported by SQLite and PostgreSQL; other dialects rely on the
+        # partitions free-list alone.
+        Index(
+            "ux_requests_approved_partition",
+            "partition_id",
+            unique=True,
+            sqlite_where=text("status = 'approved'"),
+            postgresql_where=text("status = 'approved'"),
+        ),
+    )
 
     participant_id = Column(String, primary_key=True)
     status = Column(String, nullable=False, default="pending")
@@ -29,7 +244,15 @@ class Request(Base):
     hf_handle = Column(String, nullable=True)
     activation_code = Column(String, nullable=True)
     is_activated = Column(Integer, nullable=False, default=0)
+    # Despite its name, this column holds the OpenSSH public key string.
     public_key_pem = Column(String(), nullable=True)
+    key_fingerprint = Column(String, nullable=True, index=True)
+
+    @validates("public_key_pem")
+    def _update_key_fingerprint(self, _, value):
+        """Keeps key_fingerprint in sync with every write of the public key."""
+        self.key_fingerprint = key_fingerprint(value) if value else None
+        return value
 
     def __repr__(self):
         return (
@@ -37,6 +260,39 @@ class Request(Base):
         )
 
 
+class RequestArchive(Base):
+    """
+    SQLAlchemy model for the 'requests_archive' table.
+    Requests retired by a retention policy are moved here, keeping the
+    requests table proportional to the active federation.
+    """
+
+    __tablename__ = "requests_archive"
+    __table_args__ = (
+        Index("ix_requests_archive_handle_email", "hf_handle", "email"),
+        Index("ix_requests_archive_archived_at", "archived_at"),
+    )
+
+    participant_id = Column(String, primary_key=True)
+    status = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    partition_id = Column(Integer, nullable=True)
+    email = Column(String, nullable=True)
+    hf_handle = Column(String, nullable=True)
+    activation_code = Column(String, nullable=True)
+    is_activated = Column(Integer, nullable=False)
+    public_key_pem = Column(String(), nullable=True)
+    key_fingerprint = Column(String, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
+    archive_reason = Column(String, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<RequestArchive(participant_id='{self.participant_id}', "
+            f"archive_reason='{self.archive_reason}')>"
+        )
+
+
 class Config(Base):
     """
     SQLAlchemy model for the 'config' table.
@@ -52,11 +308,309 @@ class Config(Base):
         return f"<Config(key='{self.key}', value='{self.value}')>"
 
 
-def run_migrations():
+class Partition(Base):
+    """
+    SQLAlchemy model for the 'partitions' table.
+    A persisted free-list of data partitions: a row with no participant_id is
+    free, and every partition below the highest allocated one has a row.
+    """
+
+    __tablename__ = "partitions"
+    __table_args__ = (
+        UniqueConstraint("participant_id", name="uq_partitions_participant_id"),
+        Index(
+            "ix_partitions_free",
+            "partition_id",
+            sqlite_where=text("participant_id IS NULL"),
+            postgresql_where=text("participant_id IS NULL"),
+        ),
+    )
+
+    partition_id = Column(Integer, primary_key=True, autoincrement=False)
+    participant_id = Column(String, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<Partition(partition_id={self.partition_id}, "
+            f"participant_id='{self.participant_id}')>"
+        )
+
+
+class PartitionConflictError(Exception):
+    """Raised when a partition is already held by another participant."""
+
+    def __init__(self, partition_id: int):
+        self.partition_id = partition_id
+        super().__init__(f"Partition {partition_id} is already in use.")
+
+
+def _assign_partition(connection, participant_id: str, partition_id: int | None):
+    """
+    Points the free-list at the partition a participant now holds.
+
+    Releases any other partition held by the participant, then claims the
+    requested one with a conditional UPDATE, growing the list if needed.
+    """
+    partitions = Partition.__table__
+    release = update(partitions).where(partitions.c.participant_id == participant_id)
+    if partition_id is not None:
+        release = release.where(partitions.c.partition_id != partition_id)
+    connection.execute(release.values(participant_id=None))
+    if partition_id is None:
+        return
+
+    claimed = connection.execute(
+        update(partitions)
+        .where(
+            partitions.c.partition_id == partition_id,
+            partitions.c.participant_id.is_(None),
+        )
+        .values(participant_id=participant_id)
+    ).rowcount
+    if claimed:
+        return
+
+    holder = connection.execute(
+        select(partitions.c.participant_id).where(
+            partitions.c.partition_id == partition_id
+        )
+    ).first()
+    if holder is None:
+        # Extend the list, adding the skipped partitions as free rows.
+        top = connection.execute(select(func.max(partitions.c.partition_id))).scalar()
+        start = 0 if top is None else top + 1
+        rows = [
+            {"partition_id": i, "participant_id": None}
+            for i in range(start, partition_id)
+        ]
+        rows.append({"partition_id": partition_id, "participant_id": participant_id})
+        connection.execute(insert(partitions), rows)
+    elif holder.participant_id != participant_id:
+        raise PartitionConflictError(partition_id)
+
+
+@event.listens_for(FederationSession, "before_flush")
+def _sync_partitions(session, flush_context, instances):
+    """
+    Keeps the partitions free-list in sync with every Request write, so
+    partitions are claimed on approval and reclaimed on denial no matter
+    which code path changed the request.
+    """
+    assignments = {}
+    for obj in session.new:
+        if isinstance(obj, Request):
+            assignments[obj.participant_id] = obj
+    for obj in session.dirty:
+        if isinstance(obj, Request):
+            state = inspect(obj)
+            if (
+                state.attrs.status.history.has_changes()
+                or state.attrs.partition_id.history.has_changes()
+            ):
+                assignments[obj.participant_id] = obj
+    released = [
+        obj.participant_id for obj in session.deleted if isinstance(obj, Request)
+    ]
+    if not assignments and not released:
+        return
+
+    held = {
+        pid: obj.partition_id
+        if obj.status == "approved" and obj.partition_id is not None
+        else None
+        for pid, obj in assignments.items()
+    }
+    connection = session.connection()
+    for pid in released:
+        _assign_partition(connection, pid, None)
+    # Release first, so partitions freed in this flush can be reused by it.
+    for pid, partition_id in sorted(
+        held.items(), key=lambda item: (item[1] is not None, item[1] or 0)
+    ):
+        _assign_partition(connection, pid, partition_id)
+
+
+# INSERT constructs supporting ON CONFLICT, by dialect name.
+DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# Config row counting the writes to the requests table.
+FEDERATION_REVISION_KEY = "federation_revision"
+
+
+def increment_counter(connection, key: str) -> int:
+    """
+    Atomically increments an integer counter row of the config table,
+    creating it with the value 1 on first use. Returns the new value.
+    """
+    table = Config.__table__
+    incremented = cast(cast(table.c.value, Integer) + 1, String)
+    dialect_insert = DIALECT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is None:
+        result = connection.execute(
+            update(table).where(table.c.key == key).values(value=incremented)
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(key=key, value="1"))
+        return read_counter(connection, key)
+    stmt = dialect_insert(table).values(key=key, value="1")
+    return int(
+        connection.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.key], set_={"value": incremented}
+            ).returning(table.c.value)
+        )
+    )
+
+
+def read_counter(connection, key: str) -> int:
+    """Returns the value of a counter row of the config table (0 if unset)."""
+    table = Config.__table__
+    value = connection.scalar(select(table.c.value).where(table.c.key == key))
+    return int(value) if value else 0
+
+
+@event.listens_for(FederationSession, "before_flush")
+def _bump_federation_revision(session, flush_context, instances):
+    """
+    Bumps the federation revision in the same transaction as any insert,
+    update or delete of a Request, so readers can tell whether the
+    participant tables changed since they last looked. The new revision
+    is left in `session.info` for the participant registry.
+    """
+    changed = any(isinstance(obj, Request) for obj in session.new) or any(
+        isinstance(obj, Request) for obj in session.deleted
+    )
+    if not changed:
+        changed = any(
+            isinstance(obj, Request) and session.is_modified(obj)
+            for obj in session.dirty
+        )
+    if changed:
+        session.info[FEDERATION_REVISION_KEY] = increment_counter(
+            session.connection(), FEDERATION_REVISION_KEY
+        )
+
+
+class OutboxMessage(Base):
+    """
+    SQLAlchemy model for the 'outbox' table.
+    Outgoing emails are written here in the same transaction as the change
+    that triggers them, and delivered later by the outbox workers.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_status_id", "status", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    next_attempt_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, status='{self.status}')>"
+
+
+class FederatedRun(Base):
+    """
+    SQLAlchemy model for the 'runs' table.
+    Federated runs are queued here by the admin and launched by the run
+    dispatcher, highest priority first, as runner slots free up. Finished
+    rows are the run history.
+    """
+
+    __tablename__ = "runs"
+    __table_args__ = (
+        # The dispatcher claims the next run in (priority DESC, id) order.
+        Index("ix_runs_status_priority_id", "status", "priority", "id"),
+        Index("ix_runs_app_finished_at", "app", "finished_at"),
+        Index("ix_runs_run_id", "run_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String, nullable=False)
+    app = Column(String, nullable=False)
+    num_partitions = Column(Integer, nullable=False)
+    # queued, running, succeeded, failed or cancelled
+    status = Column(String, nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    exit_code = Column(Integer, nullable=True)
+    duration = Column(Float, nullable=True)  # seconds
+    error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<FederatedRun(id={self.id}, run_id='{self.run_id}', "
+            f"status='{self.status}')>"
+        )
+
+
+@functools.cache
+def schema_head() -> str:
+    """
+    Returns the head revision of the packaged migrations in alembic/versions.
+
+    The migration scripts are parsed once per process, without connecting to
+    the database or running the Alembic environment.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    alembic_cfg = Config()
+    alembic_cfg.set_main_option(
+        "script_location", os.path.join(cfg.PROJECT_PATH, "alembic")
+    )
+    return ScriptDirectory.from_config(alembic_cfg).get_current_head()
+
+
+def current_revisions(bind: Engine | None = None) -> set:
+    """Returns the revisions stamped in alembic_version (empty if unversioned)."""
+    with (bind or engine).connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return set()
+        return set(connection.scalars(text("SELECT version_num FROM alembic_version")))
+
+
+def schema_is_current(bind: Engine | None = None) -> bool:
+    """
+    Returns True if the database is at the head of the packaged migrations.
+
+    This is a single query, without loading the Alembic environment. Any
+    error reads as "not current", so Alembic gets to run and report it.
+    """
+    try:
+        return current_revisions(bind) == {schema_head()}
+    except SQLAlchemyError:
+        return False
+
+
+def run_migrations(bind: Engine | None = None) -> bool:
     """
     Applies any pending Alembic migrations to the database.
     This should be called on application startup.
+
+    Alembic is skipped when the schema is already current. Returns True if
+    Alembic was run.
     """
+    start = time.perf_counter()
+    if schema_is_current(bind):
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"Database schema is up to date ({schema_head()}), "
+            f"checked in {elapsed:.1f} ms."
+        )
+        return False
+
+    from alembic import config
+
     print("Running database migrations...")
     alembicArgs = [
         "--raiseerr",
@@ -64,3 +618,5 @@ def run_migrations():
         "head",
     ]
     config.main(argv=alembicArgs)
+    print(f"Database migrations finished in {time.perf_counter() - start:.2f} s.")
+    return True
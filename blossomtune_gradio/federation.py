@@ -1,15 +1,48 @@
 import os
 import string
+import asyncio
 import secrets
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from blossomtune_gradio import config as cfg
-from blossomtune_gradio import mail
+from blossomtune_gradio import outbox
+from blossomtune_gradio.config_store import config_store
+from blossomtune_gradio import partitions
+from blossomtune_gradio.registry import Participant, participant_registry
 from blossomtune_gradio import util
 from blossomtune_gradio.settings import settings
-from blossomtune_gradio.database import SessionLocal, Request, Config
-from blossomtune_gradio.auth_keys import AuthKeyGenerator, rebuild_authorized_keys_csv
-from blossomtune_gradio.blossomfile import create_blossomfile
+from blossomtune_gradio.database import (
+    SessionLocal,
+    AsyncSessionLocal,
+    Request,
+    PartitionConflictError,
+    FEDERATION_REVISION_KEY,
+    read_counter,
+)
+from blossomtune_gradio.auth_keys import (
+    AuthKeyGenerator,
+    KeyPool,
+    rebuild_authorized_keys_csv,
+)
+from blossomtune_gradio.blossomfile import (
+    InMemoryBlossomfile,
+    blossomfile_cache,
+    download_url,
+)
+
+# Optional pool of pre-generated auth keys, started from the entrypoint.
+key_pool = (
+    KeyPool(
+        cfg.AUTH_KEYS_DIR,
+        depth=cfg.AUTH_KEY_POOL_SIZE,
+        workers=cfg.AUTH_KEY_POOL_WORKERS,
+    )
+    if cfg.AUTH_KEY_POOL_SIZE > 0
+    else None
+)
 
 
 def generate_participant_id(length=6):
@@ -28,110 +61,217 @@ def check_participant_status(pid_to_check: str, email: str, activation_code: str
     """
     Handles a participant's request to join, activate, or check status using SQLAlchemy.
     Returns a tuple: (is_approved: bool, message: str, data: any | None)
+
+    Lookups and the approved count are served by the participant registry;
+    the database is only opened to register or activate.
     """
-    with SessionLocal() as db:
-        query = db.query(Request).filter(
-            Request.hf_handle == pid_to_check, Request.email == email
-        )
-        if activation_code:
-            query = query.filter(Request.activation_code == activation_code)
+    request = participant_registry.find(pid_to_check, email, activation_code)
+    num_partitions = config_store.get("num_partitions")
+
+    # Case 1 & 2 are for users not yet approved
+    if not request or not request.is_activated or not activation_code:
+        if request is None:
+            if activation_code:
+                return (False, settings.get_text("activation_invalid_md"), None)
+            if not util.validate_email(email):
+                return (False, settings.get_text("invalid_email_md"), None)
+            approved_count = participant_registry.count("approved")
+            if approved_count >= config_store.get("max_num_nodes"):
+                return (False, settings.get_text("federation_full_md"), None)
+            participant_id = generate_participant_id()
+            new_activation_code = generate_activation_code()
+            with SessionLocal() as db:
+                new_request = Request(
+                    participant_id=participant_id,
+                    hf_handle=pid_to_check,
+                    email=email,
+                    activation_code=new_activation_code,
+                )
+                db.add(new_request)
+                # The activation email is queued in the same transaction and
+                # delivered by the outbox workers.
+                outbox.enqueue_activation_email(db, email, new_activation_code)
+                db.commit()
+            outbox.worker_pool.notify()
+            return (False, settings.get_text("registration_submitted_md"), None)
+
+        if not request.is_activated:
+            if activation_code == request.activation_code:
+                with SessionLocal() as db:
+                    row = db.get(Request, request.participant_id)
+                    if row is None:
+                        return (False, settings.get_text("activation_invalid_md"), None)
+                    row.is_activated = 1
+                    db.commit()
+                return (False, settings.get_text("activation_successful_md"), None)
+            else:
+                return (False, settings.get_text("activation_invalid_md"), None)
 
-        request = query.first()
+        if not activation_code:
+            return (False, settings.get_text("missing_activation_code_md"), None)
 
-        num_partitions_config = (
-            db.query(Config).filter(Config.key == "num_partitions").first()
+    # Case 3: Activated user is checking their final status
+    return _final_status(request, num_partitions)
+
+
+def _blossomfile_args(participant: Participant, num_partitions: int) -> dict:
+    """The `BlossomfileCache` arguments for an approved participant."""
+    return dict(
+        participant_id=participant.participant_id,
+        ca_cert_path=cfg.BLOSSOMTUNE_TLS_CA_CERTFILE,
+        auth_key_path=os.path.join(
+            cfg.AUTH_KEYS_DIR, f"{participant.participant_id}.key"
+        ),
+        auth_pub_path=os.path.join(
+            cfg.AUTH_KEYS_DIR, f"{participant.participant_id}.pub"
+        ),
+        superlink_address=config_store.get("superlink_address"),
+        partition_id=participant.partition_id,
+        num_partitions=num_partitions,
+    )
+
+
+def _final_status(request: Participant, num_partitions: int):
+    """
+    Builds the status reply for an activated participant. An approved
+    participant gets a signed link to their Blossomfile, which is built
+    into the cache here so a missing credential is reported right away.
+    """
+    if request.status == "approved":
+        superlink_address = config_store.get("superlink_address")
+        try:
+            blossomfile_cache.get_or_create(
+                **_blossomfile_args(request, num_partitions)
+            )
+        except FileNotFoundError:
+            return (False, "An error occurred.", None)
+
+        connection_string = settings.get_text(
+            "status_approved_md",
+            participant_id=request.participant_id,
+            partition_id=request.partition_id,
+            superlink_hostname=superlink_address.split(":")[0],
+            superlink_port=superlink_address.split(":")[1],
+            num_partitions=num_partitions,
+        )
+        return (True, connection_string, download_url(request.participant_id))
+    elif request.status == "pending":
+        return (False, settings.get_text("status_pending_md"), None)
+    else:  # Denied
+        return (
+            False,
+            settings.get_text(
+                "status_denied_md", participant_id=request.participant_id
+            ),
+            None,
         )
-        num_partitions = num_partitions_config.value if num_partitions_config else "10"
 
-        # Case 1 & 2 are for users not yet approved
-        if not request or not request.is_activated or not activation_code:
-            if request is None:
-                if activation_code:
-                    return (False, settings.get_text("activation_invalid_md"), None)
-                if not util.validate_email(email):
-                    return (False, settings.get_text("invalid_email_md"), None)
-                approved_count = (
-                    db.query(Request).filter(Request.status == "approved").count()
-                )
-                if approved_count >= cfg.MAX_NUM_NODES:
-                    return (False, settings.get_text("federation_full_md"), None)
-                participant_id = generate_participant_id()
-                new_activation_code = generate_activation_code()
-                mail_sent, message = mail.send_activation_email(
-                    email, new_activation_code
-                )
-                if mail_sent:
-                    new_request = Request(
-                        participant_id=participant_id,
+
+async def check_participant_status_async(
+    pid_to_check: str, email: str, activation_code: str
+):
+    """
+    Async variant of `check_participant_status`, for callbacks running on the
+    event loop. Registry and config store refreshes, and Blossomfile
+    generation, run in a worker
+    thread, writes go through `AsyncSessionLocal` and the MX lookup is awaited.
+    """
+    await participant_registry.refresh_async()
+    await config_store.refresh_async()
+    request = participant_registry.find(pid_to_check, email, activation_code)
+    # Served from memory: both were refreshed off the loop just above.
+    num_partitions = config_store.get("num_partitions")
+
+    # Case 1 & 2 are for users not yet approved
+    if not request or not request.is_activated or not activation_code:
+        if request is None:
+            if activation_code:
+                return (False, settings.get_text("activation_invalid_md"), None)
+            if not await util.validate_email_async(email):
+                return (False, settings.get_text("invalid_email_md"), None)
+            approved_count = participant_registry.count("approved")
+            if approved_count >= config_store.get("max_num_nodes"):
+                return (False, settings.get_text("federation_full_md"), None)
+            new_activation_code = generate_activation_code()
+            async with AsyncSessionLocal() as db:
+                db.add(
+                    Request(
+                        participant_id=generate_participant_id(),
                         hf_handle=pid_to_check,
                         email=email,
                         activation_code=new_activation_code,
                     )
-                    db.add(new_request)
-                    db.commit()
-                    return (False, settings.get_text("registration_submitted_md"), None)
-                else:
-                    return (False, message, None)
+                )
+                outbox.enqueue_activation_email(db, email, new_activation_code)
+                await db.commit()
+            outbox.worker_pool.notify()
+            return (False, settings.get_text("registration_submitted_md"), None)
 
-            if not request.is_activated:
-                if activation_code == request.activation_code:
-                    request.is_activated = 1
-                    db.commit()
-                    return (False, settings.get_text("activation_successful_md"), None)
-                else:
-                    return (False, settings.get_text("activation_invalid_md"), None)
-
-            if not activation_code:
-                return (False, settings.get_text("missing_activation_code_md"), None)
-
-        # Case 3: Activated user is checking their final status
-        if request.status == "approved":
-            hostname = (
-                "localhost"
-                if not cfg.SPACE_ID
-                else f"{cfg.SPACE_ID.split('/')[1]}-{cfg.SPACE_ID.split('/')[0]}.hf.space"
-            )
-            superlink_address = f"{cfg.SUPERLINK_HOST or hostname}:{cfg.SUPERLINK_PORT}"
+        if not request.is_activated:
+            if activation_code == request.activation_code:
+                async with AsyncSessionLocal() as db:
+                    row = await db.get(Request, request.participant_id)
+                    if row is None:
+                        return (False, settings.get_text("activation_invalid_md"), None)
+                    row.is_activated = 1
+                    await db.commit()
+                return (False, settings.get_text("activation_successful_md"), None)
+            else:
+                return (False, settings.get_text("activation_invalid_md"), None)
 
-            # Blossomfile Generation
-            blossomfile_tempdir = tempfile.mkdtemp()  # TODO: remove tempdirs
-            try:
-                blossomfile_path = create_blossomfile(
-                    participant_id=request.participant_id,
-                    output_dir=blossomfile_tempdir,
-                    ca_cert_path=cfg.BLOSSOMTUNE_TLS_CA_CERTFILE,
-                    auth_key_path=os.path.join(
-                        cfg.AUTH_KEYS_DIR, f"{request.participant_id}.key"
-                    ),
-                    auth_pub_path=os.path.join(
-                        cfg.AUTH_KEYS_DIR, f"{request.participant_id}.pub"
-                    ),
-                    superlink_address=superlink_address,
-                    partition_id=request.partition_id,
-                    num_partitions=int(num_partitions),
-                )
-            except FileNotFoundError:
-                return (False, "An error occurred.", None)
-
-            connection_string = settings.get_text(
-                "status_approved_md",
-                participant_id=request.participant_id,
-                partition_id=request.partition_id,
-                superlink_hostname=superlink_address.split(":")[0],
-                superlink_port=superlink_address.split(":")[1],
-                num_partitions=num_partitions,
-            )
-            return (True, connection_string, blossomfile_path)
-        elif request.status == "pending":
-            return (False, settings.get_text("status_pending_md"), None)
-        else:  # Denied
-            return (
-                False,
-                settings.get_text(
-                    "status_denied_md", participant_id=request.participant_id
-                ),
-                None,
-            )
+        if not activation_code:
+            return (False, settings.get_text("missing_activation_code_md"), None)
+
+    # Case 3: Activated user is checking their final status
+    return await asyncio.to_thread(_final_status, request, num_partitions)
+
+
+def get_blossomfile(participant_id: str) -> InMemoryBlossomfile | None:
+    """
+    Returns the Blossomfile of an approved participant, loaded into memory,
+    or None if the participant is not approved or a credential is missing.
+    """
+    participant = participant_registry.get(participant_id)
+    if participant is None or participant.status != "approved":
+        return None
+    num_partitions = config_store.get("num_partitions")
+    try:
+        return blossomfile_cache.get(**_blossomfile_args(participant, num_partitions))
+    except FileNotFoundError:
+        return None
+
+
+async def get_blossomfile_async(participant_id: str) -> InMemoryBlossomfile | None:
+    """Async variant of `get_blossomfile`; the file reads run in a worker thread."""
+    await participant_registry.refresh_async()
+    await config_store.refresh_async()
+    return await asyncio.to_thread(get_blossomfile, participant_id)
+
+
+def _rebuild_authorized_keys(db) -> bool:
+    """
+    Rewrites the authorized keys CSV from all approved participants. Only
+    keys with a fingerprint are valid OpenSSH keys, so the stored values
+    are written without parsing.
+    """
+    approved_participants = (
+        db.query(Request.participant_id, Request.public_key_pem)
+        .filter(Request.status == "approved", Request.key_fingerprint.isnot(None))
+        .all()
+    )
+    return rebuild_authorized_keys_csv(cfg.AUTH_KEYS_DIR, approved_participants)
+
+
+def sync_authorized_keys() -> bool:
+    """
+    Brings the authorized keys CSV in line with the database, e.g. after a
+    migration revoked approvals. Run on startup; a no-op when unchanged.
+
+    Returns:
+        True if the file was rewritten.
+    """
+    with SessionLocal() as db:
+        return _rebuild_authorized_keys(db)
 
 
 def manage_request(participant_id: str, partition_id: str, action: str):
@@ -156,39 +296,35 @@ def manage_request(participant_id: str, partition_id: str, action: str):
                     settings.get_text("participant_not_activated_warning_md"),
                 )
 
-            existing_participant = (
-                db.query(Request)
-                .filter(Request.partition_id == p_id_int, Request.status == "approved")
-                .first()
+            partition_in_use = (
+                False,
+                settings.get_text("partition_in_use_warning_md", partition_id=p_id_int),
             )
-            if existing_participant:
-                return (
-                    False,
-                    settings.get_text(
-                        "partition_in_use_warning_md", partition_id=p_id_int
-                    ),
-                )
+            if not partitions.is_available(db, p_id_int, participant_id):
+                return partition_in_use
 
             request.status = "approved"
             request.partition_id = p_id_int
+            try:
+                # Claims the partition now, before any keys are generated.
+                db.flush()
+            except (PartitionConflictError, IntegrityError):
+                db.rollback()
+                return partition_in_use
 
             # Generate and Store Auth Keys
-            key_generator = AuthKeyGenerator(key_dir=cfg.AUTH_KEYS_DIR)
+            key_generator = AuthKeyGenerator(
+                key_dir=cfg.AUTH_KEYS_DIR, key_pool=key_pool
+            )
             _, _, public_key_pem = key_generator.generate_participant_keys(
                 participant_id
             )
             request.public_key_pem = public_key_pem
             db.commit()
+            blossomfile_cache.invalidate(participant_id)
 
             # Rebuild Authorized Keys CSV
-            approved_participants = (
-                db.query(Request.participant_id, Request.public_key_pem)
-                .filter(
-                    Request.status == "approved", Request.public_key_pem.isnot(None)
-                )
-                .all()
-            )
-            rebuild_authorized_keys_csv(cfg.AUTH_KEYS_DIR, approved_participants)
+            _rebuild_authorized_keys(db)
 
             return (
                 True,
@@ -199,16 +335,89 @@ def manage_request(participant_id: str, partition_id: str, action: str):
             request.partition_id = None
             request.public_key_pem = None
             db.commit()
+            blossomfile_cache.invalidate(participant_id)
 
             # --- Rebuild CSV after denial to revoke access ---
-            approved_participants = (
-                db.query(Request.participant_id, Request.public_key_pem)
-                .filter(
-                    Request.status == "approved", Request.public_key_pem.isnot(None)
+            _rebuild_authorized_keys(db)
+
+            return (
+                True,
+                f"Participant {participant_id} denied. Their access has been revoked.",
+            )
+
+
+async def _rebuild_authorized_keys_async(db) -> None:
+    """Async variant of `_rebuild_authorized_keys`; the file is written off-loop."""
+    approved_participants = (
+        await db.execute(
+            select(Request.participant_id, Request.public_key_pem).where(
+                Request.status == "approved", Request.key_fingerprint.isnot(None)
+            )
+        )
+    ).all()
+    await asyncio.to_thread(
+        rebuild_authorized_keys_csv, cfg.AUTH_KEYS_DIR, approved_participants
+    )
+
+
+async def manage_request_async(participant_id: str, partition_id: str, action: str):
+    """Async variant of `manage_request`; key generation runs in a worker thread."""
+    if not participant_id:
+        return False, "Please select a participant from the pending requests table."
+
+    async with AsyncSessionLocal() as db:
+        request = await db.get(Request, participant_id)
+        if not request:
+            return False, "Participant not found."
+
+        if action == "approve":
+            if not partition_id or not partition_id.isdigit():
+                return False, "Please provide a valid integer for the Partition ID."
+            p_id_int = int(partition_id)
+            if not request.is_activated:
+                return (
+                    False,
+                    settings.get_text("participant_not_activated_warning_md"),
                 )
-                .all()
+
+            partition_in_use = (
+                False,
+                settings.get_text("partition_in_use_warning_md", partition_id=p_id_int),
+            )
+            if not await db.run_sync(partitions.is_available, p_id_int, participant_id):
+                return partition_in_use
+
+            request.status = "approved"
+            request.partition_id = p_id_int
+            try:
+                # Claims the partition now, before any keys are generated.
+                await db.flush()
+            except (PartitionConflictError, IntegrityError):
+                await db.rollback()
+                return partition_in_use
+
+            key_generator = AuthKeyGenerator(
+                key_dir=cfg.AUTH_KEYS_DIR, key_pool=key_pool
+            )
+            _, _, public_key_pem = await asyncio.to_thread(
+                key_generator.generate_participant_keys, participant_id
+            )
+            request.public_key_pem = public_key_pem
+            await db.commit()
+            blossomfile_cache.invalidate(participant_id)
+            await _rebuild_authorized_keys_async(db)
+
+            return (
+                True,
+                f"Participant {participant_id} approved. Keys generated and registry updated.",
             )
-            rebuild_authorized_keys_csv(cfg.AUTH_KEYS_DIR, approved_participants)
+        else:  # Deny
+            request.status = "denied"
+            request.partition_id = None
+            request.public_key_pem = None
+            await db.commit()
+            blossomfile_cache.invalidate(participant_id)
+            await _rebuild_authorized_keys_async(db)
 
             return (
                 True,
@@ -216,17 +425,124 @@ def manage_request(participant_id: str, partition_id: str, action: str):
             )
 
 
-def get_next_partion_id() -> int:
-    """Finds the lowest available partition ID."""
+def manage_requests_bulk(
+    participant_ids: list[str], action: str, max_workers: int | None = None
+) -> list[tuple[str, bool, str]]:
+    """
+    Admin function to approve/deny many requests at once.
+
+    All changes are committed in a single transaction and the authorized
+    keys CSV is rebuilt exactly once. Approved participants are assigned
+    the lowest free partition IDs, and their keys are generated in parallel.
+
+    Returns:
+        A list of (participant_id, success, message) tuples, one per
+        requested participant, in the order given.
+    """
+    participant_ids = list(dict.fromkeys(pid for pid in participant_ids if pid))
+    if not participant_ids:
+        return []
+
+    results: dict[str, tuple[bool, str]] = {}
     with SessionLocal() as db:
-        used_ids_query = (
-            db.query(Request.partition_id)
-            .filter(Request.status == "approved", Request.partition_id.isnot(None))
-            .all()
+        requests = {
+            r.participant_id: r
+            for r in db.query(Request).filter(
+                Request.participant_id.in_(participant_ids)
+            )
+        }
+        selected = []
+        for pid in participant_ids:
+            request = requests.get(pid)
+            if request is None:
+                results[pid] = (False, "Participant not found.")
+            elif action == "approve" and not request.is_activated:
+                results[pid] = (
+                    False,
+                    settings.get_text("participant_not_activated_warning_md"),
+                )
+            elif action == "approve" and request.status == "approved":
+                results[pid] = (False, f"Participant {pid} is already approved.")
+            else:
+                selected.append(request)
+
+        if action == "approve":
+            free_ids = partitions.next_free_many(db, len(selected))
+            for request, partition_id in zip(selected, free_ids):
+                request.status = "approved"
+                request.partition_id = partition_id
+            try:
+                db.flush()
+            except (PartitionConflictError, IntegrityError):
+                # Another admin claimed one of the partitions concurrently.
+                db.rollback()
+                for request in selected:
+                    results[request.participant_id] = (
+                        False,
+                        "Partition allocation conflicted with a concurrent "
+                        "change. Please retry.",
+                    )
+                return [(pid, *results[pid]) for pid in participant_ids]
+
+            key_generator = AuthKeyGenerator(
+                key_dir=cfg.AUTH_KEYS_DIR, key_pool=key_pool
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                keys = executor.map(
+                    key_generator.generate_participant_keys,
+                    [r.participant_id for r in selected],
+                )
+                for request, (_, _, public_key_pem) in zip(selected, keys):
+                    request.public_key_pem = public_key_pem
+                    results[request.participant_id] = (
+                        True,
+                        f"Participant {request.participant_id} approved "
+                        f"with partition {request.partition_id}.",
+                    )
+        else:  # Deny
+            for request in selected:
+                request.status = "denied"
+                request.partition_id = None
+                request.public_key_pem = None
+                results[request.participant_id] = (
+                    True,
+                    f"Participant {request.participant_id} denied.",
+                )
+
+        db.commit()
+        if selected:
+            for request in selected:
+                blossomfile_cache.invalidate(request.participant_id)
+            _rebuild_authorized_keys(db)
+
+    return [(pid, *results[pid]) for pid in participant_ids]
+
+
+def get_federation_revision() -> int:
+    """Returns the revision of the participant tables, bumped on every write."""
+    with SessionLocal() as db:
+        return read_counter(db.connection(), FEDERATION_REVISION_KEY)
+
+
+async def get_federation_revision_async() -> int:
+    """Async variant of `get_federation_revision`."""
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(
+            lambda session: read_counter(session.connection(), FEDERATION_REVISION_KEY)
         )
-        used_ids = {row[0] for row in used_ids_query}
 
-    next_id = 0
-    while next_id in used_ids:
-        next_id += 1
-    return next_id
+
+def get_participant_by_fingerprint(fingerprint: str) -> Request | None:
+    """
+    Maps a public key fingerprint (e.g. from a connected SuperNode) back to
+    the participant that owns it.
+    """
+    if not fingerprint:
+        return None
+    with SessionLocal() as db:
+        return db.query(Request).filter(Request.key_fingerprint == fingerprint).first()
+
+
+def get_next_partion_id() -> int:
+    """Finds the lowest available partition ID."""
+    return participant_registry.next_free_partition()
@@ -4,6 +4,7 @@ import logging
 
 
 from blossomtune_gradio.tls import TLSGenerator
+from blossomtune_gradio.blossomfile import blossomfile_cache
 from blossomtune_gradio import config as cfg
 
 
@@ -57,6 +58,8 @@ def generate_prod_cert():
             ca_key_path=cfg.TLS_CA_KEY_PATH,
             ca_cert_path=cfg.TLS_CA_CERT_PATH,
         )
+        # Participant bundles embed the CA certificate; drop stale ones.
+        blossomfile_cache.clear()
         print(
             f"\n✅ Success! Server certificate and key created in '{cfg.TLS_CERT_DIR}'."
         )
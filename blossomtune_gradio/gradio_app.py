@@ -30,11 +30,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
             )
             check_status_btn = gr.Button("Submit Request / Activate", variant="primary")
             request_status_md = components.request_status_md.render()
-            ca_cert_download = components.ca_cert_download.render()
+            blossomfile_download_md = components.blossomfile_download_md.render()
             check_status_btn.click(
                 fn=callbacks.on_check_participant_status,
                 inputs=[hf_handle_tb, email_tb, activation_code_tb],
-                outputs=[request_status_md, ca_cert_download],
+                outputs=[request_status_md, blossomfile_download_md],
             )
 
         with gr.TabItem("Admin Panel"):
@@ -55,14 +55,36 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
                     runner_app_dd = components.runner_app_dd.render()
                     run_id_tb = components.run_id_tb.render()
                     num_partitions_tb = components.num_partitions_tb.render()
+                    components.run_priority_nb.render()
+                components.runs_df.render()
+                components.run_history_df.render()
 
                 gr.Markdown("--- \n ## 🛂 Federation Requests")
                 with gr.Row():
                     with gr.Column(scale=3):
+                        components.pending_view_state.render()
+                        components.approved_view_state.render()
+                        components.admin_revision_state.render()
+                        with gr.Row():
+                            components.pending_search_tb.render()
+                            components.pending_sort_dd.render()
+                            components.pending_desc_cb.render()
                         pending_requests_df = components.pending_requests_df.render()
+                        with gr.Row():
+                            components.pending_prev_btn.render()
+                            components.pending_page_md.render()
+                            components.pending_next_btn.render()
+                        with gr.Row():
+                            components.approved_search_tb.render()
+                            components.approved_sort_dd.render()
+                            components.approved_desc_cb.render()
                         approved_participants_df = (
                             components.approved_participants_df.render()
                         )
+                        with gr.Row():
+                            components.approved_prev_btn.render()
+                            components.approved_page_md.render()
+                            components.approved_next_btn.render()
                     with gr.Column(scale=2):
                         gr.Markdown("#### Manage Selection")
                         selected_participant_id_tb = (
@@ -72,6 +94,12 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
                         with gr.Row():
                             approve_btn = gr.Button("✅ Approve")
                             deny_btn = gr.Button("❌ Deny")
+                        gr.Markdown("#### Bulk Actions")
+                        bulk_participants_dd = components.bulk_participants_dd.render()
+                        with gr.Row():
+                            bulk_approve_btn = gr.Button("✅ Approve Selected")
+                            bulk_deny_btn = gr.Button("❌ Deny Selected")
+                        bulk_results_df = components.bulk_results_df.render()
 
     outputs_to_update = [
         components.admin_panel,
@@ -82,14 +110,37 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
         components.runner_status_txt,
         components.pending_requests_df,
         components.approved_participants_df,
+        components.bulk_participants_dd,
+        components.pending_page_md,
+        components.pending_prev_btn,
+        components.pending_next_btn,
+        components.pending_view_state,
+        components.approved_page_md,
+        components.approved_prev_btn,
+        components.approved_next_btn,
+        components.approved_view_state,
+        components.admin_revision_state,
         components.superlink_toggle_btn,
         components.runner_toggle_btn,
+        components.runs_df,
+        components.run_history_df,
         components.hf_handle_tb,
     ]
+    # The status refresh re-reads the page each admin table is on, but only
+    # when the federation revision moved past the one this session last saw.
+    status_inputs = [
+        components.pending_view_state,
+        components.approved_view_state,
+        components.admin_revision_state,
+    ]
 
     superlink_toggle_btn.click(
         fn=callbacks.toggle_superlink, inputs=None, outputs=None
-    ).then(fn=callbacks.get_full_status_update, inputs=None, outputs=outputs_to_update)
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
 
     runner_toggle_btn.click(
         fn=callbacks.toggle_runner,
@@ -97,9 +148,14 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
             components.runner_app_dd,
             components.run_id_tb,
             components.num_partitions_tb,
+            components.run_priority_nb,
         ],
         outputs=None,
-    ).then(fn=callbacks.get_full_status_update, inputs=None, outputs=outputs_to_update)
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
 
     approve_btn.click(
         fn=callbacks.on_manage_fed_request,
@@ -109,7 +165,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
             gr.Textbox("approve", visible=False),
         ],
         outputs=None,
-    ).then(fn=callbacks.get_full_status_update, inputs=None, outputs=outputs_to_update)
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
     deny_btn.click(
         fn=callbacks.on_manage_fed_request,
         inputs=[
@@ -118,7 +178,36 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
             gr.Textbox("deny", visible=False),
         ],
         outputs=None,
-    ).then(fn=callbacks.get_full_status_update, inputs=None, outputs=outputs_to_update)
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
+
+    bulk_approve_btn.click(
+        fn=callbacks.on_bulk_manage_fed_requests,
+        inputs=[
+            components.bulk_participants_dd,
+            gr.Textbox("approve", visible=False),
+        ],
+        outputs=[components.bulk_results_df],
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
+    bulk_deny_btn.click(
+        fn=callbacks.on_bulk_manage_fed_requests,
+        inputs=[
+            components.bulk_participants_dd,
+            gr.Textbox("deny", visible=False),
+        ],
+        outputs=[components.bulk_results_df],
+    ).then(
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
+    )
 
     pending_requests_df.select(
         fn=callbacks.on_select_pending,
@@ -126,14 +215,51 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Flower Superlink & Runner") as dem
         outputs=[components.selected_participant_id_tb, components.partition_id_tb],
     )
 
+    # Server-side search, sort and keyset paging of the admin tables
+    for table, table_components in callbacks.TABLE_COMPONENTS.items():
+        search_tb = getattr(components, f"{table}_search_tb")
+        sort_dd = getattr(components, f"{table}_sort_dd")
+        desc_cb = getattr(components, f"{table}_desc_cb")
+        table_outputs = list(table_components.values())
+        if table == "pending":
+            table_outputs.append(components.bulk_participants_dd)
+        view_inputs = [
+            gr.Textbox(table, visible=False),
+            search_tb,
+            sort_dd,
+            desc_cb,
+            table_components["state"],
+        ]
+        search_tb.submit(
+            fn=callbacks.on_table_view_change, inputs=view_inputs, outputs=table_outputs
+        )
+        sort_dd.change(
+            fn=callbacks.on_table_view_change, inputs=view_inputs, outputs=table_outputs
+        )
+        desc_cb.change(
+            fn=callbacks.on_table_view_change, inputs=view_inputs, outputs=table_outputs
+        )
+        for direction in ("prev", "next"):
+            table_components[f"{direction}_btn"].click(
+                fn=callbacks.on_table_page,
+                inputs=[
+                    gr.Textbox(table, visible=False),
+                    gr.Textbox(direction, visible=False),
+                    table_components["state"],
+                ],
+                outputs=table_outputs,
+            )
+
     # Full UI refresh on load and after login
     demo.load(
         fn=callbacks.get_full_status_update,
-        inputs=None,
+        inputs=status_inputs,
         outputs=outputs_to_update,
     )
     login_button.click(
-        fn=callbacks.get_full_status_update, inputs=None, outputs=outputs_to_update
+        fn=callbacks.get_full_status_update,
+        inputs=status_inputs,
+        outputs=outputs_to_update,
     )
     # Live log updates
     demo.load(fn=callbacks.log_updater_generator, inputs=None, outputs=[log_output])
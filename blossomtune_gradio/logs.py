@@ -1,17 +1,253 @@
+import time
+import heapq
+import threading
 from collections import deque
+from itertools import count
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+from blossomtune_gradio import config as cfg
+
+# Severity of each level, for filtering.
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+
+class LogRecord(NamedTuple):
+    """A line of the UI log."""
+
+    seq: int  # Increases by one with every record, across all sources.
+    ts: float
+    source: str  # e.g. "superlink", "runner:<run id>", "email"
+    level: str
+    msg: str
+
+
+class Budget(NamedTuple):
+    """How much of a source's history is kept: lines, and bytes of text."""
+
+    lines: int
+    bytes: int
+
+
+def source_label(source: str) -> str:
+    """Returns the display name of a source: 'runner:run_1' -> 'Runner run_1'."""
+    kind, _, name = source.partition(":")
+    return f"{kind.title()} {name}" if name else kind.title()
+
+
+def format_record(record: LogRecord) -> str:
+    return f"[{source_label(record.source)}] {record.msg}"
+
+
+class RingBuffer:
+    """
+    The records of one source, oldest first. The oldest are evicted once
+    the buffer holds more than `budget.lines` records or `budget.bytes`
+    bytes of message text; the newest record is always kept.
+    """
+
+    __slots__ = ("budget", "records", "size", "dropped")
+
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.records: deque[LogRecord] = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, record: LogRecord) -> None:
+        self.records.append(record)
+        self.size += len(record.msg.encode())
+        while len(self.records) > 1 and (
+            len(self.records) > self.budget.lines or self.size > self.budget.bytes
+        ):
+            evicted = self.records.popleft()
+            self.size -= len(evicted.msg.encode())
+            self.dropped += 1
+
+    def after(self, seq: int) -> List[LogRecord]:
+        """Returns the records newer than `seq`, reading from the newest end."""
+        newer = []
+        for record in reversed(self.records):
+            if record.seq <= seq:
+                break
+            newer.append(record)
+        newer.reverse()
+        return newer
 
 
 class Log:
-    def __init__(self, queue_maxlen: int = 1000):
-        self.maxlen = queue_maxlen
-        self.queue = deque(maxlen=queue_maxlen)
+    """
+    The log shown in the UI: structured records kept in one ring buffer per
+    source, so a chatty runner cannot evict the Superlink's history.
+
+    A source's budget is looked up by its full name, then by its kind (the
+    part before ':', e.g. 'runner'), and defaults to `max_lines` lines and
+    `max_bytes` bytes. `view` merges the buffers of any set of sources in
+    sequence order; `since` returns what was written after a cursor.
+    """
+
+    def __init__(
+        self,
+        max_lines: int | None = None,
+        max_bytes: int | None = None,
+        budgets: Mapping[str, Budget | tuple] | None = None,
+    ):
+        self.default_budget = Budget(
+            max_lines or cfg.LOG_MAX_LINES, max_bytes or cfg.LOG_MAX_BYTES
+        )
+        if budgets is None:
+            budgets = {
+                "runner": (cfg.RUNNER_LOG_LINES, cfg.LOG_MAX_BYTES),
+                **cfg.LOG_SOURCE_BUDGETS,
+            }
+        self.budgets = {source: Budget(*budget) for source, budget in budgets.items()}
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._seq = count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    def budget(self, source: str) -> Budget:
+        kind = source.partition(":")[0]
+        return self.budgets.get(source) or self.budgets.get(kind) or self.default_budget
+
+    def record(self, msg: str, source: str = "app", level: str = "INFO") -> LogRecord:
+        """Appends a record to the buffer of its source."""
+        with self._lock:
+            record = LogRecord(next(self._seq), time.time(), source, level, msg)
+            buffer = self._buffers.get(source)
+            if buffer is None:
+                buffer = self._buffers[source] = RingBuffer(self.budget(source))
+            buffer.append(record)
+            self._last_seq = record.seq
+        return record
+
+    def __call__(self, msg: str, source: str = "app", level: str = "INFO"):
+        return self.record(msg, source, level)
+
+    def warning(self, msg: str, source: str = "app") -> LogRecord:
+        return self.record(msg, source, "WARNING")
+
+    def error(self, msg: str, source: str = "app") -> LogRecord:
+        return self.record(msg, source, "ERROR")
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return sorted(self._buffers)
+
+    def drop_source(self, source: str) -> None:
+        """Forgets the history of a source, e.g. of a run no longer kept."""
+        with self._lock:
+            self._buffers.pop(source, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+
+    @property
+    def last_seq(self) -> int:
+        """The sequence number of the newest record written, or 0."""
+        return self._last_seq
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Lines, bytes and evicted records, by source."""
+        with self._lock:
+            return {
+                source: {
+                    "lines": len(buffer.records),
+                    "bytes": buffer.size,
+                    "dropped": buffer.dropped,
+                }
+                for source, buffer in self._buffers.items()
+            }
+
+    def view(
+        self,
+        sources: Iterable[str] | None = None,
+        after: int = 0,
+        min_level: str | None = None,
+        limit: int | None = None,
+    ) -> List[LogRecord]:
+        """
+        Returns the records of `sources` (default: all) newer than the
+        sequence number `after`, merged in sequence order.
+
+        Args:
+            min_level: Leave out records below this level.
+            limit: Keep only the newest `limit` records.
+        """
+        with self._lock:
+            if sources is None:
+                buffers = list(self._buffers.values())
+            else:
+                buffers = [self._buffers[s] for s in sources if s in self._buffers]
+            parts = [buffer.after(after) for buffer in buffers]
+        records = heapq.merge(*parts, key=lambda record: record.seq)
+        if min_level:
+            threshold = LEVELS[min_level]
+            records = (r for r in records if LEVELS.get(r.level, 0) >= threshold)
+        records = list(records)
+        return records[-limit:] if limit else records
+
+    def since(
+        self, cursor: int, sources: Iterable[str] | None = None
+    ) -> Tuple[List[LogRecord], int]:
+        """
+        Returns the records of `sources` written after `cursor`, and the
+        cursor to pass next time. Start from 0. Checking an idle log costs
+        a comparison; otherwise only the new records are read.
+        """
+        last_seq = self._last_seq
+        if last_seq <= cursor:
+            return [], cursor
+        records = self.view(sources=sources, after=cursor)
+        return records, max(last_seq, records[-1].seq if records else 0)
+
+    def text(self, **view) -> str:
+        """The records of `view(**view)`, formatted one per line."""
+        return "\n".join(format_record(record) for record in self.view(**view))
 
     @property
     def output(self) -> str:
-        return "\n".join(self.queue)
+        return self.text()
+
+
+class LogTail:
+    """
+    Follows a log for one viewer: `poll` reads the records after its cursor
+    and returns the text shown so far, or None if nothing was written.
+
+    The text is only extended, so Gradio sends each update as an append of
+    the new lines. Once more than twice `max_lines` lines are held, it is
+    trimmed to the newest `max_lines`, which is sent in full once.
+    """
+
+    def __init__(
+        self,
+        log: Log,
+        sources: Iterable[str] | None = None,
+        max_lines: int | None = None,
+    ):
+        self.log = log
+        self.sources = None if sources is None else list(sources)
+        self.max_lines = max_lines or cfg.LOG_MAX_LINES
+        self.cursor = 0
+        self.lines: deque[str] = deque()
+        self.text = ""
 
-    def __call__(self, msg: str):
-        self.queue.append(msg)
+    def poll(self) -> str | None:
+        records, self.cursor = self.log.since(self.cursor, self.sources)
+        if not records:
+            return None
+        new_lines = [format_record(record) for record in records]
+        self.lines.extend(new_lines)
+        if len(self.lines) > 2 * self.max_lines:
+            for _ in range(len(self.lines) - self.max_lines):
+                self.lines.popleft()
+            self.text = "\n".join(self.lines)
+        else:
+            delta = "\n".join(new_lines)
+            self.text = f"{self.text}\n{delta}" if self.text else delta
+        return self.text
 
 
 log = Log()
@@ -56,10 +56,13 @@ class SMTPMailSender(EmailSender):
                     server.starttls()
                     server.login(cfg.SMTP_USER, cfg.SMTP_PASSWORD)
                 server.send_message(msg)
-            log("[Email] SMTP email sent.")
+            log("SMTP email sent.", source="email")
             return True, ""
         except Exception as e:
-            log(f"[Email] CRITICAL ERROR sending to {recipient_email} via SMTP: {e}")
+            log.error(
+                f"CRITICAL ERROR sending to {recipient_email} via SMTP: {e}",
+                source="email",
+            )
             return False, f"Error sending email via SMTP: {e}"
 
 
@@ -77,7 +80,7 @@ class MailjetSender(EmailSender):
         # Check for truthy values, not just attribute existence.
         if not (cfg.SMTP_USER and cfg.SMTP_PASSWORD):
             error_msg = "Mailjet API keys are not configured."
-            log(f"[Email] {error_msg}")
+            log.error(error_msg, source="email")
             return False, error_msg
 
         api_key = cfg.SMTP_USER
@@ -101,11 +104,11 @@ class MailjetSender(EmailSender):
         try:
             response = requests.post(url, auth=(api_key, api_secret), json=data)
             response.raise_for_status()
-            log(f"[Email] Mailjet email sent. Status: {response.status_code}")
+            log(f"Mailjet email sent. Status: {response.status_code}", source="email")
             return True, ""
         except requests.exceptions.RequestException as e:
             error_msg = f"Error sending email via Mailjet API: {e}. Response: {e.response.text if e.response else 'No response'}"
-            log(f"[Email] CRITICAL ERROR: {error_msg}")
+            log.error(f"CRITICAL ERROR: {error_msg}", source="email")
             return False, error_msg
 
 
@@ -123,14 +126,12 @@ def get_email_sender() -> EmailSender:
     return SMTPMailSender()
 
 
-def send_activation_email(
-    recipient_email: str, activation_code: str
-) -> tuple[bool, str]:
+def build_activation_email(activation_code: str) -> tuple[str, str]:
     """
-    Sends the activation code to the user using the configured email provider.
+    Builds the subject and body of the activation email.
 
-    This function uses the factory to get the correct sender and abstracts the
-    implementation details.
+    Returns:
+        A tuple containing the subject line and the plain-text body.
     """
     subject = "Your BlossomTune Activation Code"
     body = (
@@ -139,6 +140,19 @@ def send_activation_email(
         f"{activation_code}\n\n"
         "Thank you!"
     )
+    return subject, body
+
+
+def send_activation_email(
+    recipient_email: str, activation_code: str
+) -> tuple[bool, str]:
+    """
+    Sends the activation code to the user using the configured email provider.
+
+    This function uses the factory to get the correct sender and abstracts the
+    implementation details.
+    """
+    subject, body = build_activation_email(activation_code)
 
     sender = get_email_sender()
     success, error_message = sender.send_email(recipient_email, subject, body)
@@ -0,0 +1,215 @@
+import logging
+import threading
+from datetime import timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio import mail
+from blossomtune_gradio.database import SessionLocal, OutboxMessage, utcnow
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+
+def enqueue_email(
+    db: Session, recipient_email: str, subject: str, body: str
+) -> OutboxMessage:
+    """
+    Adds an email to the outbox using the caller's session.
+
+    The message is not committed here: it becomes visible to the workers
+    together with the rest of the caller's transaction, so an email is only
+    ever sent for changes that were actually persisted.
+    """
+    message = OutboxMessage(
+        recipient=recipient_email,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+    )
+    db.add(message)
+    return message
+
+
+def enqueue_activation_email(
+    db: Session, recipient_email: str, activation_code: str
+) -> OutboxMessage:
+    """Queues the activation code email for the given recipient."""
+    subject, body = mail.build_activation_email(activation_code)
+    return enqueue_email(db, recipient_email, subject, body)
+
+
+def requeue_in_flight() -> int:
+    """
+    Returns messages left in the 'sending' state to the queue.
+
+    A message is only 'sending' while a worker holds it, so any such row
+    found at startup belongs to a worker that died mid-delivery.
+    """
+    with SessionLocal() as db:
+        count = (
+            db.query(OutboxMessage)
+            .filter(OutboxMessage.status == "sending")
+            .update({"status": "pending"}, synchronize_session=False)
+        )
+        db.commit()
+    if count:
+        log.warning(f"Re-queued {count} outbox message(s) left in flight.")
+    return count
+
+
+def _claim_next() -> OutboxMessage | None:
+    """
+    Atomically claims the oldest deliverable message.
+
+    The claim is a conditional UPDATE on the status column, so two workers
+    racing for the same row cannot both win it.
+    """
+    now = utcnow()
+    with SessionLocal() as db:
+        candidate = (
+            db.query(OutboxMessage.id)
+            .filter(
+                OutboxMessage.status == "pending",
+                or_(
+                    OutboxMessage.next_attempt_at.is_(None),
+                    OutboxMessage.next_attempt_at <= now,
+                ),
+            )
+            .order_by(OutboxMessage.id.asc())
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = (
+            db.query(OutboxMessage)
+            .filter(OutboxMessage.id == candidate.id, OutboxMessage.status == "pending")
+            .update({"status": "sending"}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return None
+        message = db.get(OutboxMessage, candidate.id)
+        db.expunge(message)
+        return message
+
+
+def _record_result(message_id: int, success: bool, error: str) -> None:
+    """Stores the outcome of a delivery attempt."""
+    with SessionLocal() as db:
+        message = db.get(OutboxMessage, message_id)
+        if message is None:
+            return
+        message.attempts += 1
+        if success:
+            message.status = "sent"
+            message.sent_at = utcnow()
+            message.last_error = None
+        elif message.attempts >= cfg.OUTBOX_MAX_ATTEMPTS:
+            message.status = "failed"
+            message.last_error = error
+            log.error(
+                f"Giving up on outbox message {message_id} after "
+                f"{message.attempts} attempts: {error}"
+            )
+        else:
+            # Exponential backoff between attempts.
+            delay = cfg.OUTBOX_RETRY_BACKOFF * (2 ** (message.attempts - 1))
+            message.status = "pending"
+            message.last_error = error
+            message.next_attempt_at = utcnow() + timedelta(seconds=delay)
+        db.commit()
+
+
+def deliver_next(sender: mail.EmailSender | None = None) -> bool:
+    """
+    Claims and delivers a single outbox message.
+
+    Returns:
+        True if a message was processed (successfully or not), False if the
+        outbox had nothing ready to send.
+    """
+    message = _claim_next()
+    if message is None:
+        return False
+    sender = sender or mail.get_email_sender()
+    try:
+        success, error = sender.send_email(
+            message.recipient, message.subject, message.body
+        )
+    except Exception as e:
+        success, error = False, str(e)
+    _record_result(message.id, success, error)
+    return True
+
+
+class OutboxWorkerPool:
+    """
+    A pool of daemon threads that drain the email outbox.
+
+    Workers sleep until either the poll interval elapses or `notify()` is
+    called after a new message has been committed.
+    """
+
+    def __init__(
+        self, num_workers: int | None = None, poll_interval: float | None = None
+    ):
+        self.num_workers = (
+            cfg.OUTBOX_WORKERS if num_workers is None else max(0, num_workers)
+        )
+        self.poll_interval = (
+            cfg.OUTBOX_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self) -> None:
+        """Re-queues interrupted deliveries and starts the worker threads."""
+        if self.running:
+            return
+        self._stopping.clear()
+        requeue_in_flight()
+        self._threads = [
+            threading.Thread(
+                target=self._worker_loop, name=f"outbox-worker-{i}", daemon=True
+            )
+            for i in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        log.info(f"Started {self.num_workers} outbox worker(s).")
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Signals the workers to exit and waits for them to finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wakes the workers up so a freshly queued message is sent promptly."""
+        self._wakeup.set()
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = deliver_next()
+            except Exception as e:
+                log.error(f"Outbox worker error: {e}")
+                processed = False
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+# Shared pool, started from the application entrypoint.
+worker_pool = OutboxWorkerPool()
@@ -0,0 +1,62 @@
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from blossomtune_gradio.database import Partition
+
+
+def _next_unlisted(db: Session) -> int:
+    """Returns the partition after the highest one in the free-list."""
+    top = db.query(func.max(Partition.partition_id)).scalar()
+    return 0 if top is None else top + 1
+
+
+def next_free(db: Session) -> int:
+    """
+    Returns the lowest partition ID not held by an approved participant.
+
+    Both lookups are served by an index (the partial free index and the
+    primary key), so this is O(log n) in the number of partitions.
+    """
+    free = (
+        db.query(func.min(Partition.partition_id))
+        .filter(Partition.participant_id.is_(None))
+        .scalar()
+    )
+    return free if free is not None else _next_unlisted(db)
+
+
+def next_free_many(db: Session, count: int) -> List[int]:
+    """Returns the `count` lowest free partition IDs, in ascending order."""
+    if count <= 0:
+        return []
+    free = [
+        row.partition_id
+        for row in db.query(Partition.partition_id)
+        .filter(Partition.participant_id.is_(None))
+        .order_by(Partition.partition_id.asc())
+        .limit(count)
+    ]
+    if len(free) < count:
+        start = _next_unlisted(db)
+        free.extend(range(start, start + count - len(free)))
+    return free
+
+
+def is_available(db: Session, partition_id: int, participant_id: str) -> bool:
+    """Returns True if the partition is free or already held by this participant."""
+    holder = db.get(Partition, partition_id)
+    return holder is None or holder.participant_id in (None, participant_id)
+
+
+def release(db: Session, participant_id: str) -> None:
+    """
+    Returns a participant's partition to the free-list.
+
+    Denying a request releases its partition automatically when the session
+    is flushed; this is only needed for changes made outside the ORM.
+    """
+    db.query(Partition).filter(Partition.participant_id == participant_id).update(
+        {"participant_id": None}, synchronize_session=False
+    )
@@ -1,49 +1,28 @@
 import os
 import shutil
-import threading
-import subprocess
+import asyncio
 
 from blossomtune_gradio.logs import log
 from blossomtune_gradio import config as cfg
-from blossomtune_gradio import util
-from blossomtune_gradio.database import SessionLocal, Config
-
-
-# In-memory store for background processes and logs
-process_store = {"superlink": None, "runner": None}
-
-
-def run_process(command, process_key):
-    """Generic function to run a background process and log its output."""
-    global process_store
-    log(f"[{process_key.title()}] Starting: {' '.join(command)}")
-    try:
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-        )
-        process_store[process_key] = process
-        for line in iter(process.stdout.readline, ""):
-            log(f"[{process_key.title()}] {line.strip()}")
-        process.wait()
-    except Exception as e:
-        log(f"[{process_key.title()}] CRITICAL ERROR: {e}")
-    finally:
-        log(f"[{process_key.title()}] Process finished.")
-        process_store[process_key] = None
-
-
-def start_superlink():
+from blossomtune_gradio.supervisor import supervisor
+from blossomtune_gradio import runs
+
+
+def is_running(process_key: str) -> bool:
+    """Returns True if the supervised process is running."""
+    return supervisor.is_running(process_key)
+
+
+async def start_superlink():
     # Do not start an internal process if in external mode.
     if cfg.SUPERLINK_MODE == "external":
-        log.warning("start_superlink called while in external mode. Operation aborted.")
+        log.warning(
+            "start_superlink called while in external mode. Operation aborted.",
+            source="superlink",
+        )
         return False, "Application is in external Superlink mode."
 
-    if process_store["superlink"] and process_store["superlink"].poll() is None:
+    if is_running("superlink"):
         return False, "Superlink process is already running."
 
     command = [
@@ -57,72 +36,64 @@ def start_superlink():
         "--auth-list-public-keys",
         cfg.AUTH_KEYS_CSV_PATH,
     ]
-    threading.Thread(
-        target=run_process, args=(command, "superlink"), daemon=True
-    ).start()
+    if not await supervisor.start("superlink", command):
+        return False, "Superlink process failed to start. Check the logs."
     return True, "Superlink process started."
 
 
-def start_runner(
+async def start_runner(
     runner_app: str,
     run_id: str,
     num_partitions: str,
+    priority: int | float | None = 0,
 ):
-    if process_store["runner"] and process_store["runner"].poll() is None:
-        return False, "A Runner process is already running."
-
+    """
+    Queues a federated run. The run dispatcher launches it as soon as a
+    runner slot is free, after any queued run of a higher priority.
+    """
     # Check if the Superlink is running, respecting the configured mode
-    if cfg.SUPERLINK_MODE == "external":
-        if not util.is_port_open(cfg.SUPERLINK_HOST, cfg.SUPERLINK_PORT):
-            return False, "External Superlink is not running or unreachable."
-    elif not (process_store["superlink"] and process_store["superlink"].poll() is None):
-        return (
-            False,
-            "Internal Superlink is not running. Please start it before starting the runner.",
-        )
+    error = await asyncio.to_thread(runs.superlink_error)
+    if error:
+        return False, error
 
     if not all([runner_app, run_id, num_partitions]):
         return False, "Please provide a Runner App, Run ID, and Total Partitions."
     if not num_partitions.isdigit() or int(num_partitions) <= 0:
         return False, "Total Partitions must be a positive integer."
 
-    # Update the number of partitions in the database using SQLAlchemy
-    with SessionLocal() as db:
-        config_entry = db.query(Config).filter(Config.key == "num_partitions").first()
-        if config_entry:
-            config_entry.value = num_partitions
-        else:
-            db.add(Config(key="num_partitions", value=num_partitions))
-        db.commit()
-
     runner_app_path = runner_app.replace(".", os.path.sep)
     if not os.path.exists(runner_app_path):
         return False, f"Unable to find app path '{runner_app_path}'."
 
-    # Construct the command for a TLS-enabled runner
-    command = [
-        shutil.which("flwr"),
-        "run",
-        runner_app_path,
-        "local-deployment",
-        "--federation-config",
-        f'address="{cfg.SUPERLINK_HOST}:{cfg.SUPERLINK_CONTROL_API_PORT}" root-certificates="{cfg.BLOSSOMTUNE_TLS_CA_CERTFILE}"',
-        "--stream",
-    ]
-    threading.Thread(target=run_process, args=(command, "runner"), daemon=True).start()
-    return True, "Federation Run is starting...."
-
-
-def stop_process(
+    if await asyncio.to_thread(runs.find_active_run, run_id):
+        return False, f"Run '{run_id}' is already queued or running."
+
+    priority = int(priority or 0)
+    row_id = await asyncio.to_thread(
+        runs.enqueue_run, run_id, runner_app, int(num_partitions), priority
+    )
+    runs.dispatcher.notify()
+    ahead = await asyncio.to_thread(runs.queue_position, row_id)
+    if not ahead and runs.run_scheduler.has_capacity():
+        return True, "Federation Run is starting...."
+    return True, f"Run '{run_id}' queued at priority {priority}; {ahead} run(s) ahead."
+
+
+async def stop_run(run_id: str):
+    """
+    Stops a federated run; the supervisor logs the outcome. A run still
+    waiting in the queue is cancelled instead.
+    """
+    if runs.run_scheduler.is_active(run_id):
+        return await runs.run_scheduler.stop(run_id)
+    cancelled = await asyncio.to_thread(runs.cancel_queued_run, run_id)
+    if cancelled:
+        log("Cancelled while queued.", source=runs.process_name(run_id))
+    return cancelled
+
+
+async def stop_process(
     process_key: str,
 ):
-    process = process_store.get(process_key)
-    if process and process.poll() is None:
-        process.terminate()
-        process.wait()
-        log(f"[{process_key.title()}] Process stopped by user.")
-        process_store[process_key] = None
-    else:
-        log(
-            f"[{process_key.title()}] Stop command received, but no process was running."
-        )
+    """Stops a supervised process; the supervisor logs the outcome."""
+    return await supervisor.stop(process_key)
@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, NamedTuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    case,
+    delete,
+    func,
+    literal,
+)
+from sqlalchemy.dialects import sqlite
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.database import create_db_engine
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+
+class Limit(NamedTuple):
+    """A token bucket holding `burst` tokens, regaining one every `refill` seconds."""
+
+    burst: int
+    refill: float
+
+
+class MemoryBackend:
+    """
+    Token buckets in a bounded LRU dict, private to this process.
+
+    `take` returns 0 when a token was taken, or else the number of seconds
+    until the bucket holds one again.
+    """
+
+    blocking = False
+
+    def __init__(
+        self, maxsize: int = 10000, clock: Callable[[], float] = time.monotonic
+    ):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = self.clock()
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                tokens = float(limit.burst)
+            else:
+                tokens, updated = entry
+                tokens = min(limit.burst, tokens + (now - updated) / limit.refill)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) * limit.refill
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+_metadata = MetaData()
+
+# Kept out of the application models: this table lives in its own database
+# file, so throttling never contends with the federation database.
+buckets = Table(
+    "rate_limit_buckets",
+    _metadata,
+    Column("key", String, primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated", Float, nullable=False),
+    Column("granted", Integer, nullable=False),
+    # When the bucket is full again, and the row can be dropped.
+    Column("full_at", Float, nullable=False),
+)
+
+
+class SQLiteBackend:
+    """
+    Token buckets in a SQLite file, shared by every process using it.
+
+    Each `take` is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    statement computing the refill in SQL, so concurrent processes cannot
+    interleave between reading and writing a bucket. Rows of buckets that
+    have refilled completely are pruned every `prune_every` calls.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        clock: Callable[[], float] = time.time,
+        prune_every: int = 1000,
+    ):
+        self.path = path
+        self.clock = clock
+        self.prune_every = prune_every
+        self._engine = None
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._engine = create_db_engine(f"sqlite:///{self.path}")
+                _metadata.create_all(self._engine)
+            return self._engine
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = self.clock()
+        refilled = func.min(
+            limit.burst, buckets.c.tokens + (now - buckets.c.updated) / limit.refill
+        )
+        granted = refilled >= 1
+        tokens = case((granted, refilled - 1), else_=refilled)
+        stmt = sqlite.insert(buckets).values(
+            key=key,
+            tokens=limit.burst - 1,
+            updated=now,
+            granted=1,
+            full_at=now + limit.refill,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[buckets.c.key],
+            set_={
+                "tokens": tokens,
+                "updated": now,
+                "granted": case((granted, 1), else_=0),
+                "full_at": literal(now) + (limit.burst - tokens) * limit.refill,
+            },
+        ).returning(buckets.c.tokens, buckets.c.granted)
+
+        with self.engine.begin() as connection:
+            row = connection.execute(stmt).one()
+            self._calls += 1
+            if self.prune_every and self._calls % self.prune_every == 0:
+                connection.execute(delete(buckets).where(buckets.c.full_at < now))
+        return 0.0 if row.granted else (1 - row.tokens) * limit.refill
+
+    def clear(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(buckets))
+
+
+class RateLimiter:
+    """
+    Throttles requests with one token bucket per key of each dimension
+    (e.g. HF handle, email and client IP).
+
+    A request is allowed only if every bucket it touches grants a token.
+    Dimensions are checked in the order of `limits` and the first refusal
+    ends the check. Backend failures are logged and let the request
+    through: throttling must not take the join form down.
+    """
+
+    def __init__(self, backend, limits: Mapping[str, Limit]):
+        self.backend = backend
+        self.limits = dict(limits)
+        self.allowed = 0
+        self.rejected = {dimension: 0 for dimension in self.limits}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "rejected": sum(self.rejected.values()),
+                **{f"rejected_{name}": count for name, count in self.rejected.items()},
+                "errors": self.errors,
+            }
+
+    def check(self, **keys: str | None) -> float:
+        """
+        Takes a token for each non-empty key, by dimension name.
+
+        Returns:
+            0 if the request is allowed, or else the seconds to wait.
+        """
+        for dimension, limit in self.limits.items():
+            value = (keys.get(dimension) or "").strip().lower()
+            if not value:
+                continue
+            try:
+                wait = self.backend.take(f"{dimension}:{value}", limit)
+            except Exception as e:
+                log.error(f"Rate limiter backend error: {e}")
+                with self._lock:
+                    self.errors += 1
+                continue
+            if wait > 0:
+                with self._lock:
+                    self.rejected[dimension] += 1
+                log.info(f"Rate limited by {dimension}; retry in {wait:.0f}s.")
+                return wait
+        with self._lock:
+            self.allowed += 1
+        return 0.0
+
+    async def check_async(self, **keys: str | None) -> float:
+        """Async variant of `check`; blocking backends run in a worker thread."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.check, **keys)
+        return self.check(**keys)
+
+
+def client_ip(headers: Mapping[str, str] | None, host: str | None) -> str | None:
+    """
+    Returns the client address of a web request.
+
+    Behind a reverse proxy (as on Hugging Face Spaces) the peer is the
+    proxy, which appends the real client address to X-Forwarded-For; the
+    last entry is used because earlier ones are supplied by the client.
+    """
+    forwarded = (headers or {}).get("x-forwarded-for", "")
+    if cfg.RATE_LIMIT_TRUST_FORWARDED and forwarded.strip():
+        return forwarded.split(",")[-1].strip()
+    return host
+
+
+def create_rate_limiter() -> RateLimiter | None:
+    """Builds the rate limiter from the configuration, or None if disabled."""
+    if not cfg.RATE_LIMIT_ENABLED:
+        return None
+    if cfg.RATE_LIMIT_BACKEND == "sqlite":
+        backend = SQLiteBackend(cfg.RATE_LIMIT_DB_PATH)
+    elif cfg.RATE_LIMIT_BACKEND == "memory":
+        backend = MemoryBackend(maxsize=cfg.RATE_LIMIT_MAX_KEYS)
+    else:
+        raise ValueError(f"Unknown rate limit backend '{cfg.RATE_LIMIT_BACKEND}'.")
+    per_participant = Limit(cfg.RATE_LIMIT_BURST, cfg.RATE_LIMIT_REFILL)
+    return RateLimiter(
+        backend,
+        {
+            "ip": Limit(cfg.RATE_LIMIT_IP_BURST, cfg.RATE_LIMIT_IP_REFILL),
+            "hf_handle": per_participant,
+            "email": per_participant,
+        },
+    )
+
+
+# Shared limiter for the join/activate form (None when disabled).
+limiter = create_rate_limiter()
@@ -0,0 +1,301 @@
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from collections import defaultdict
+from itertools import count
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.database import (
+    FEDERATION_REVISION_KEY,
+    FederationSession,
+    SessionLocal,
+    Request,
+    read_counter,
+)
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+
+class Participant(NamedTuple):
+    """An immutable snapshot of a row of the requests table."""
+
+    participant_id: str
+    status: str
+    timestamp: datetime | None
+    partition_id: int | None
+    email: str | None
+    hf_handle: str | None
+    activation_code: str | None
+    is_activated: int
+    public_key_pem: str | None
+    key_fingerprint: str | None
+
+
+# Column defaults applied by the database, for snapshots of new rows.
+_DEFAULTS = {"status": "pending", "is_activated": 0}
+
+
+def _snapshot(request: Request) -> Participant:
+    """
+    Copies a Request's loaded values without triggering any lazy load.
+
+    Server-side defaults are not loaded after an INSERT, so the timestamp
+    of a row added by this process stays None until the next reload.
+    """
+    values = inspect(request).dict
+    snapshot = {}
+    for field in Participant._fields:
+        value = values.get(field)
+        snapshot[field] = _DEFAULTS.get(field) if value is None else value
+    return Participant(**snapshot)
+
+
+class ParticipantRegistry:
+    """
+    An in-memory projection of the requests table, indexed by participant
+    ID, (HF handle, email), status and partition.
+
+    Reads are dictionary lookups. Writes made through ORM sessions in this
+    process are applied in place once committed, in revision order. At most
+    once per `refresh_interval` seconds a read checks the federation
+    revision, and reloads the whole table only if another process (or a
+    Core statement) wrote since.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.refresh_interval = (
+            cfg.REGISTRY_REFRESH_INTERVAL
+            if refresh_interval is None
+            else refresh_interval
+        )
+        self.clock = clock
+        self.reloads = 0
+        self.applied = 0
+        self._by_id: Dict[str, Participant] = {}
+        self._by_handle_email: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        self._by_status: Dict[str, Set[str]] = defaultdict(set)
+        self._by_partition: Dict[int, str] = {}
+        self._revision: int | None = None
+        # Committed changes waiting for an earlier revision, by the revision
+        # they start from: (revision reached, changes).
+        self._pending: Dict[int, Tuple[int, Dict[str, Participant | None]]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "participants": len(self._by_id),
+                "reloads": self.reloads,
+                "applied": self.applied,
+            }
+
+    def invalidate(self) -> None:
+        """Drops the projection; the next read reloads the table."""
+        with self._lock:
+            self._revision = None
+            self._pending = {}
+
+    def needs_refresh(self) -> bool:
+        """Returns True if the next read would query the database."""
+        with self._lock:
+            return (
+                self._revision is None
+                or self.clock() - self._checked_at >= self.refresh_interval
+            )
+
+    def refresh(self) -> None:
+        """Reloads the projection if it is empty, or stale and behind."""
+        with self._lock:
+            self._refresh()
+
+    async def refresh_async(self) -> None:
+        """Runs `refresh` in a worker thread, only if it would query."""
+        if self.needs_refresh():
+            await asyncio.to_thread(self.refresh)
+
+    def _refresh(self) -> None:
+        now = self.clock()
+        if (
+            self._revision is not None
+            and now - self._checked_at < self.refresh_interval
+        ):
+            return
+        with SessionLocal() as db:
+            revision = read_counter(db.connection(), FEDERATION_REVISION_KEY)
+            if revision != self._revision:
+                rows = db.execute(
+                    select(*(getattr(Request, f) for f in Participant._fields))
+                ).all()
+                self._clear()
+                for row in rows:
+                    self._add(Participant(*row))
+                self._revision = revision
+                self.reloads += 1
+                self._pending = {
+                    start: entry
+                    for start, entry in self._pending.items()
+                    if start >= revision
+                }
+                self._drain()
+        self._checked_at = now
+
+    def _clear(self) -> None:
+        self._by_id.clear()
+        self._by_handle_email.clear()
+        self._by_status.clear()
+        self._by_partition.clear()
+
+    def _add(self, participant: Participant) -> None:
+        pid = participant.participant_id
+        self._by_id[pid] = participant
+        self._by_handle_email[(participant.hf_handle, participant.email)].append(pid)
+        self._by_status[participant.status].add(pid)
+        if participant.status == "approved" and participant.partition_id is not None:
+            self._by_partition[participant.partition_id] = pid
+
+    def _remove(self, participant_id: str) -> None:
+        participant = self._by_id.pop(participant_id, None)
+        if participant is None:
+            return
+        key = (participant.hf_handle, participant.email)
+        self._by_handle_email[key].remove(participant_id)
+        if not self._by_handle_email[key]:
+            del self._by_handle_email[key]
+        self._by_status[participant.status].discard(participant_id)
+        if self._by_partition.get(participant.partition_id) == participant_id:
+            del self._by_partition[participant.partition_id]
+
+    def apply(
+        self, changes: Dict[str, Participant | None], revision: int, flushes: int
+    ) -> None:
+        """
+        Applies committed changes (None for a deleted row) that moved the
+        federation revision to `revision` in `flushes` increments.
+
+        Concurrent sessions may report their commits out of order, so
+        changes starting after a revision not seen yet are held back until
+        it is. A gap left by another process is closed by the next reload.
+        """
+        with self._lock:
+            if self._revision is None or revision <= self._revision:
+                # Not loaded yet, or already loaded with these changes.
+                return
+            self._pending[revision - flushes] = (revision, changes)
+            self._drain()
+
+    def _drain(self) -> None:
+        """Applies the pending changes that follow the current revision."""
+        while self._revision in self._pending:
+            revision, changes = self._pending.pop(self._revision)
+            for pid, participant in changes.items():
+                self._remove(pid)
+                if participant is not None:
+                    self._add(participant)
+            self._revision = revision
+            self.applied += 1
+
+    def get(self, participant_id: str) -> Participant | None:
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(participant_id)
+
+    def find(
+        self, hf_handle: str, email: str, activation_code: str | None = None
+    ) -> Participant | None:
+        """Returns the participant with this handle and email (and code, if given)."""
+        with self._lock:
+            self._refresh()
+            for pid in self._by_handle_email.get((hf_handle, email), ()):
+                participant = self._by_id[pid]
+                if (
+                    not activation_code
+                    or participant.activation_code == activation_code
+                ):
+                    return participant
+            return None
+
+    def count(self, status: str) -> int:
+        """Returns the number of participants with a status."""
+        with self._lock:
+            self._refresh()
+            return len(self._by_status.get(status, ()))
+
+    def with_status(self, status: str) -> List[Participant]:
+        with self._lock:
+            self._refresh()
+            return [self._by_id[pid] for pid in self._by_status.get(status, ())]
+
+    def holder(self, partition_id: int) -> Participant | None:
+        """Returns the approved participant holding a partition, if any."""
+        with self._lock:
+            self._refresh()
+            pid = self._by_partition.get(partition_id)
+            return self._by_id[pid] if pid is not None else None
+
+    def next_free_partition(self) -> int:
+        """Returns the lowest partition ID not held by an approved participant."""
+        with self._lock:
+            self._refresh()
+            return next(i for i in count() if i not in self._by_partition)
+
+
+# Shared registry used by the federation module.
+participant_registry = ParticipantRegistry()
+
+# Session.info keys of the changes pending in a transaction.
+_CHANGES = "participant_registry_changes"
+_FLUSHES = "participant_registry_flushes"
+_REVISION = "participant_registry_revision"
+
+
+@event.listens_for(FederationSession, "after_flush")
+def _collect_request_changes(session, flush_context):
+    """
+    Snapshots the Request rows written by a flush, together with the
+    federation revision the flush moved to, as left in `session.info` by
+    `_bump_federation_revision`. Mirrors the condition under which it bumps.
+    """
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, Request):
+            changes[obj.participant_id] = _snapshot(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Request) and session.is_modified(obj):
+            changes[obj.participant_id] = _snapshot(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Request):
+            changes[obj.participant_id] = None
+    if not changes:
+        return
+    session.info.setdefault(_CHANGES, {}).update(changes)
+    session.info[_FLUSHES] = session.info.get(_FLUSHES, 0) + 1
+    revision = session.info.pop(FEDERATION_REVISION_KEY, None)
+    if revision is not None:
+        session.info[_REVISION] = revision
+
+
+@event.listens_for(FederationSession, "after_commit")
+def _apply_request_changes(session):
+    changes = session.info.pop(_CHANGES, None)
+    flushes = session.info.pop(_FLUSHES, 0)
+    revision = session.info.pop(_REVISION, None)
+    if changes and revision is not None:
+        participant_registry.apply(changes, revision, flushes)
+
+
+@event.listens_for(FederationSession, "after_rollback")
+def _discard_request_changes(session):
+    for key in (_CHANGES, _FLUSHES, _REVISION, FEDERATION_REVISION_KEY):
+        session.info.pop(key, None)
@@ -0,0 +1,195 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import dns.resolver
+import dns.asyncresolver
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+# Exceptions that mean "this domain has no MX record" and may be cached.
+NEGATIVE_ANSWERS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+
+class DnsPythonBackend:
+    """
+    Resolves MX records with dnspython.
+
+    Both methods return the TTL of the answer in seconds, and raise
+    NXDOMAIN/NoAnswer for domains without an MX record.
+    """
+
+    default_ttl = 300.0
+
+    def _answer_ttl(self, answer) -> float:
+        try:
+            return float(answer.rrset.ttl)
+        except (AttributeError, TypeError, ValueError):
+            return self.default_ttl
+
+    def resolve(self, domain: str) -> float:
+        return self._answer_ttl(dns.resolver.resolve(domain, "MX"))
+
+    async def resolve_async(self, domain: str) -> float:
+        return self._answer_ttl(await dns.asyncresolver.resolve(domain, "MX"))
+
+
+class StubResolver:
+    """
+    An offline backend answering from a fixed table, for tests and benchmarks.
+
+    Domains present in `records` resolve with the given TTL; any other
+    domain raises NXDOMAIN.
+    """
+
+    def __init__(self, records: Dict[str, float] | None = None, latency: float = 0.0):
+        self.records = dict(records or {})
+        self.latency = latency
+        self.calls = 0
+
+    def resolve(self, domain: str) -> float:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if domain not in self.records:
+            raise dns.resolver.NXDOMAIN()
+        return float(self.records[domain])
+
+    async def resolve_async(self, domain: str) -> float:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if domain not in self.records:
+            raise dns.resolver.NXDOMAIN()
+        return float(self.records[domain])
+
+
+class CachingResolver:
+    """
+    A bounded LRU cache of MX lookups in front of a resolver backend.
+
+    Positive answers are kept for the record TTL (capped at `max_ttl`),
+    negative answers (NXDOMAIN/NoAnswer) for `negative_ttl`. Any other
+    resolver error is treated as a failed lookup and is not cached.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        maxsize: int = 1024,
+        max_ttl: float = 3600.0,
+        negative_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.backend = backend or DnsPythonBackend()
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _lookup(self, domain: str) -> bool | None:
+        """Returns the cached answer, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._cache.get(domain)
+            if entry is not None:
+                has_mx, expires_at = entry
+                if expires_at > self.clock():
+                    self._cache.move_to_end(domain)
+                    self.hits += 1
+                    return has_mx
+                del self._cache[domain]
+            self.misses += 1
+            return None
+
+    def _store(self, domain: str, has_mx: bool, ttl: float) -> None:
+        ttl = min(ttl, self.max_ttl) if has_mx else self.negative_ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._cache[domain] = (has_mx, self.clock() + ttl)
+            self._cache.move_to_end(domain)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def has_mx(self, domain: str) -> bool:
+        """Returns True if the domain has at least one MX record."""
+        domain = domain.lower()
+        cached = self._lookup(domain)
+        if cached is not None:
+            return cached
+        try:
+            ttl = self.backend.resolve(domain)
+        except NEGATIVE_ANSWERS:
+            self._store(domain, False, self.negative_ttl)
+            return False
+        except Exception as e:
+            log.error(f"MX lookup for {domain} failed: {e}")
+            return False
+        self._store(domain, True, ttl)
+        return True
+
+    async def has_mx_async(self, domain: str) -> bool:
+        """Async variant of `has_mx`, for callbacks running on the event loop."""
+        domain = domain.lower()
+        cached = self._lookup(domain)
+        if cached is not None:
+            return cached
+        try:
+            if hasattr(self.backend, "resolve_async"):
+                ttl = await self.backend.resolve_async(domain)
+            else:
+                ttl = await asyncio.to_thread(self.backend.resolve, domain)
+        except NEGATIVE_ANSWERS:
+            self._store(domain, False, self.negative_ttl)
+            return False
+        except Exception as e:
+            log.error(f"MX lookup for {domain} failed: {e}")
+            return False
+        self._store(domain, True, ttl)
+        return True
+
+
+_default_resolver: CachingResolver | None = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_default_resolver() -> CachingResolver:
+    """Returns the process-wide resolver, creating it on first use."""
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            # Imported here: config itself imports util, which imports us.
+            from blossomtune_gradio import config as cfg
+
+            _default_resolver = CachingResolver(
+                maxsize=cfg.DNS_CACHE_SIZE,
+                max_ttl=cfg.DNS_CACHE_MAX_TTL,
+                negative_ttl=cfg.DNS_NEGATIVE_TTL,
+            )
+        return _default_resolver
+
+
+def set_default_resolver(resolver: CachingResolver | None) -> None:
+    """Replaces the process-wide resolver, e.g. with one using a StubResolver."""
+    global _default_resolver
+    with _default_resolver_lock:
+        _default_resolver = resolver
@@ -0,0 +1,278 @@
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from sqlalchemy import and_, delete, exists, insert, literal, or_, select, DateTime
+from sqlalchemy.orm import Session
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.database import (
+    FEDERATION_REVISION_KEY,
+    SessionLocal,
+    Request,
+    RequestArchive,
+    increment_counter,
+    utcnow,
+)
+from blossomtune_gradio.registry import participant_registry
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    """A class of stale requests, and how many days they are kept."""
+
+    name: str
+    criteria: Tuple[Any, ...]
+    max_age_days: float
+
+
+def policies() -> List[RetentionPolicy]:
+    """Returns the enabled retention policies, as configured."""
+    configured = (
+        RetentionPolicy(
+            "unactivated",
+            (Request.status == "pending", Request.is_activated == 0),
+            cfg.RETENTION_UNACTIVATED_DAYS,
+        ),
+        RetentionPolicy(
+            "denied", (Request.status == "denied",), cfg.RETENTION_DENIED_DAYS
+        ),
+        RetentionPolicy(
+            "abandoned",
+            (Request.status == "pending", Request.is_activated == 1),
+            cfg.RETENTION_ABANDONED_DAYS,
+        ),
+    )
+    return [policy for policy in configured if policy.max_age_days > 0]
+
+
+# Columns shared by the requests and requests_archive tables.
+_COLUMNS = [column.name for column in Request.__table__.columns]
+
+
+def _move(connection, source, target, where, extra: Dict[str, Any]) -> List[str]:
+    """
+    Moves the rows of `source` matching `where` into `target`, adding the
+    `extra` column values, and returns the participant IDs moved.
+
+    Where DELETE ... RETURNING is supported the rows are archived exactly as
+    they were deleted, so a concurrent write cannot slip in between.
+    """
+    if connection.dialect.delete_returning:
+        rows = (
+            connection.execute(
+                delete(source)
+                .where(where)
+                .returning(*(source.c[name] for name in _COLUMNS))
+            )
+            .mappings()
+            .all()
+        )
+        if rows:
+            connection.execute(insert(target), [{**row, **extra} for row in rows])
+        return [row["participant_id"] for row in rows]
+
+    ids = list(connection.scalars(select(source.c.participant_id).where(where)))
+    if ids:
+        where = and_(where, source.c.participant_id.in_(ids))
+        connection.execute(
+            insert(target).from_select(
+                _COLUMNS + list(extra),
+                select(
+                    *(source.c[name] for name in _COLUMNS),
+                    *(
+                        literal(value, DateTime)
+                        if isinstance(value, datetime)
+                        else literal(value)
+                        for value in extra.values()
+                    ),
+                ).where(where),
+            )
+        )
+        connection.execute(delete(source).where(where))
+    return ids
+
+
+def archive_batch(
+    db: Session, policy: RetentionPolicy, now: datetime, batch_size: int
+) -> int:
+    """
+    Moves up to `batch_size` of the oldest requests matching a policy to
+    the archive, in the caller's transaction. Returns the number moved.
+
+    The policy criteria are checked again on delete, so a request activated
+    since it was selected stays where it is. Policies never match approved
+    requests, so no partition is held by an archived participant.
+    """
+    requests = Request.__table__
+    criteria = and_(
+        *policy.criteria,
+        Request.timestamp < now - timedelta(days=policy.max_age_days),
+    )
+    ids = db.scalars(
+        select(requests.c.participant_id)
+        .where(criteria)
+        .order_by(requests.c.timestamp, requests.c.participant_id)
+        .limit(batch_size)
+    ).all()
+    if not ids:
+        return 0
+    connection = db.connection()
+    moved = _move(
+        connection,
+        requests,
+        RequestArchive.__table__,
+        and_(requests.c.participant_id.in_(ids), criteria),
+        {"archived_at": now, "archive_reason": policy.name},
+    )
+    if moved:
+        # Core deletes bypass the ORM flush hooks; bump the revision here.
+        increment_counter(connection, FEDERATION_REVISION_KEY)
+    return len(moved)
+
+
+def run_retention(
+    now: datetime | None = None, batch_size: int | None = None
+) -> Dict[str, int]:
+    """
+    Applies every enabled policy, one committed batch at a time so the
+    requests table is never locked for long.
+
+    Returns:
+        The number of requests archived, by policy name.
+    """
+    now = now or utcnow()
+    batch_size = batch_size or cfg.RETENTION_BATCH_SIZE
+    archived = {}
+    for policy in policies():
+        total = 0
+        while True:
+            with SessionLocal() as db:
+                moved = archive_batch(db, policy, now, batch_size)
+                db.commit()
+            total += moved
+            if moved < batch_size:
+                break
+        archived[policy.name] = total
+        if total:
+            # Core statements bypass the registry's session hooks.
+            participant_registry.invalidate()
+            log.info(f"Archived {total} request(s) under policy '{policy.name}'.")
+    return archived
+
+
+def restore(participant_ids: Iterable[str]) -> List[str]:
+    """
+    Moves archived requests back to the requests table, as they were.
+
+    A request is skipped if its participant ID, or its handle and email,
+    are in use again, e.g. because the participant registered anew.
+
+    Returns:
+        The participant IDs restored.
+    """
+    participant_ids = list(participant_ids)
+    if not participant_ids:
+        return []
+    requests, archive = Request.__table__, RequestArchive.__table__
+    in_use = exists().where(
+        or_(
+            requests.c.participant_id == archive.c.participant_id,
+            and_(
+                requests.c.hf_handle == archive.c.hf_handle,
+                requests.c.email == archive.c.email,
+            ),
+        )
+    )
+    with SessionLocal() as db:
+        connection = db.connection()
+        restored = _move(
+            connection,
+            archive,
+            requests,
+            and_(archive.c.participant_id.in_(participant_ids), ~in_use),
+            {},
+        )
+        if restored:
+            increment_counter(connection, FEDERATION_REVISION_KEY)
+        db.commit()
+    if restored:
+        participant_registry.invalidate()
+    skipped = set(participant_ids) - set(restored)
+    if skipped:
+        log.warning(f"Not restored (missing or in use): {', '.join(sorted(skipped))}")
+    return restored
+
+
+class RetentionWorker:
+    """
+    A daemon thread applying the retention policies every `interval`
+    seconds, starting right away.
+    """
+
+    def __init__(self, interval: float | None = None):
+        self.interval = cfg.RETENTION_INTERVAL if interval is None else interval
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the worker, unless disabled or no policy is enabled."""
+        if self.running or self.interval <= 0 or not policies():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="retention-worker", daemon=True
+        )
+        self._thread.start()
+        log.info(f"Started retention worker (every {self.interval:g}s).")
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Signals the worker to exit and waits for it to finish."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                run_retention()
+            except Exception as e:
+                log.error(f"Retention run failed: {e}")
+            self._stopping.wait(self.interval)
+
+
+# Shared worker, started from the application entrypoint.
+worker = RetentionWorker()
+
+
+def main():
+    """Runs the retention policies once, or restores archived requests."""
+    parser = argparse.ArgumentParser(
+        description="Archive stale requests or restore archived ones."
+    )
+    parser.add_argument(
+        "--restore",
+        nargs="+",
+        metavar="PARTICIPANT_ID",
+        help="Move these archived requests back instead of archiving.",
+    )
+    args = parser.parse_args()
+    if args.restore:
+        restored = restore(args.restore)
+        print(f"Restored {len(restored)} request(s): {', '.join(restored)}")
+    else:
+        for name, count in run_retention().items():
+            print(f"{name}: archived {count} request(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from blossomtune_gradio import federation as fed
+from blossomtune_gradio.blossomfile import verify_download
+
+
+async def download_blossomfile(request: Request) -> Response:
+    """
+    Serves a participant's Blossomfile straight from memory.
+
+    The link must carry a valid signature from `blossomfile.download_url`.
+    Responses have a Content-Length and a strong ETag, and a client that
+    already holds the archive gets a 304 without the body.
+    """
+    participant_id = request.path_params["participant_id"]
+    if not verify_download(
+        participant_id,
+        request.query_params.get("expires"),
+        request.query_params.get("signature"),
+    ):
+        return Response("Invalid or expired download link.", status_code=403)
+
+    bundle = await fed.get_blossomfile_async(participant_id)
+    if bundle is None:
+        return Response("Blossomfile not available.", status_code=404)
+    if bundle.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": bundle.etag})
+    return Response(bundle.data, headers=bundle.http_headers())
+
+
+# Extra HTTP routes, mounted on the Gradio app at launch.
+routes = [
+    Route(
+        "/blossomfile/{participant_id}",
+        download_blossomfile,
+        methods=["GET", "HEAD"],
+    ),
+]
@@ -0,0 +1,607 @@
+import os
+import time
+import shutil
+import asyncio
+import logging
+import functools
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import and_, case, func, or_, select, update
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio import util
+from blossomtune_gradio.config_store import config_store
+from blossomtune_gradio.database import SessionLocal, FederatedRun, utcnow
+from blossomtune_gradio.logs import Log, log as ui_log
+from blossomtune_gradio.supervisor import (
+    ACTIVE_STATES,
+    ProcessInfo,
+    ProcessSupervisor,
+    supervisor,
+)
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+
+def process_name(run_id: str) -> str:
+    """Returns the supervisor's name for the process of a run."""
+    return f"runner:{run_id}"
+
+
+class Run(NamedTuple):
+    """A run admitted by the scheduler."""
+
+    run_id: str
+    app: str
+    command: tuple
+    submitted_at: float
+
+
+class RunStatus(NamedTuple):
+    """A run and the state of its process."""
+
+    run_id: str
+    app: str
+    state: str  # admitted, then the supervisor's process state
+    submitted_at: float
+    started_at: float | None = None
+    ended_at: float | None = None
+    returncode: int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.state == "admitted" or self.state in ACTIVE_STATES
+
+
+class RunScheduler:
+    """
+    Runs up to `max_concurrent` federated runs at once, each a supervised
+    `flwr run` process with its own status, and its own ring buffer in
+    `log` under the source `runner:<run id>`.
+
+    Admission control: a run is refused while all slots are taken or a run
+    with the same ID is active, and launches are spaced at least
+    `launch_interval` seconds apart, so a burst of submissions does not
+    reach the Superlink Control API at once. A slot is held from admission
+    until the process ends.
+    """
+
+    def __init__(
+        self,
+        supervisor: ProcessSupervisor = supervisor,
+        max_concurrent: int | None = None,
+        launch_interval: float | None = None,
+        log: Log = ui_log,
+        history: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.supervisor = supervisor
+        self.max_concurrent = max_concurrent or cfg.RUNNER_MAX_CONCURRENT
+        self.launch_interval = (
+            cfg.RUNNER_LAUNCH_INTERVAL if launch_interval is None else launch_interval
+        )
+        self.log = log
+        self.history = cfg.RUNNER_HISTORY if history is None else history
+        self.clock = clock
+        self.launched = 0
+        self.rejected = 0
+        self._runs: Dict[str, Run] = {}
+        # Runs admitted whose process is not spawned yet.
+        self._admitted: Set[str] = set()
+        self._next_launch = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": len(self._active()),
+                "slots": self.max_concurrent,
+                "launched": self.launched,
+                "rejected": self.rejected,
+            }
+
+    def _is_active(self, run_id: str) -> bool:
+        return run_id in self._admitted or self.supervisor.is_running(
+            process_name(run_id)
+        )
+
+    def _active(self) -> List[str]:
+        return [run_id for run_id in self._runs if self._is_active(run_id)]
+
+    def active(self) -> List[str]:
+        """Returns the IDs of the runs holding a slot, oldest first."""
+        with self._lock:
+            return self._active()
+
+    def is_active(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._runs and self._is_active(run_id)
+
+    def _refusal(self, run_id: str) -> str | None:
+        if run_id in self._runs and self._is_active(run_id):
+            return f"Run '{run_id}' is already running."
+        active = self._active()
+        if len(active) >= self.max_concurrent:
+            return (
+                f"All {self.max_concurrent} runner slots are busy "
+                f"({', '.join(active)}). Stop a run or wait for one to finish."
+            )
+        return None
+
+    def admission_error(self, run_id: str) -> str | None:
+        """Returns why a run would be refused right now, or None."""
+        with self._lock:
+            return self._refusal(run_id)
+
+    def has_capacity(self) -> bool:
+        """Returns True if a runner slot is free."""
+        with self._lock:
+            return len(self._active()) < self.max_concurrent
+
+    async def submit(
+        self,
+        run_id: str,
+        app: str,
+        command: Sequence[str],
+        on_exit: Callable[[ProcessInfo], None] | None = None,
+    ) -> Tuple[bool, str]:
+        """
+        Admits a run and launches its process, waiting for the launch
+        interval to pass if another run was launched just before.
+        `on_exit` is passed on to the supervisor.
+
+        Returns:
+            A (success, message) tuple for the UI.
+        """
+        with self._lock:
+            refusal = self._refusal(run_id)
+            if refusal:
+                self.rejected += 1
+                return False, refusal
+            forgotten = self._prune()
+            # A finished run submitted again moves to the end, as the newest.
+            self._runs.pop(run_id, None)
+            self._runs[run_id] = Run(run_id, app, tuple(command), time.time())
+            self._admitted.add(run_id)
+            now = self.clock()
+            launch_at = max(now, self._next_launch)
+            self._next_launch = launch_at + self.launch_interval
+        # A run submitted again starts with an empty log.
+        self.log.drop_source(process_name(run_id))
+        for old_run_id in forgotten:
+            self.log.drop_source(process_name(old_run_id))
+            await self.supervisor.forget(process_name(old_run_id))
+        try:
+            if launch_at > now:
+                await asyncio.sleep(launch_at - now)
+            started = await self.supervisor.start(
+                process_name(run_id),
+                command,
+                sink=self._write,
+                on_exit=on_exit,
+            )
+        finally:
+            with self._lock:
+                self._admitted.discard(run_id)
+        if not started:
+            return False, "Runner process failed to start. Check the logs."
+        with self._lock:
+            self.launched += 1
+        return True, "Federation Run is starting...."
+
+    def _write(self, name: str, line: str, level: str = "INFO") -> None:
+        """Supervisor sink: appends a line to the run's buffer in the log."""
+        self.log(line, source=name, level=level)
+
+    def _prune(self) -> List[str]:
+        """Drops the oldest finished runs beyond `history`; returns their IDs."""
+        finished = [run_id for run_id in self._runs if not self._is_active(run_id)]
+        dropped = finished[: max(0, len(finished) - self.history)]
+        for run_id in dropped:
+            del self._runs[run_id]
+        return dropped
+
+    async def stop(self, run_id: str) -> bool:
+        """Stops a run's process. Returns True if it was running."""
+        return await self.supervisor.stop(process_name(run_id))
+
+    async def stop_all(self) -> None:
+        await asyncio.gather(*(self.stop(run_id) for run_id in self.active()))
+
+    def status(self, run_id: str) -> RunStatus | None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return None
+            info = self.supervisor.info(process_name(run_id))
+            if run_id in self._admitted or info is None:
+                return RunStatus(run.run_id, run.app, "admitted", run.submitted_at)
+            return RunStatus(
+                run.run_id,
+                run.app,
+                info.state,
+                run.submitted_at,
+                info.started_at,
+                info.ended_at,
+                info.returncode,
+            )
+
+    def runs(self) -> List[RunStatus]:
+        """Returns the status of every run kept, most recent first."""
+        with self._lock:
+            run_ids = list(self._runs)
+        statuses = (self.status(run_id) for run_id in reversed(run_ids))
+        return [status for status in statuses if status is not None]
+
+    def logs(self, run_id: str) -> str | None:
+        """Returns the output of a run, or None if it is not kept."""
+        with self._lock:
+            if run_id not in self._runs:
+                return None
+        records = self.log.view(sources=[process_name(run_id)])
+        return "\n".join(record.msg for record in records)
+
+
+# Shared scheduler for the runs started from the admin panel.
+run_scheduler = RunScheduler()
+
+
+def superlink_error() -> str | None:
+    """Returns why runs cannot be launched right now, or None."""
+    if cfg.SUPERLINK_MODE == "external":
+        if not util.is_port_open(cfg.SUPERLINK_HOST, cfg.SUPERLINK_PORT):
+            return "External Superlink is not running or unreachable."
+    elif not supervisor.is_running("superlink"):
+        return (
+            "Internal Superlink is not running. "
+            "Please start it before starting the runner."
+        )
+    return None
+
+
+def runner_command(app: str) -> List[str]:
+    """Builds the `flwr run` command of a TLS-enabled run of a Flower App."""
+    return [
+        shutil.which("flwr"),
+        "run",
+        app.replace(".", os.path.sep),
+        "local-deployment",
+        "--federation-config",
+        f'address="{cfg.SUPERLINK_HOST}:{cfg.SUPERLINK_CONTROL_API_PORT}" root-certificates="{cfg.BLOSSOMTUNE_TLS_CA_CERTFILE}"',
+        "--stream",
+    ]
+
+
+# Run queue: rows of the runs table move from queued to running, then to
+# succeeded, failed or cancelled.
+ACTIVE_RUN_STATUSES = ("queued", "running")
+
+# Final status of a run, by the final state of its process.
+RUN_STATUS_BY_STATE = {"exited": "succeeded", "stopped": "cancelled"}
+
+
+def enqueue_run(run_id: str, app: str, num_partitions: int, priority: int = 0) -> int:
+    """Queues a run and returns its row ID."""
+    with SessionLocal() as db:
+        run = FederatedRun(
+            run_id=run_id,
+            app=app,
+            num_partitions=num_partitions,
+            priority=priority,
+            status="queued",
+        )
+        db.add(run)
+        db.commit()
+        return run.id
+
+
+def find_active_run(run_id: str) -> FederatedRun | None:
+    """Returns the queued or running row of a run ID, if any."""
+    with SessionLocal() as db:
+        return db.scalars(
+            select(FederatedRun).where(
+                FederatedRun.run_id == run_id,
+                FederatedRun.status.in_(ACTIVE_RUN_STATUSES),
+            )
+        ).first()
+
+
+def queue_position(row_id: int) -> int:
+    """Returns the number of queued runs that will be launched before this one."""
+    with SessionLocal() as db:
+        run = db.get(FederatedRun, row_id)
+        if run is None or run.status != "queued":
+            return 0
+        return db.scalar(
+            select(func.count())
+            .select_from(FederatedRun)
+            .where(
+                FederatedRun.status == "queued",
+                or_(
+                    FederatedRun.priority > run.priority,
+                    and_(
+                        FederatedRun.priority == run.priority,
+                        FederatedRun.id < run.id,
+                    ),
+                ),
+            )
+        )
+
+
+def cancel_queued_run(run_id: str) -> bool:
+    """Cancels a run that has not been launched yet. Returns True if cancelled."""
+    with SessionLocal() as db:
+        cancelled = db.execute(
+            update(FederatedRun)
+            .where(FederatedRun.run_id == run_id, FederatedRun.status == "queued")
+            .values(status="cancelled", finished_at=utcnow())
+        ).rowcount
+        db.commit()
+    return bool(cancelled)
+
+
+def interrupt_in_flight() -> int:
+    """
+    Marks runs left in the 'running' state as failed.
+
+    Run processes are children of the app, so any such row found at
+    startup belongs to a run that ended with the previous process. Queued
+    runs are kept and launched as usual.
+    """
+    with SessionLocal() as db:
+        count = db.execute(
+            update(FederatedRun)
+            .where(FederatedRun.status == "running")
+            .values(
+                status="failed",
+                finished_at=utcnow(),
+                error="Interrupted by a restart.",
+            )
+        ).rowcount
+        db.commit()
+    if count:
+        log.warning(f"Marked {count} run(s) interrupted by a restart as failed.")
+    return count
+
+
+def _has_queued() -> bool:
+    """Returns True if any run is waiting to be launched."""
+    with SessionLocal() as db:
+        return db.scalar(
+            select(
+                select(FederatedRun.id).where(FederatedRun.status == "queued").exists()
+            )
+        )
+
+
+def _mark_waiting(reason: str) -> int:
+    """Records on the queued runs why they are not being launched."""
+    with SessionLocal() as db:
+        count = db.execute(
+            update(FederatedRun)
+            .where(
+                FederatedRun.status == "queued",
+                or_(FederatedRun.error.is_(None), FederatedRun.error != reason),
+            )
+            .values(error=reason)
+        ).rowcount
+        db.commit()
+    return count
+
+
+def _claim_next() -> FederatedRun | None:
+    """
+    Atomically claims the queued run with the highest priority, oldest
+    first, with a conditional UPDATE on its status.
+    """
+    with SessionLocal() as db:
+        candidate = db.scalar(
+            select(FederatedRun.id)
+            .where(FederatedRun.status == "queued")
+            .order_by(FederatedRun.priority.desc(), FederatedRun.id)
+            .limit(1)
+        )
+        if candidate is None:
+            return None
+        claimed = db.execute(
+            update(FederatedRun)
+            .where(FederatedRun.id == candidate, FederatedRun.status == "queued")
+            .values(status="running", started_at=utcnow(), error=None)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None
+        run = db.get(FederatedRun, candidate)
+        db.expunge(run)
+        return run
+
+
+def _record_result(
+    row_id: int, status: str, exit_code: int | None = None, error: str | None = None
+) -> None:
+    """Stores how a launched run ended, and how long it ran."""
+    with SessionLocal() as db:
+        run = db.get(FederatedRun, row_id)
+        if run is None:
+            return
+        run.status = status
+        run.exit_code = exit_code
+        run.error = error
+        run.finished_at = utcnow()
+        if run.started_at is not None:
+            run.duration = (run.finished_at - run.started_at).total_seconds()
+        db.commit()
+
+
+def recent_runs(limit: int = 20) -> List[FederatedRun]:
+    """Returns the queued and running runs, then the latest finished ones."""
+    with SessionLocal() as db:
+        runs = db.scalars(
+            select(FederatedRun)
+            .order_by(
+                case((FederatedRun.status.in_(ACTIVE_RUN_STATUSES), 0), else_=1),
+                FederatedRun.priority.desc(),
+                FederatedRun.id.desc(),
+            )
+            .limit(limit)
+        ).all()
+        db.expunge_all()
+        return list(runs)
+
+
+class AppHistory(NamedTuple):
+    """Finished runs of a Flower App."""
+
+    app: str
+    runs: int
+    succeeded: int
+    failed: int
+    mean_duration: float | None
+    last_finished_at: datetime | None
+
+
+def app_history() -> List[AppHistory]:
+    """
+    Returns the throughput history of every app in FLOWER_APPS, and of any
+    other app with finished runs, ordered by app.
+    """
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                FederatedRun.app,
+                func.count(),
+                func.sum(case((FederatedRun.status == "succeeded", 1), else_=0)),
+                func.sum(case((FederatedRun.status == "failed", 1), else_=0)),
+                func.avg(FederatedRun.duration),
+                func.max(FederatedRun.finished_at),
+            )
+            .where(FederatedRun.status.not_in(ACTIVE_RUN_STATUSES))
+            .group_by(FederatedRun.app)
+        ).all()
+    history = {row[0]: AppHistory(*row) for row in rows}
+    for app in cfg.FLOWER_APPS:
+        history.setdefault(app, AppHistory(app, 0, 0, 0, None, None))
+    return [history[app] for app in sorted(history)]
+
+
+class RunDispatcher:
+    """
+    A daemon thread launching queued runs through the run scheduler,
+    highest priority first, whenever a runner slot is free and the
+    Superlink is up.
+
+    It wakes up when `notify()` is called after a run is queued, when a
+    run's process ends, or else every `poll_interval` seconds. Results
+    are written back to the runs table from this thread, never from the
+    supervisor's event loop.
+    """
+
+    def __init__(
+        self,
+        scheduler: RunScheduler = run_scheduler,
+        poll_interval: float | None = None,
+    ):
+        self.scheduler = scheduler
+        self.poll_interval = (
+            cfg.RUN_DISPATCH_INTERVAL if poll_interval is None else poll_interval
+        )
+        self._finished: deque[Tuple[int, ProcessInfo]] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Fails runs interrupted by a restart, then starts dispatching."""
+        if self.running:
+            return
+        self._stopping.clear()
+        interrupt_in_flight()
+        self._thread = threading.Thread(
+            target=self._loop, name="run-dispatcher", daemon=True
+        )
+        self._thread.start()
+        log.info("Started run dispatcher.")
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Signals the dispatcher to exit and waits for it to finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self) -> None:
+        """Wakes the dispatcher up so a freshly queued run starts promptly."""
+        self._wakeup.set()
+
+    def _on_exit(self, row_id: int, info: ProcessInfo) -> None:
+        # Called on the supervisor's loop: hand over, don't write here.
+        self._finished.append((row_id, info))
+        self.notify()
+
+    def dispatch(self) -> int:
+        """
+        Records the runs that ended, then launches queued runs while slots
+        are free.
+
+        Returns:
+            The number of runs launched.
+        """
+        while self._finished:
+            row_id, info = self._finished.popleft()
+            _record_result(
+                row_id,
+                RUN_STATUS_BY_STATE.get(info.state, "failed"),
+                exit_code=info.returncode,
+            )
+        launched = 0
+        # The queue is checked first: probing an external Superlink is a TCP
+        # connect, which an idle server should not make on every poll.
+        while self.scheduler.has_capacity() and _has_queued():
+            error = superlink_error()
+            if error is not None:
+                if _mark_waiting(error):
+                    log.warning(f"Queued runs are waiting: {error}")
+                break
+            run = _claim_next()
+            if run is None:
+                break
+            # The participants' Blossomfiles follow the last launched run.
+            config_store.set_many(
+                {"num_partitions": str(run.num_partitions), "runner_app": run.app}
+            )
+            started, message = self.scheduler.supervisor.run(
+                self.scheduler.submit(
+                    run.run_id,
+                    run.app,
+                    runner_command(run.app),
+                    on_exit=functools.partial(self._on_exit, run.id),
+                )
+            )
+            if started:
+                launched += 1
+            else:
+                _record_result(run.id, "failed", error=message)
+        return launched
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.dispatch()
+            except Exception as e:
+                log.error(f"Run dispatcher error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+# Shared dispatcher, started from the application entrypoint.
+dispatcher = RunDispatcher()
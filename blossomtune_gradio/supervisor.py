@@ -0,0 +1,316 @@
+import time
+import codecs
+import asyncio
+import logging
+import threading
+from typing import Callable, Coroutine, Dict, List, Mapping, NamedTuple, Sequence
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio.logs import log as ui_log
+
+# Configure logging for the module
+log = logging.getLogger(__name__)
+
+# Receives (process name, line, level) for every line a process writes.
+Sink = Callable[[str, str, str], None]
+
+# States of a managed process that has not ended yet.
+ACTIVE_STATES = ("starting", "running", "stopping")
+
+
+class ProcessInfo(NamedTuple):
+    """The state of a managed process, as last recorded by the supervisor."""
+
+    name: str
+    command: tuple
+    state: str  # starting, running, stopping, exited, failed or stopped
+    pid: int | None = None
+    started_at: float | None = None
+    ended_at: float | None = None
+    returncode: int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+
+def log_output(name: str, line: str, level: str = "INFO") -> None:
+    """Default sink: writes a process line to the UI log, as a record of `name`."""
+    ui_log(line, source=name, level=level)
+
+
+class ProcessSupervisor:
+    """
+    Runs named subprocesses with `asyncio.create_subprocess_exec` on one
+    event loop, owned by a single daemon thread however many processes
+    are managed.
+
+    Output (stdout and stderr, merged) is read in chunks of up to
+    `chunk_size` bytes as it arrives, split into lines and passed to
+    `sink(name, line, level)`. Lifecycle notices go to the same sink.
+
+    The state of every process is kept in a lock-protected registry, so
+    `info` and `is_running` can be called from any thread without a round
+    trip to the loop. `start`, `stop` and `status` are awaitable from any
+    event loop; the work itself always runs on the supervisor's loop.
+    """
+
+    def __init__(
+        self,
+        sink: Sink = log_output,
+        chunk_size: int | None = None,
+        stop_timeout: float | None = None,
+    ):
+        self.sink = sink
+        self.chunk_size = chunk_size or cfg.SUPERVISOR_CHUNK_SIZE
+        self.stop_timeout = (
+            cfg.SUPERVISOR_STOP_TIMEOUT if stop_timeout is None else stop_timeout
+        )
+        self.started = 0
+        self.bytes_read = 0
+        self._infos: Dict[str, ProcessInfo] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        # Only touched from the supervisor's loop.
+        self._processes: Dict[str, asyncio.subprocess.Process] = {}
+        self._readers: Dict[str, asyncio.Task] = {}
+        self._sinks: Dict[str, Sink] = {}
+        self._exit_hooks: Dict[str, Callable[[ProcessInfo], None]] = {}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "processes": len(self._infos),
+                "running": sum(info.running for info in self._infos.values()),
+                "started": self.started,
+                "bytes_read": self.bytes_read,
+            }
+
+    def info(self, name: str) -> ProcessInfo | None:
+        with self._lock:
+            return self._infos.get(name)
+
+    def is_running(self, name: str) -> bool:
+        info = self.info(name)
+        return info is not None and info.running
+
+    def snapshot(self) -> List[ProcessInfo]:
+        """Returns the state of every process started so far, by name."""
+        with self._lock:
+            return [self._infos[name] for name in sorted(self._infos)]
+
+    def _record(self, name: str, **changes) -> ProcessInfo:
+        with self._lock:
+            info = self._infos[name]._replace(**changes)
+            self._infos[name] = info
+            return info
+
+    # Event loop
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Returns the supervisor's loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="process-supervisor", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def _call(self, coro: Coroutine):
+        """Runs a coroutine on the supervisor's loop and awaits its result."""
+        loop = self._get_loop()
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run(self, coro: Coroutine, timeout: float | None = None):
+        """Blocking counterpart of awaiting a supervisor call, for sync code."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result(timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stops every process, then the event loop and its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._stop_all(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+
+    # Public API
+
+    async def start(
+        self,
+        name: str,
+        command: Sequence[str],
+        cwd: str | None = None,
+        env: Mapping[str, str] | None = None,
+        sink: Sink | None = None,
+        on_exit: Callable[[ProcessInfo], None] | None = None,
+    ) -> bool:
+        """
+        Starts `command` as the process `name`. Its lines go to `sink` if
+        given, instead of the supervisor's. `on_exit` is called on the
+        supervisor's loop with the final state once the process has ended.
+
+        Returns:
+            True if it was spawned; False if a process with this name is
+            still running, or the command could not be executed.
+        """
+        return await self._call(
+            self._start(name, tuple(command), cwd, env, sink, on_exit)
+        )
+
+    async def stop(self, name: str, timeout: float | None = None) -> bool:
+        """
+        Terminates the process `name`, killing it if it has not exited after
+        `timeout` seconds, and waits until all of its output has been read.
+
+        Returns:
+            True if a running process was stopped.
+        """
+        return await self._call(self._stop(name, timeout))
+
+    async def status(self, name: str) -> ProcessInfo | None:
+        """Returns the state of the process `name`, or None if never started."""
+        return self.info(name)
+
+    async def forget(self, name: str) -> bool:
+        """Drops the state of a process that has ended. Returns True if dropped."""
+        return await self._call(self._forget(name))
+
+    async def shutdown(self) -> None:
+        """Stops every running process."""
+        await self._call(self._stop_all())
+
+    # Loop-side implementation
+
+    def _emit(self, name: str, line: str, level: str = "INFO") -> None:
+        try:
+            self._sinks.get(name, self.sink)(name, line, level)
+        except Exception as e:
+            log.error(f"Output sink of '{name}' failed: {e}")
+
+    async def _start(self, name, command, cwd, env, sink, on_exit) -> bool:
+        if self.is_running(name):
+            return False
+        if sink is None:
+            self._sinks.pop(name, None)
+        else:
+            self._sinks[name] = sink
+        with self._lock:
+            self._infos[name] = ProcessInfo(
+                name, command, "starting", started_at=time.time()
+            )
+        self._emit(name, f"Starting: {' '.join(map(str, command))}")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd,
+                env=env,
+            )
+        except Exception as e:
+            self._emit(name, f"CRITICAL ERROR: {e}", "ERROR")
+            self._record(name, state="failed", ended_at=time.time())
+            self._emit(name, "Process finished.")
+            return False
+        self._processes[name] = process
+        if on_exit is not None:
+            self._exit_hooks[name] = on_exit
+        with self._lock:
+            self.started += 1
+        self._record(name, state="running", pid=process.pid)
+        self._readers[name] = asyncio.create_task(self._read(name, process))
+        return True
+
+    async def _read(self, name: str, process: asyncio.subprocess.Process) -> None:
+        """Forwards the output of a process line by line until it exits."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        try:
+            while chunk := await process.stdout.read(self.chunk_size):
+                with self._lock:
+                    self.bytes_read += len(chunk)
+                *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+                for line in lines:
+                    self._emit(name, line.strip())
+                if len(pending) > self.chunk_size:
+                    # A line longer than a chunk is passed on in pieces.
+                    self._emit(name, pending.strip())
+                    pending = ""
+            pending += decoder.decode(b"", final=True)
+            if pending.strip():
+                self._emit(name, pending.strip())
+        except Exception as e:
+            log.error(f"Error reading the output of '{name}': {e}")
+        returncode = await process.wait()
+        self._processes.pop(name, None)
+        self._readers.pop(name, None)
+        if self.info(name).state == "stopping":
+            state = "stopped"
+        else:
+            state = "exited" if returncode == 0 else "failed"
+        info = self._record(
+            name, state=state, returncode=returncode, ended_at=time.time()
+        )
+        self._emit(name, "Process finished.")
+        on_exit = self._exit_hooks.pop(name, None)
+        if on_exit is not None:
+            try:
+                on_exit(info)
+            except Exception as e:
+                log.error(f"Exit hook of '{name}' failed: {e}")
+
+    async def _stop(self, name: str, timeout: float | None) -> bool:
+        process = self._processes.get(name)
+        if process is None or process.returncode is not None:
+            self._emit(name, "Stop command received, but no process was running.")
+            return False
+        reader = self._readers.get(name)
+        self._record(name, state="stopping")
+        timeout = self.stop_timeout if timeout is None else timeout
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            log.warning(f"'{name}' did not exit in {timeout:g}s; killing it.")
+            process.kill()
+            await process.wait()
+        if reader is not None:
+            await reader
+        self._emit(name, "Process stopped by user.")
+        return True
+
+    async def _forget(self, name: str) -> bool:
+        with self._lock:
+            info = self._infos.get(name)
+            if info is None or info.running:
+                return False
+            del self._infos[name]
+        self._sinks.pop(name, None)
+        return True
+
+    async def _stop_all(self) -> None:
+        await asyncio.gather(
+            *(self._stop(name, None) for name in list(self._processes))
+        )
+
+
+# Shared supervisor for the Superlink, runners and auxiliary tools.
+supervisor = ProcessSupervisor()
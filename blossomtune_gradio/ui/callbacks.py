@@ -1,28 +1,172 @@
-import time
+import math
+import asyncio
 import gradio as gr
 import pandas as pd
 
 from blossomtune_gradio import config as cfg
-from blossomtune_gradio.logs import log
+from blossomtune_gradio.logs import LogTail, log
 from blossomtune_gradio import federation as fed
 from blossomtune_gradio import processing
+from blossomtune_gradio import runs
 from blossomtune_gradio.settings import settings
 from blossomtune_gradio import util
-from blossomtune_gradio.database import SessionLocal, Request
+from blossomtune_gradio import admin_tables
+from blossomtune_gradio import ratelimit
 
 from . import components
 from . import auth
 
 
-def log_updater_generator():
-    """Continuously yields log updates every 1 second."""
+async def log_updater_generator():
+    """
+    Streams the log to one browser. Each update only extends the text sent
+    before, so it goes out as an append of the new lines, and nothing is
+    sent while the log is idle.
+    """
+    tail = LogTail(log)
     while True:
-        yield log.output
-        time.sleep(1)
+        text = tail.poll()
+        if text is not None:
+            yield text
+        await asyncio.sleep(cfg.LOG_STREAM_INTERVAL)
+
+
+# Components showing each admin table, keyed by table name.
+TABLE_COMPONENTS = {
+    "pending": {
+        "df": components.pending_requests_df,
+        "page_md": components.pending_page_md,
+        "prev_btn": components.pending_prev_btn,
+        "next_btn": components.pending_next_btn,
+        "state": components.pending_view_state,
+    },
+    "approved": {
+        "df": components.approved_participants_df,
+        "page_md": components.approved_page_md,
+        "prev_btn": components.approved_prev_btn,
+        "next_btn": components.approved_next_btn,
+        "state": components.approved_view_state,
+    },
+}
+
+
+async def render_table(table: str, view: dict) -> dict:
+    """Fetches the page of `table` the view points at and builds its updates."""
+    page = await admin_tables.fetch_page_async(
+        table,
+        search=view["search"],
+        sort_by=view["sort_by"],
+        descending=view["descending"],
+        after=view["cursors"][-1] if view["cursors"] else None,
+    )
+    view = {**view, "next": page.next_cursor}
+    table_components = TABLE_COMPONENTS[table]
+    updates = {
+        table_components["df"]: gr.update(value=page.rows if page.rows else [[]]),
+        table_components["page_md"]: gr.update(
+            value=f"Page {len(view['cursors']) + 1} · {page.total} matching"
+        ),
+        table_components["prev_btn"]: gr.update(interactive=bool(view["cursors"])),
+        table_components["next_btn"]: gr.update(
+            interactive=page.next_cursor is not None
+        ),
+        table_components["state"]: view,
+    }
+    if table == "pending":
+        # Bulk actions apply to the pending rows currently on screen.
+        updates[components.bulk_participants_dd] = gr.update(
+            choices=[row[0] for row in page.rows], value=[]
+        )
+    return updates
 
 
-def get_full_status_update(
-    profile: gr.OAuthProfile | None, oauth_token: gr.OAuthToken | None
+async def on_table_view_change(
+    table: str, search: str, sort_by: str, descending: bool, view: dict
+):
+    """Applies a new search or sort to a table and returns to its first page."""
+    view = {
+        **view,
+        "search": (search or "").strip(),
+        "sort_by": sort_by,
+        "descending": bool(descending),
+        "cursors": [],
+    }
+    return await render_table(table, view)
+
+
+async def on_table_page(table: str, direction: str, view: dict):
+    """Moves a table one page forward ("next") or back ("prev")."""
+    cursors = list(view["cursors"])
+    if direction == "next" and view["next"] is not None:
+        cursors.append(view["next"])
+    elif direction == "prev" and cursors:
+        cursors.pop()
+    return await render_table(table, {**view, "cursors": cursors})
+
+
+async def refresh_tables(
+    pending_view: dict, approved_view: dict, seen_revision: int | None
+) -> dict:
+    """
+    Re-renders both admin tables, unless no request has been written since
+    the revision this session last rendered. Components left out of the
+    returned updates keep their current value in the browser.
+    """
+    revision = await fed.get_federation_revision_async()
+    if revision == seen_revision:
+        return {}
+    return {
+        **await render_table("pending", pending_view),
+        **await render_table("approved", approved_view),
+        components.admin_revision_state: revision,
+    }
+
+
+def _format_time(value) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+def render_runs() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Renders the run queue with recent runs, and the history by app."""
+    queue = pd.DataFrame(
+        [
+            [
+                run.run_id,
+                run.app,
+                run.status,
+                run.priority,
+                _format_time(run.created_at),
+                "" if run.duration is None else round(run.duration, 1),
+                "" if run.exit_code is None else run.exit_code,
+                run.error or "",
+            ]
+            for run in runs.recent_runs()
+        ],
+        columns=components.runs_df.headers,
+    )
+    history = pd.DataFrame(
+        [
+            [
+                entry.app,
+                entry.runs,
+                entry.succeeded,
+                entry.failed,
+                "" if entry.mean_duration is None else round(entry.mean_duration, 1),
+                _format_time(entry.last_finished_at),
+            ]
+            for entry in runs.app_history()
+        ],
+        columns=components.run_history_df.headers,
+    )
+    return queue, history
+
+
+async def get_full_status_update(
+    pending_view: dict,
+    approved_view: dict,
+    seen_revision: int | None,
+    profile: gr.OAuthProfile | None,
+    oauth_token: gr.OAuthToken | None,
 ):
     owner = auth.is_space_owner(profile, oauth_token)
     auth_status = "Authenticating..."
@@ -46,37 +190,11 @@ def get_full_status_update(
     else:
         auth_status = settings.get_text("auth_status_local_mode_md")
 
-    with SessionLocal() as db:
-        pending_results = (
-            db.query(Request.participant_id, Request.hf_handle, Request.email)
-            .filter(Request.status == "pending", Request.is_activated == 1)
-            .order_by(Request.timestamp.asc())
-            .all()
-        )
-        approved_results = (
-            db.query(
-                Request.participant_id,
-                Request.hf_handle,
-                Request.email,
-                Request.partition_id,
-            )
-            .filter(Request.status == "approved")
-            .order_by(Request.timestamp.desc())
-            .all()
-        )
-
-    # Convert SQLAlchemy rows to simple lists
-    pending_rows = [list(row) for row in pending_results]
-    approved_rows = [list(row) for row in approved_results]
-
     # Superlink Status Logic
     superlink_btn_update = gr.update()
 
     if cfg.SUPERLINK_MODE == "internal":
-        superlink_is_running = (
-            processing.process_store["superlink"]
-            and processing.process_store["superlink"].poll() is None
-        )
+        superlink_is_running = processing.is_running("superlink")
         superlink_status = "🟢 Running" if superlink_is_running else "🔴 Not Running"
         if superlink_is_running:
             superlink_btn_update = gr.update(
@@ -91,36 +209,48 @@ def get_full_status_update(
         if not cfg.SUPERLINK_HOST:
             superlink_status = "🔴 Not Configured"
         else:
-            is_open = util.is_port_open(cfg.SUPERLINK_HOST, cfg.SUPERLINK_PORT)
+            is_open = await asyncio.to_thread(
+                util.is_port_open, cfg.SUPERLINK_HOST, cfg.SUPERLINK_PORT
+            )
             superlink_status = "🟢 Running" if is_open else "🔴 Not Running"
         superlink_btn_update = gr.update(value="Managed Externally", interactive=False)
     else:
         superlink_status = "⚠️ Invalid Mode"
         superlink_btn_update = gr.update(interactive=False)
 
-    runner_is_running = (
-        processing.process_store["runner"]
-        and processing.process_store["runner"].poll() is None
-    )
-    runner_status = "🟢 Running" if runner_is_running else "🔴 Not Running"
-
-    if runner_is_running:
-        runner_btn_update = gr.update(value="🛑 Stop Runner", variant="stop")
+    active_runs = runs.run_scheduler.active()
+    if active_runs:
+        runner_status = (
+            f"🟢 Running {len(active_runs)}/{runs.run_scheduler.max_concurrent}: "
+            f"{', '.join(active_runs)}"
+        )
+        # The Run ID field picks the run: an active one is stopped.
+        runner_btn_update = gr.update(value="▶️ Start / 🛑 Stop Run", variant="stop")
     else:
+        runner_status = "🔴 Not Running"
         runner_btn_update = gr.update(value="▶️ Start Federated Run", variant="primary")
 
+    # The run queue and history are only read for the admin.
+    run_updates = {}
+    if owner:
+        runs_value, history_value = await asyncio.to_thread(render_runs)
+        run_updates = {
+            components.runs_df: gr.update(value=runs_value),
+            components.run_history_df: gr.update(value=history_value),
+        }
+
+    # Only the page each admin table is on is read and sent to the browser,
+    # and only if the participant tables changed.
+    table_updates = await refresh_tables(pending_view, approved_view, seen_revision)
+
     return {
+        **table_updates,
+        **run_updates,
         components.admin_panel: gr.update(visible=owner),
         components.auth_status_md: gr.update(value=auth_status),
         components.superlink_status_public_txt: gr.update(value=superlink_status),
         components.superlink_status_admin_txt: gr.update(value=superlink_status),
         components.runner_status_txt: gr.update(value=runner_status),
-        components.pending_requests_df: gr.update(
-            value=pending_rows if pending_rows else [[]]
-        ),
-        components.approved_participants_df: gr.update(
-            value=approved_rows if approved_rows else [[]]
-        ),
         components.superlink_toggle_btn: superlink_btn_update,
         components.runner_toggle_btn: runner_btn_update,
         components.hf_handle_tb: gr.update(
@@ -135,40 +265,39 @@ def get_log_update():
     }
 
 
-def toggle_superlink(
+async def toggle_superlink(
     profile: gr.OAuthProfile | None, oauth_token: gr.OAuthToken | None
 ):
     """Toggles the Superlink process on or off."""
     if not auth.is_space_owner(profile, oauth_token):
         gr.Warning("You are not authorized to perform this operation.")
         return
-    if (
-        processing.process_store["superlink"]
-        and processing.process_store["superlink"].poll() is None
-    ):
-        processing.stop_process("superlink")
+    if processing.is_running("superlink"):
+        await processing.stop_process("superlink")
     else:
-        processing.start_superlink()
+        result, message = await processing.start_superlink()
+        if not result:
+            gr.Warning(message)
 
 
-def toggle_runner(
+async def toggle_runner(
     runner_app: str,
     run_id: str,
     num_partitions: str,
+    priority: float | None,
     profile: gr.OAuthProfile | None,
     oauth_token: gr.OAuthToken | None,
 ):
-    """Toggles the Runner process on or off."""
+    """Stops or cancels the run with this ID if it is active, or else queues it."""
     if not auth.is_space_owner(profile, oauth_token):
         gr.Warning("You are not authorized to perform this operation.")
         return
-    if (
-        processing.process_store["runner"]
-        and processing.process_store["runner"].poll() is None
-    ):
-        processing.stop_process("runner")
+    if run_id and await asyncio.to_thread(runs.find_active_run, run_id):
+        await processing.stop_run(run_id)
     else:
-        result, message = processing.start_runner(runner_app, run_id, num_partitions)
+        result, message = await processing.start_runner(
+            runner_app, run_id, num_partitions, priority
+        )
         if not result:
             gr.Warning(message)
         else:
@@ -192,8 +321,12 @@ def on_select_pending(pending_data: list, evt: gr.SelectData):
     return participant_id, str(fed.get_next_partion_id())
 
 
-def on_check_participant_status(
-    hf_handle: str, email: str, activation_code: str, profile: gr.OAuthProfile | None
+async def on_check_participant_status(
+    hf_handle: str,
+    email: str,
+    activation_code: str,
+    profile: gr.OAuthProfile | None,
+    request: gr.Request | None = None,
 ):
     is_on_space = cfg.SPACE_ID is not None
     if is_on_space and not profile:
@@ -201,7 +334,7 @@ def on_check_participant_status(
             components.request_status_md: gr.update(
                 value=settings.get_text("auth_required_md")
             ),
-            components.ca_cert_download: gr.update(value=None, visible=False),
+            components.blossomfile_download_md: gr.update(value=None, visible=False),
         }
 
     user_hf_handle = profile.username if is_on_space else hf_handle
@@ -210,27 +343,84 @@ def on_check_participant_status(
             components.request_status_md: gr.update(
                 value=settings.get_text("hf_handle_empty_md")
             ),
-            components.ca_cert_download: gr.update(value=None, visible=False),
+            components.blossomfile_download_md: gr.update(value=None, visible=False),
         }
 
     pid_to_check = user_hf_handle.strip()
     email_to_add = email.strip()
     activation_code_to_check = activation_code.strip()
 
-    approved, message, download = fed.check_participant_status(
+    # Throttle before any database, DNS or mail work is done.
+    if ratelimit.limiter is not None:
+        retry_after = await ratelimit.limiter.check_async(
+            ip=ratelimit.client_ip(
+                request.headers if request else None,
+                request.client.host if request and request.client else None,
+            ),
+            hf_handle=pid_to_check,
+            email=email_to_add,
+        )
+        if retry_after:
+            return {
+                components.request_status_md: gr.update(
+                    value=settings.get_text(
+                        "rate_limited_md", retry_after=math.ceil(retry_after)
+                    )
+                ),
+                components.blossomfile_download_md: gr.update(
+                    value=None, visible=False
+                ),
+            }
+
+    approved, message, download = await fed.check_participant_status_async(
         pid_to_check, email_to_add, activation_code_to_check
     )
     return {
         components.request_status_md: gr.update(value=message),
-        components.ca_cert_download: gr.update(
-            value=download, visible=True if download else False
+        components.blossomfile_download_md: gr.update(
+            value=f"⬇️ [Download your Blossomfile]({download})" if download else None,
+            visible=True if download else False,
         ),
     }
 
 
-def on_manage_fed_request(participant_id: str, partition_id: str, action: str):
-    result, message = fed.manage_request(participant_id, partition_id, action)
+async def on_manage_fed_request(participant_id: str, partition_id: str, action: str):
+    result, message = await fed.manage_request_async(
+        participant_id, partition_id, action
+    )
     if result:
         gr.Info(message)
     else:
         gr.Warning(message)
+
+
+async def on_bulk_manage_fed_requests(
+    participant_ids: list[str] | None,
+    action: str,
+    profile: gr.OAuthProfile | None,
+    oauth_token: gr.OAuthToken | None,
+):
+    """Approves or denies every selected participant in one go."""
+    if not auth.is_space_owner(profile, oauth_token):
+        gr.Warning("You are not authorized to perform this operation.")
+        return gr.update()
+    results = await asyncio.to_thread(
+        fed.manage_requests_bulk, participant_ids or [], action
+    )
+    if not results:
+        gr.Warning("Please select one or more participants.")
+        return gr.update(value=[[]])
+
+    succeeded = sum(1 for _, ok, _ in results if ok)
+    done = {"approve": "approved", "deny": "denied"}[action]
+    summary = f"{succeeded} of {len(results)} participant(s) {done}."
+    if succeeded == len(results):
+        gr.Info(summary)
+    else:
+        gr.Warning(summary)
+    return gr.update(
+        value=[
+            [participant_id, "✅" if ok else "❌", message]
+            for participant_id, ok, message in results
+        ]
+    )
@@ -56,6 +56,37 @@ run_id_tb = gr.Textbox(label="Run ID", placeholder="e.g., run_123")
 num_partitions_tb = gr.Textbox(
     label="Total Partitions", value="10", placeholder="e.g., 10", render=False
 )
+run_priority_nb = gr.Number(
+    label="Priority (higher runs first)", value=0, precision=0, render=False
+)
+runs_df = gr.DataFrame(
+    headers=[
+        "Run ID",
+        "App",
+        "Status",
+        "Priority",
+        "Queued At",
+        "Duration (s)",
+        "Exit Code",
+        "Message",
+    ],
+    label="Run Queue & Recent Runs",
+    interactive=False,
+    render=False,
+)
+run_history_df = gr.DataFrame(
+    headers=[
+        "App",
+        "Finished Runs",
+        "Succeeded",
+        "Failed",
+        "Mean Duration (s)",
+        "Last Finished",
+    ],
+    label="Run History by App",
+    interactive=False,
+    render=False,
+)
 # This component is populated by callbacks using the settings file.
 request_status_md = gr.Markdown(render=False)
 
@@ -78,6 +109,68 @@ approved_participants_df = gr.DataFrame(
     row_count=(5, "dynamic"),
     render=False,
 )
+
+# Search, sort and paging controls of the admin tables.
+SORT_CHOICES = [
+    ("Timestamp", "timestamp"),
+    ("Participant ID", "participant_id"),
+    ("HF Handle", "hf_handle"),
+    ("Email", "email"),
+]
+pending_search_tb = gr.Textbox(
+    label="Search pending",
+    placeholder="Handle, email or participant ID",
+    render=False,
+)
+pending_sort_dd = gr.Dropdown(
+    choices=SORT_CHOICES, value="timestamp", label="Sort by", render=False
+)
+pending_desc_cb = gr.Checkbox(value=False, label="Descending", render=False)
+pending_page_md = gr.Markdown(render=False)
+pending_prev_btn = gr.Button("◀ Previous", size="sm", render=False)
+pending_next_btn = gr.Button("Next ▶", size="sm", render=False)
+
+approved_search_tb = gr.Textbox(
+    label="Search approved",
+    placeholder="Handle, email, participant or partition ID",
+    render=False,
+)
+approved_sort_dd = gr.Dropdown(
+    choices=SORT_CHOICES + [("Partition ID", "partition_id")],
+    value="timestamp",
+    label="Sort by",
+    render=False,
+)
+approved_desc_cb = gr.Checkbox(value=True, label="Descending", render=False)
+approved_page_md = gr.Markdown(render=False)
+approved_prev_btn = gr.Button("◀ Previous", size="sm", render=False)
+approved_next_btn = gr.Button("Next ▶", size="sm", render=False)
+
+# Per-session view of each table: applied search and sort, the stack of
+# keyset cursors of the pages visited so far, and the next page's cursor.
+pending_view_state = gr.State(
+    {
+        "search": "",
+        "sort_by": "timestamp",
+        "descending": False,
+        "cursors": [],
+        "next": None,
+    },
+    render=False,
+)
+approved_view_state = gr.State(
+    {
+        "search": "",
+        "sort_by": "timestamp",
+        "descending": True,
+        "cursors": [],
+        "next": None,
+    },
+    render=False,
+)
+# Federation revision the admin tables were last rendered at, per session.
+admin_revision_state = gr.State(None, render=False)
+
 selected_participant_id_tb = gr.Textbox(
     label="Selected Participant ID",
     interactive=False,
@@ -88,6 +181,19 @@ partition_id_tb = gr.Textbox(
     placeholder="Auto-filled on selection...",
     render=False,
 )
-ca_cert_download = gr.File(
-    label="Download CA Certificate (ca.crt)", visible=False, render=False
+bulk_participants_dd = gr.Dropdown(
+    choices=[],
+    multiselect=True,
+    label="Select Pending Participants",
+    info="Partition IDs are assigned automatically.",
+    render=False,
+)
+bulk_results_df = gr.DataFrame(
+    headers=["Participant ID", "Result", "Message"],
+    label="Bulk Action Results",
+    interactive=False,
+    row_count=(3, "dynamic"),
+    render=False,
 )
+# Link to the participant's Blossomfile, served by `routes.download_blossomfile`.
+blossomfile_download_md = gr.Markdown(visible=False, render=False)
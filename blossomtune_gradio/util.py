@@ -1,6 +1,8 @@
 import re
 import socket
-import dns.resolver
+from typing import Dict, Tuple
+
+from blossomtune_gradio.resolver import CachingResolver, get_default_resolver
 
 
 def is_port_open(host: str, port: int, timeout: float = 1.0) -> bool:
@@ -27,33 +29,45 @@ def is_port_open(host: str, port: int, timeout: float = 1.0) -> bool:
         return False
 
 
-def validate_email(email_address: str) -> bool:
+def _email_domain(email_address: str) -> str | None:
+    """Returns the domain of a syntactically valid email address, else None."""
+    # Regex validation for basic format
+    regex = r"[^@]+@[^@]+\.[^@]+"
+    if not re.match(regex, email_address):
+        return None
+    return email_address.rsplit("@", 1)[-1]
+
+
+def validate_email(email_address: str, resolver: CachingResolver | None = None) -> bool:
     """
     Validates an email address using regex for format and
     DNS for domain's MX record.
 
+    MX lookups go through a shared TTL-aware cache, so repeated
+    registrations from the same domain do not hit the DNS resolver.
+
     Args:
         email_address (str): The email address to validate.
+        resolver: The caching resolver to use. Defaults to the shared one.
 
     Returns:
         bool: True if the email is syntactically valid and
               the domain has an MX record, False otherwise.
     """
-    # Regex validation for basic format
-    regex = r"[^@]+@[^@]+\.[^@]+"
-    if not re.match(regex, email_address):
+    domain = _email_domain(email_address)
+    if not domain:
         return False
+    return (resolver or get_default_resolver()).has_mx(domain)
 
-    # DNS MX record validation
-    try:
-        domain = email_address.rsplit("@", 1)[-1]
-        dns.resolver.resolve(domain, "MX")
-        return True
-    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, IndexError):
-        return False
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+
+async def validate_email_async(
+    email_address: str, resolver: CachingResolver | None = None
+) -> bool:
+    """Async variant of `validate_email`."""
+    domain = _email_domain(email_address)
+    if not domain:
         return False
+    return await (resolver or get_default_resolver()).has_mx_async(domain)
 
 
 def strtobool(value: str) -> bool:
@@ -63,3 +77,30 @@ def strtobool(value: str) -> bool:
     if value in ("y", "yes", "on", "1", "true", "t"):
         return True
     return False
+
+
+def parse_log_budgets(value: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parses per-source log budgets given as "source=lines:bytes,...".
+
+    Raises:
+        ValueError: If an entry is not a source name followed by two
+            positive integers.
+    """
+    budgets = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        source, _, budget = entry.partition("=")
+        lines, _, size = budget.partition(":")
+        try:
+            limits = (int(lines), int(size))
+        except ValueError:
+            limits = None
+        if not source.strip() or limits is None or min(limits) < 1:
+            raise ValueError(
+                f"Invalid LOG_SOURCE_BUDGETS entry '{entry.strip()}': "
+                "expected source=lines:bytes with positive integers."
+            )
+        budgets[source.strip()] = limits
+    return budgets
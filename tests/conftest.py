@@ -3,10 +3,19 @@ from unittest.mock import MagicMock
 
 from alembic.config import Config
 from alembic import command
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from blossomtune_gradio import config
+from blossomtune_gradio import resolver
+from blossomtune_gradio.config_store import config_store
+from blossomtune_gradio.registry import participant_registry
+from blossomtune_gradio.database import (
+    FederationSession,
+    create_async_db_engine,
+    create_db_engine,
+)
 
 
 @pytest.fixture(scope="session")
@@ -15,6 +24,18 @@ def alembic_config():
     return Config("alembic.ini")
 
 
+@pytest.fixture(autouse=True)
+def mx_resolver():
+    """
+    Fixture giving every test a fresh, empty MX cache so cached answers
+    never leak between tests.
+    """
+    fresh_resolver = resolver.CachingResolver()
+    resolver.set_default_resolver(fresh_resolver)
+    yield fresh_resolver
+    resolver.set_default_resolver(None)
+
+
 @pytest.fixture
 def db_session(mocker, tmp_path):
     """
@@ -34,19 +55,55 @@ def db_session(mocker, tmp_path):
     # Apply the migrations to create the schema in the temporary database.
     command.upgrade(alembic_cfg, "head")
 
-    # Set up the SQLAlchemy engine and session factory for the tests to use.
-    engine = create_engine(db_url)
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Set up the SQLAlchemy engine and session factory for the tests to use,
+    # with the same SQLite tuning profile as the application.
+    engine = create_db_engine(db_url)
+    TestingSessionLocal = sessionmaker(
+        class_=FederationSession, autocommit=False, autoflush=False, bind=engine
+    )
     session = TestingSessionLocal()
 
     # Mock the SessionLocal factory in each module where it is imported and used.
     mocker.patch("blossomtune_gradio.federation.SessionLocal", return_value=session)
-    mocker.patch("blossomtune_gradio.processing.SessionLocal", return_value=session)
-    mocker.patch("blossomtune_gradio.ui.callbacks.SessionLocal", return_value=session)
+    mocker.patch("blossomtune_gradio.outbox.SessionLocal", return_value=session)
+    mocker.patch("blossomtune_gradio.retention.SessionLocal", return_value=session)
+
+    # The config store opens its own short sessions, as it does in production.
+    mocker.patch("blossomtune_gradio.config_store.SessionLocal", TestingSessionLocal)
+    mocker.patch("blossomtune_gradio.registry.SessionLocal", TestingSessionLocal)
+    mocker.patch("blossomtune_gradio.runs.SessionLocal", TestingSessionLocal)
+
+    # Cached config values and participants must not leak from one test
+    # database to another.
+    config_store.invalidate()
+    participant_registry.invalidate()
 
     yield session
 
     session.close()
+    engine.dispose()
+    config_store.invalidate()
+    participant_registry.invalidate()
+
+
+@pytest.fixture
+def async_db(db_session, mocker):
+    """
+    Fixture pointing `AsyncSessionLocal` at the test database of `db_session`.
+
+    Each test drives its coroutines with `asyncio.run`, so connections are not
+    pooled across event loops. Returns the synchronous session for assertions.
+    """
+    engine = create_async_db_engine(config.SQLALCHEMY_URL, poolclass=NullPool)
+    session_factory = async_sessionmaker(
+        bind=engine,
+        sync_session_class=FederationSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    mocker.patch("blossomtune_gradio.federation.AsyncSessionLocal", session_factory)
+    mocker.patch("blossomtune_gradio.admin_tables.AsyncSessionLocal", session_factory)
+    yield db_session
 
 
 @pytest.fixture
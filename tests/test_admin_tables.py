@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from blossomtune_gradio import admin_tables
+from blossomtune_gradio.database import Request
+
+START = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def requests_table(db_session):
+    """Seeds 7 pending (5 activated) and 5 approved requests."""
+    for i in range(7):
+        db_session.add(
+            Request(
+                participant_id=f"PEND{i}",
+                status="pending",
+                is_activated=int(i < 5),
+                hf_handle=f"pending_{i}",
+                email=f"pending{i}@example.com",
+                # PEND2 and PEND4 share a timestamp to exercise the tie-breaker.
+                timestamp=START + timedelta(minutes=min(i, 6 - i) if i else 0),
+            )
+        )
+    for i in range(5):
+        db_session.add(
+            Request(
+                participant_id=f"APPR{i}",
+                status="approved",
+                is_activated=1,
+                hf_handle=f"approved_{i}",
+                email=f"approved{i}@example.org",
+                partition_id=10 + i,
+                timestamp=START + timedelta(minutes=i),
+            )
+        )
+    db_session.commit()
+    return db_session
+
+
+def _walk(db, table, page_size=2, **kwargs):
+    """Follows next cursors from the first page to the last."""
+    pages, after = [], None
+    while True:
+        page = admin_tables.fetch_page(
+            db, table, page_size=page_size, after=after, **kwargs
+        )
+        pages.append(page)
+        if page.next_cursor is None:
+            return pages
+        after = page.next_cursor
+
+
+def _ids(pages):
+    return [row[0] for page in pages for row in page.rows]
+
+
+def test_keyset_pages_cover_every_row_once(requests_table):
+    """Verify paging visits each row exactly once, in timestamp order."""
+    pages = _walk(requests_table, "pending")
+    assert [len(page.rows) for page in pages] == [2, 2, 1]
+    assert all(page.total == 5 for page in pages)
+    ids = _ids(pages)
+    assert sorted(ids) == [f"PEND{i}" for i in range(5)]
+    timestamps = {
+        r.participant_id: r.timestamp for r in requests_table.query(Request).all()
+    }
+    assert [timestamps[pid] for pid in ids] == sorted(timestamps[pid] for pid in ids)
+
+
+def test_approved_default_order_is_newest_first(requests_table):
+    """Verify the approved table defaults to descending timestamps."""
+    pages = _walk(requests_table, "approved")
+    assert _ids(pages) == ["APPR4", "APPR3", "APPR2", "APPR1", "APPR0"]
+    assert pages[0].rows[0] == ["APPR4", "approved_4", "approved4@example.org", 14]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_by_other_columns(requests_table, descending):
+    """Verify server-side sorting by a non-default column."""
+    pages = _walk(
+        requests_table, "approved", sort_by="partition_id", descending=descending
+    )
+    expected = [f"APPR{i}" for i in range(5)]
+    assert _ids(pages) == (expected[::-1] if descending else expected)
+
+
+def test_search_by_handle_email_and_partition(requests_table):
+    """Verify search matches handles, emails and partition IDs."""
+    page = admin_tables.fetch_page(requests_table, "pending", search="PENDING_3")
+    assert _ids([page]) == ["PEND3"]
+    assert page.total == 1
+
+    page = admin_tables.fetch_page(requests_table, "approved", search="example.org")
+    assert page.total == 5
+
+    page = admin_tables.fetch_page(requests_table, "approved", search="12")
+    assert _ids([page]) == ["APPR2"]
+
+
+def test_search_escapes_wildcards(requests_table):
+    """Verify LIKE wildcards in the search term are matched literally."""
+    page = admin_tables.fetch_page(requests_table, "pending", search="%")
+    assert page.rows == [] and page.total == 0
+
+
+def test_rejects_unknown_table_and_column():
+    """Verify only declared tables and sortable columns are accepted."""
+    with pytest.raises(ValueError):
+        admin_tables.page_query("everything")
+    with pytest.raises(ValueError):
+        admin_tables.page_query("pending", sort_by="partition_id")
+
+
+def test_fetch_page_async(async_db, requests_table):
+    """Verify the async variant returns the same page as the sync one."""
+    page = asyncio.run(admin_tables.fetch_page_async("approved", page_size=3))
+    assert page == admin_tables.fetch_page(requests_table, "approved", page_size=3)
+    assert page.next_cursor is not None
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_paging_rows_with_database_default_timestamps(db_session, descending):
+    """Verify cursors round-trip timestamps written by the database default."""
+    for i in range(6):
+        db_session.add(
+            Request(participant_id=f"P{i}", status="approved", is_activated=1)
+        )
+    db_session.commit()
+
+    pages = _walk(db_session, "approved", descending=descending)
+    assert [len(page.rows) for page in pages] == [2, 2, 2]
+    expected = [f"P{i}" for i in range(6)]
+    assert _ids(pages) == (expected[::-1] if descending else expected)
@@ -1,10 +1,20 @@
 import os
 import stat
+import base64
+import hashlib
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ec
 
-from blossomtune_gradio.auth_keys import AuthKeyGenerator, rebuild_authorized_keys_csv
+from blossomtune_gradio.auth_keys import (
+    AuthKeyGenerator,
+    KeyPool,
+    get_registry_generation,
+    key_fingerprint,
+    rebuild_authorized_keys_csv,
+)
 
 
 @pytest.fixture
@@ -54,6 +64,27 @@ class TestAuthKeyGenerator:
         assert isinstance(public_key_from_file, ec.EllipticCurvePublicKey)
 
 
+def test_key_fingerprint():
+    """Verify fingerprints follow the OpenSSH SHA256 format and ignore comments."""
+    key_body = (
+        ec.generate_private_key(ec.SECP384R1())
+        .public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.OpenSSH,
+            format=serialization.PublicFormat.OpenSSH,
+        )
+        .decode("utf-8")
+    )
+    blob = base64.b64decode(key_body.split()[1])
+    expected = "SHA256:" + base64.b64encode(hashlib.sha256(blob).digest()).decode()
+
+    assert key_fingerprint(key_body) == expected.rstrip("=")
+    assert key_fingerprint(f"{key_body} participant_01") == key_fingerprint(key_body)
+    assert key_fingerprint("-----BEGIN PUBLIC KEY-----") is None
+    assert key_fingerprint("ecdsa-sha2-nistp384 not_base64!") is None
+    assert key_fingerprint("") is None
+
+
 class TestRebuildAuthorizedKeysFile:
     """Test suite for the rebuild_authorized_keys_csv function."""
 
@@ -112,29 +143,135 @@ class TestRebuildAuthorizedKeysFile:
         )
         assert content == expected_content
 
-    def test_rebuild_sanitizes_pem_keys_to_ssh_format(self, tmp_path):
-        """
-        Tests the self-healing capability of the rebuild function to convert
-        old PEM keys from the database into the correct OpenSSH format.
-        """
+    def test_rebuild_writes_stored_keys_without_parsing(self, tmp_path, mocker):
+        """Verify stored keys are written as is, with no cryptography calls."""
         key_dir = tmp_path / "keys_test"
         os.makedirs(key_dir)
+        spy = mocker.spy(serialization, "load_ssh_public_key")
+        pem_spy = mocker.spy(serialization, "load_pem_public_key")
 
-        # Generate a real key pair to get a valid PEM string
-        private_key = ec.generate_private_key(ec.SECP384R1())
-        public_key = private_key.public_key()
-        pem_key = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        ).decode("utf-8")
-
-        participants = [("p1_pem", pem_key)]
-        rebuild_authorized_keys_csv(str(key_dir), participants)
+        rebuild_authorized_keys_csv(
+            str(key_dir), [("p1", "ecdsa-sha2-nistp384 AAAA...key1 p1")]
+        )
 
         csv_path = os.path.join(key_dir, "authorized_supernodes.csv")
         with open(csv_path, "r") as f:
-            content = f.read().strip()
+            assert f.read() == "ecdsa-sha2-nistp384 AAAA...key1 p1\n"
+        assert spy.call_count == 0
+        assert pem_spy.call_count == 0
+
+    def test_rebuild_skips_unchanged_content(self, tmp_path):
+        """Verify an identical rebuild leaves the file and generation alone."""
+        key_dir = tmp_path / "keys_test"
+        os.makedirs(key_dir)
+        participants = [("p1", "ecdsa-sha2-nistp384 AAAA...key1 p1")]
+
+        assert rebuild_authorized_keys_csv(str(key_dir), participants) is True
+        generation = get_registry_generation()
+        csv_path = os.path.join(key_dir, "authorized_supernodes.csv")
+        inode = os.stat(csv_path).st_ino
+
+        assert rebuild_authorized_keys_csv(str(key_dir), participants) is False
+        assert get_registry_generation() == generation
+        assert os.stat(csv_path).st_ino == inode
+
+        participants.append(("p2", "ecdsa-sha2-nistp384 AAAA...key2 p2"))
+        assert rebuild_authorized_keys_csv(str(key_dir), participants) is True
+        assert get_registry_generation() == generation + 1
+
+    def test_rebuild_replaces_file_atomically(self, tmp_path):
+        """Verify the file is swapped in whole and no temp files are left."""
+        key_dir = tmp_path / "keys_test"
+        os.makedirs(key_dir)
+        csv_path = os.path.join(key_dir, "authorized_supernodes.csv")
+        rebuild_authorized_keys_csv(str(key_dir), [("p1", "ecdsa-sha2-nistp384 a p1")])
+        old_inode = os.stat(csv_path).st_ino
+
+        rebuild_authorized_keys_csv(str(key_dir), [("p2", "ecdsa-sha2-nistp384 b p2")])
+
+        assert os.stat(csv_path).st_ino != old_inode
+        assert os.listdir(key_dir) == ["authorized_supernodes.csv"]
+        if os.name != "nt":
+            assert stat.S_IMODE(os.stat(csv_path).st_mode) == 0o644
+
+
+class TestKeyPool:
+    """Test suite for the KeyPool class."""
+
+    @pytest.fixture
+    def pool(self, tmp_path):
+        return KeyPool(key_dir=str(tmp_path / "auth_keys"), depth=3)
+
+    def test_fill_tops_up_to_depth(self, pool):
+        """Verify fill generates keys up to the configured depth only."""
+        assert pool.fill() == 3
+        assert pool.size() == 3
+        assert pool.fill() == 0
+        if os.name != "nt":
+            for key_id in pool._available_ids():
+                key_path = os.path.join(pool.pool_dir, f"{key_id}.key")
+                assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+
+    def test_fill_with_workers_uses_threads(self, pool):
+        """Verify parallel refills run on threads, never on forked processes."""
+        pool.workers = 2
+        try:
+            assert pool.fill() == 3
+            assert pool.size() == 3
+            assert isinstance(pool._executor, ThreadPoolExecutor)
+        finally:
+            pool.stop()
+
+    def test_claim_assigns_key_to_participant(self, pool):
+        """Verify a claimed key is moved to the participant's files."""
+        pool.fill()
+        priv_path, pub_path, pub_ssh_string = pool.claim("participant_01")
+
+        assert pool.size() == 2
+        assert priv_path == os.path.join(pool.key_dir, "participant_01.key")
+        assert pub_ssh_string.startswith("ecdsa-sha2-nistp384")
+        assert pub_ssh_string.endswith(" participant_01")
+        with open(pub_path, "r") as f:
+            assert f.read() == pub_ssh_string
+
+        # The private key must match the public key handed out.
+        with open(priv_path, "rb") as f:
+            private_key = serialization.load_pem_private_key(f.read(), password=None)
+        key_body = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.OpenSSH,
+            format=serialization.PublicFormat.OpenSSH,
+        )
+        assert pub_ssh_string == f"{key_body.decode('utf-8')} participant_01"
+
+    def test_claim_from_empty_pool(self, pool):
+        """Verify claiming from an empty pool returns None."""
+        assert pool.claim("participant_01") is None
+
+    def test_generator_uses_pool_and_falls_back(self, pool, mocker):
+        """Verify AuthKeyGenerator prefers pooled keys over inline generation."""
+        generator = AuthKeyGenerator(key_dir=pool.key_dir, key_pool=pool)
+        spy = mocker.spy(generator, "_generate_key_pair")
+        pool.depth = 1
+        pool.fill()
+
+        _, _, pooled = generator.generate_participant_keys("p1")
+        _, _, inline = generator.generate_participant_keys("p2")
+
+        assert pooled.endswith(" p1")
+        assert inline.endswith(" p2")
+        assert spy.call_count == 1
 
-        # Verify the output is now in the correct OpenSSH format with the comment
-        assert content.startswith("ecdsa-sha2-nistp384")
-        assert content.endswith("p1_pem")
+    def test_background_refill(self, pool):
+        """Verify the background thread refills the pool after a claim."""
+        pool.refill_interval = 0.05
+        pool.start()
+        try:
+            deadline = time.monotonic() + 10
+            while pool.size() < pool.depth and time.monotonic() < deadline:
+                time.sleep(0.05)
+            pool.claim("participant_01")
+            while pool.size() < pool.depth and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            pool.stop(timeout=5)
+        assert pool.size() == pool.depth
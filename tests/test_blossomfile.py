@@ -1,9 +1,17 @@
+import io
 import os
 import json
 import zipfile
 import pytest
 
-from blossomtune_gradio.blossomfile import create_blossomfile
+from blossomtune_gradio import blossomfile
+from blossomtune_gradio.blossomfile import (
+    BlossomfileCache,
+    build_blossomfile,
+    create_blossomfile,
+    download_url,
+    verify_download,
+)
 
 
 @pytest.fixture
@@ -102,3 +110,191 @@ def test_create_blossomfile_missing_input_file(tmp_path):
 
     # Verify that the partially created blossomfile was removed
     assert not os.path.exists(blossomfile_path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture providing an empty BlossomfileCache in a temporary directory."""
+    return BlossomfileCache(cache_dir=str(tmp_path / "cache"), max_entries=2)
+
+
+def _cached(cache, creds, participant_id="participant_abc", partition_id=5):
+    return cache.get_or_create(
+        participant_id=participant_id,
+        ca_cert_path=creds["ca_cert_path"],
+        auth_key_path=creds["auth_key_path"],
+        auth_pub_path=creds["auth_pub_path"],
+        superlink_address="blossomtune-test.ethicalabs.ai:9092",
+        partition_id=partition_id,
+        num_partitions=10,
+    )
+
+
+class TestBlossomfileCache:
+    """Test suite for the BlossomfileCache class."""
+
+    def test_repeat_requests_hit_the_cache(self, cache, dummy_credential_files, mocker):
+        """Verify the archive is only built once for identical inputs."""
+        spy = mocker.spy(blossomfile, "_archive")
+        first = _cached(cache, dummy_credential_files)
+        second = _cached(cache, dummy_credential_files)
+
+        assert first == second
+        assert os.path.basename(first) == "participant_abc-blossomfile.zip"
+        assert spy.call_count == 1
+        with zipfile.ZipFile(first, "r") as zf:
+            assert len(zf.namelist()) == 4
+        # The cached file is the in-memory archive, written as is.
+        with open(first, "rb") as f:
+            assert f.read() == _build(dummy_credential_files).data
+
+    def test_changed_inputs_produce_a_new_entry(self, cache, dummy_credential_files):
+        """Verify a change in any input yields a different archive."""
+        first = _cached(cache, dummy_credential_files)
+        moved = _cached(cache, dummy_credential_files, partition_id=6)
+        with open(dummy_credential_files["ca_cert_path"], "w") as f:
+            f.write("---ROTATED CERTIFICATE---")
+        rotated = _cached(cache, dummy_credential_files)
+
+        assert len({first, moved, rotated}) == 3
+        with zipfile.ZipFile(rotated, "r") as zf:
+            assert zf.read("ca.crt") == b"---ROTATED CERTIFICATE---"
+
+    def test_evicts_oldest_entries_above_max_entries(
+        self, cache, dummy_credential_files
+    ):
+        """Verify the cache never keeps more than max_entries archives."""
+        first = _cached(cache, dummy_credential_files, partition_id=1)
+        os.utime(os.path.dirname(first), (0, 0))
+        _cached(cache, dummy_credential_files, partition_id=2)
+        _cached(cache, dummy_credential_files, partition_id=3)
+
+        assert len(os.listdir(cache.cache_dir)) == 2
+        assert not os.path.exists(first)
+
+    def test_evicts_expired_entries(self, cache, dummy_credential_files):
+        """Verify entries older than max_age are removed."""
+        cache.max_age = 60
+        path = _cached(cache, dummy_credential_files)
+        os.utime(os.path.dirname(path), (0, 0))
+
+        assert cache.evict() == 1
+        assert not os.path.exists(path)
+
+    def test_invalidate_participant(self, cache, dummy_credential_files):
+        """Verify invalidation only removes the given participant's archives."""
+        mine = _cached(cache, dummy_credential_files)
+        theirs = _cached(cache, dummy_credential_files, participant_id="other")
+
+        assert cache.invalidate("participant_abc") == 1
+        assert not os.path.exists(mine)
+        assert os.path.exists(theirs)
+
+    def test_get_loads_the_cached_archive(self, cache, dummy_credential_files):
+        """Verify get() returns the cached archive's bytes, ready to serve."""
+        path = _cached(cache, dummy_credential_files)
+        bundle = cache.get(
+            "participant_abc",
+            dummy_credential_files["ca_cert_path"],
+            dummy_credential_files["auth_key_path"],
+            dummy_credential_files["auth_pub_path"],
+            "blossomtune-test.ethicalabs.ai:9092",
+            5,
+            10,
+        )
+
+        assert bundle.filename == os.path.basename(path)
+        with open(path, "rb") as f:
+            assert bundle.data == f.read()
+
+    def test_missing_credentials_raise(self, cache, tmp_path):
+        """Verify a missing credential file raises and leaves nothing behind."""
+        missing = str(tmp_path / "missing.key")
+        with pytest.raises(FileNotFoundError):
+            _cached(
+                cache,
+                {
+                    "ca_cert_path": missing,
+                    "auth_key_path": missing,
+                    "auth_pub_path": missing,
+                },
+            )
+        assert cache._entries() == []
+
+
+def _build(creds, partition_id=5):
+    return build_blossomfile(
+        participant_id="participant_abc",
+        ca_cert_path=creds["ca_cert_path"],
+        auth_key_path=creds["auth_key_path"],
+        auth_pub_path=creds["auth_pub_path"],
+        superlink_address="blossomtune-test.ethicalabs.ai:9092",
+        partition_id=partition_id,
+        num_partitions=10,
+    )
+
+
+class TestInMemoryBlossomfile:
+    """Test suite for the in-memory Blossomfile builder."""
+
+    def test_build_contents(self, dummy_credential_files):
+        """Verify the in-memory archive has the same members as the on-disk one."""
+        bundle = _build(dummy_credential_files)
+
+        assert bundle.filename == "participant_abc-blossomfile.zip"
+        with zipfile.ZipFile(io.BytesIO(bundle.data), "r") as zf:
+            assert sorted(zf.namelist()) == [
+                "auth.key",
+                "auth.pub",
+                "blossom.json",
+                "ca.crt",
+            ]
+            config_data = json.loads(zf.read("blossom.json"))
+            assert config_data["node_config"]["partition-id"] == 5
+            assert zf.read("auth.key") == b"---BEGIN EC PRIVATE KEY---"
+
+    def test_build_is_reproducible(self, dummy_credential_files):
+        """Verify identical inputs give identical bytes."""
+        first = _build(dummy_credential_files)
+        second = _build(dummy_credential_files)
+        other = _build(dummy_credential_files, partition_id=6)
+
+        assert first.data == second.data
+        assert first.etag == second.etag
+        assert first.etag != other.etag
+
+    def test_http_headers(self, dummy_credential_files):
+        """Verify the headers needed to serve the archive directly."""
+        bundle = _build(dummy_credential_files)
+        headers = bundle.http_headers()
+
+        assert headers["Content-Type"] == "application/zip"
+        assert headers["Content-Length"] == str(len(bundle.data))
+        assert headers["ETag"] == bundle.etag
+        assert "participant_abc-blossomfile.zip" in headers["Content-Disposition"]
+        assert bundle.matches(bundle.etag)
+        assert bundle.matches(f'"other", {bundle.etag}')
+        assert not bundle.matches('"other"')
+        assert not bundle.matches(None)
+
+    def test_build_missing_file(self, dummy_credential_files, tmp_path):
+        """Verify a missing credential file raises FileNotFoundError."""
+        creds = dict(dummy_credential_files, auth_key_path=str(tmp_path / "nope"))
+        with pytest.raises(FileNotFoundError, match="Required credential file"):
+            _build(creds)
+
+
+def test_download_links_are_signed_and_expire(mocker):
+    """Verify download links only verify for their participant, until expiry."""
+    mocker.patch.object(blossomfile.cfg, "BLOSSOMFILE_URL_TTL", 60)
+    url = download_url("PID123", now=1000)
+    path, _, query = url.partition("?")
+    params = dict(pair.split("=") for pair in query.split("&"))
+
+    assert path == "blossomfile/PID123"
+    assert params["expires"] == "1060"
+    assert verify_download("PID123", params["expires"], params["signature"], now=1059)
+    assert not verify_download("PID123", params["expires"], params["signature"], 1061)
+    assert not verify_download("OTHER", params["expires"], params["signature"], 1000)
+    assert not verify_download("PID123", "9999", params["signature"], now=1000)
+    assert not verify_download("PID123", None, None, now=1000)
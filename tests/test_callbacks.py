@@ -0,0 +1,105 @@
+import asyncio
+
+from blossomtune_gradio import ratelimit
+from blossomtune_gradio.database import Request
+from blossomtune_gradio.logs import Log
+from blossomtune_gradio.ui import callbacks
+from blossomtune_gradio.ui import components
+
+
+def _views():
+    return (
+        dict(components.pending_view_state.value),
+        dict(components.approved_view_state.value),
+    )
+
+
+def test_refresh_tables_skips_unchanged_revision(async_db):
+    """Verify the tables are only re-rendered after a request was written."""
+    async_db.add(Request(participant_id="CB1", status="pending", is_activated=1))
+    async_db.commit()
+
+    updates = asyncio.run(callbacks.refresh_tables(*_views(), None))
+    revision = updates[components.admin_revision_state]
+    assert revision == 1
+    assert updates[components.pending_requests_df]["value"][0][0] == "CB1"
+
+    # Nothing changed: no table, page or state updates at all.
+    assert asyncio.run(callbacks.refresh_tables(*_views(), revision)) == {}
+
+    async_db.get(Request, "CB1").status = "approved"
+    async_db.commit()
+    updates = asyncio.run(callbacks.refresh_tables(*_views(), revision))
+    assert updates[components.admin_revision_state] == revision + 1
+    assert updates[components.approved_participants_df]["value"][0][0] == "CB1"
+
+
+def test_rate_limited_request_skips_federation(mocker):
+    """Verify a throttled join attempt returns before any federation work."""
+    limiter = ratelimit.RateLimiter(
+        ratelimit.MemoryBackend(), {"hf_handle": ratelimit.Limit(1, 60)}
+    )
+    mocker.patch.object(ratelimit, "limiter", limiter)
+    mocker.patch("blossomtune_gradio.config.SPACE_ID", None)
+    check = mocker.patch(
+        "blossomtune_gradio.federation.check_participant_status_async",
+        return_value=(False, "registered", None),
+    )
+
+    def submit():
+        return asyncio.run(
+            callbacks.on_check_participant_status("alice", "a@x.org", "", None)
+        )
+
+    submit()
+    updates = submit()
+
+    check.assert_called_once()
+    assert "Too Many Attempts" in updates[components.request_status_md]["value"]
+    assert limiter.stats["rejected_hf_handle"] == 1
+
+
+def test_log_stream_sends_only_new_lines(mocker):
+    """Verify the live log yields nothing while idle, then extends its text."""
+    test_log = Log()
+    mocker.patch.object(callbacks, "log", test_log)
+    mocker.patch.object(callbacks.cfg, "LOG_STREAM_INTERVAL", 0)
+
+    async def scenario():
+        stream = callbacks.log_updater_generator()
+        test_log("up", source="superlink")
+        first = await anext(stream)
+        # The stream keeps polling the idle log without yielding until the
+        # next record is written.
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, test_log, "started", "runner:a")
+        second = await anext(stream)
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == "[Superlink] up"
+    assert second == "[Superlink] up\n[Runner a] started"
+
+
+def test_bulk_deny_summary_and_owner_check(mocker):
+    """Verify bulk actions need the Space owner and report in the past tense."""
+    owner = mocker.patch.object(callbacks.auth, "is_space_owner", return_value=False)
+    bulk = mocker.patch.object(
+        callbacks.fed,
+        "manage_requests_bulk",
+        return_value=[("P1", True, "denied"), ("P2", True, "denied")],
+    )
+    info = mocker.patch.object(callbacks.gr, "Info")
+    mocker.patch.object(callbacks.gr, "Warning")
+
+    asyncio.run(callbacks.on_bulk_manage_fed_requests(["P1", "P2"], "deny", None, None))
+    bulk.assert_not_called()
+
+    owner.return_value = True
+    update = asyncio.run(
+        callbacks.on_bulk_manage_fed_requests(["P1", "P2"], "deny", None, None)
+    )
+    bulk.assert_called_once_with(["P1", "P2"], "deny")
+    info.assert_called_once_with("2 of 2 participant(s) denied.")
+    assert update["value"] == [["P1", "✅", "denied"], ["P2", "✅", "denied"]]
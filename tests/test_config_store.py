@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+
+from blossomtune_gradio import config
+from blossomtune_gradio.config_store import ConfigStore, VERSION_KEY
+from blossomtune_gradio.database import Config
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(db_session, clock):
+    """A store with a controllable clock, bound to the test database."""
+    return ConfigStore(refresh_interval=5, clock=clock)
+
+
+def test_defaults_when_unset(store, mocker):
+    """Verify unset keys fall back to their typed defaults."""
+    mocker.patch.object(config, "MAX_NUM_NODES", 7)
+    assert store.get("num_partitions") == 10
+    assert store.get("max_num_nodes") == 7
+    assert store.get("runner_app") == ""
+    assert store.version == 0
+
+
+def test_set_is_typed_and_persisted(store, db_session):
+    """Verify writes are converted, upserted and stamped with a new version."""
+    assert store.set("num_partitions", "12") == 1
+    assert store.set_many({"num_partitions": 16, "max_num_nodes": "3"}) == 2
+
+    assert store.get("num_partitions") == 16
+    assert store.get("max_num_nodes") == 3
+    rows = {row.key: row.value for row in db_session.query(Config)}
+    assert rows == {"num_partitions": "16", "max_num_nodes": "3", VERSION_KEY: "2"}
+
+
+def test_upsert_overwrites_existing_row(store, db_session):
+    """Verify a row written outside the store is updated in place."""
+    db_session.add(Config(key="num_partitions", value="4"))
+    db_session.commit()
+
+    assert store.get("num_partitions") == 4
+    store.set("num_partitions", 8)
+    db_session.expire_all()
+    assert db_session.get(Config, "num_partitions").value == "8"
+
+
+def test_reads_are_cached_until_refresh(store, mocker):
+    """Verify repeated reads within the refresh interval never open a session."""
+    store.set("num_partitions", 10)
+    assert store.get("num_partitions") == 10
+
+    session_factory = mocker.patch("blossomtune_gradio.config_store.SessionLocal")
+    for _ in range(100):
+        assert store.get("num_partitions") == 10
+    session_factory.assert_not_called()
+
+
+def test_outside_write_detected_by_version(db_session, clock):
+    """Verify a write by another store is picked up via the version stamp."""
+    reader = ConfigStore(refresh_interval=5, clock=clock)
+    writer = ConfigStore(refresh_interval=5, clock=clock)
+    assert reader.get("num_partitions") == 10
+
+    writer.set("num_partitions", 20)
+    assert reader.get("num_partitions") == 10  # still within the interval
+
+    clock.now += 6
+    assert reader.get("num_partitions") == 20
+    assert reader.version == writer.version == 1
+
+
+def test_refresh_async_queries_in_a_worker_thread(db_session, clock, mocker):
+    """Verify async refreshes run off the event loop and only when due."""
+    reader = ConfigStore(refresh_interval=5, clock=clock)
+    writer = ConfigStore(refresh_interval=5, clock=clock)
+    to_thread = mocker.spy(asyncio, "to_thread")
+
+    asyncio.run(reader.refresh_async())
+    assert to_thread.call_count == 1
+    asyncio.run(reader.refresh_async())
+    assert to_thread.call_count == 1  # still within the interval
+
+    writer.set("num_partitions", 20)
+    clock.now += 6
+    assert reader.needs_refresh()
+    asyncio.run(reader.refresh_async())
+    assert to_thread.call_count == 2
+
+    # The refreshed values are then served without a query.
+    session_factory = mocker.patch("blossomtune_gradio.config_store.SessionLocal")
+    assert reader.get("num_partitions") == 20
+    session_factory.assert_not_called()
+
+
+def test_rejects_unknown_keys_and_bad_values(store):
+    """Verify invalid writes raise before anything is persisted."""
+    with pytest.raises(KeyError):
+        store.get("nope")
+    with pytest.raises(KeyError):
+        store.set("nope", 1)
+    with pytest.raises(ValueError):
+        store.set("num_partitions", "many")
+    assert store.version == 0
+
+
+def test_invalid_stored_value_falls_back_to_default(store, db_session):
+    """Verify a corrupt row does not break readers."""
+    db_session.add(Config(key="num_partitions", value="abc"))
+    db_session.commit()
+    assert store.get("num_partitions") == 10
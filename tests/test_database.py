@@ -0,0 +1,80 @@
+import importlib.util
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from blossomtune_gradio import config
+from blossomtune_gradio import database
+from blossomtune_gradio.database import create_async_db_engine, create_db_engine
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_profile_applied_on_connect(mocker, tmp_path):
+    """Verify every new SQLite connection runs the configured tuning PRAGMAs."""
+    mocker.patch.object(config, "SQLITE_BUSY_TIMEOUT", 1234)
+    mocker.patch.object(config, "SQLITE_CACHE_SIZE", -2048)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}", tuned=True)
+
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "busy_timeout") == 1234
+    assert _pragma(engine, "cache_size") == -2048
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+    engine.dispose()
+
+
+def test_sqlite_profile_can_be_disabled(tmp_path):
+    """Verify an untuned engine keeps SQLite's defaults."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'plain.db'}", tuned=False)
+
+    assert _pragma(engine, "journal_mode") == "delete"
+    assert _pragma(engine, "synchronous") == 2  # FULL
+    engine.dispose()
+
+
+def test_pool_sizing_from_config(mocker, tmp_path):
+    """Verify file-based engines use the configured pool size."""
+    mocker.patch.object(config, "DB_POOL_SIZE", 3)
+    mocker.patch.object(config, "DB_MAX_OVERFLOW", 4)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 4
+    engine.dispose()
+
+
+def test_in_memory_database_skips_pool_sizing():
+    """Verify in-memory SQLite still works without queue pool arguments."""
+    engine = create_db_engine("sqlite://")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
+
+
+def test_async_engine_requires_an_async_driver():
+    """Verify an unsupported backend fails with a configuration error."""
+    with pytest.raises(ValueError, match="has no async driver"):
+        create_async_db_engine("mysql://user@localhost/db")
+    if importlib.util.find_spec("asyncpg") is None:
+        with pytest.raises(ValueError, match="install the 'asyncpg' package"):
+            create_async_db_engine("postgresql://user@localhost/db")
+
+
+def test_async_engine_is_created_on_first_use(mocker, tmp_path):
+    """Verify the async engine is only built when an async session is opened."""
+    mocker.patch.object(database, "_async_engine", None)
+    mocker.patch.object(database, "_async_sessions", async_sessionmaker())
+    mocker.patch.object(config, "SQLALCHEMY_URL", "mysql://user@localhost/db")
+    with pytest.raises(ValueError):
+        database.AsyncSessionLocal()
+
+    mocker.patch.object(config, "SQLALCHEMY_URL", f"sqlite:///{tmp_path / 'a.db'}")
+    session = database.AsyncSessionLocal()
+    assert session.bind is database.get_async_engine()
+    assert str(session.bind.url).startswith("sqlite+aiosqlite://")
@@ -1,14 +1,20 @@
+import asyncio
+
 import pytest
-from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
+from blossomtune_gradio import config as cfg
 from blossomtune_gradio import federation as fed
-from blossomtune_gradio.database import Request
+from blossomtune_gradio.resolver import StubResolver
+from blossomtune_gradio.database import Request, OutboxMessage, utcnow
 
 
-@pytest.fixture
-def mock_mail(mocker):
-    """Fixture to mock the mail module."""
-    return mocker.patch("blossomtune_gradio.mail.send_activation_email")
+@pytest.fixture(autouse=True)
+def offline_dns(mx_resolver):
+    """Answers MX lookups from a stub so these tests run offline."""
+    mx_resolver.backend = StubResolver({"ethicalabs.ai": 300, "example.com": 300})
+    return mx_resolver.backend
 
 
 def test_generate_participant_id():
@@ -30,9 +36,8 @@ def test_generate_activation_code():
 class TestCheckParticipantStatus:
     """Test suite for the check_participant_status function using SQLAlchemy."""
 
-    def test_new_user_registration_success(self, db_session, mock_settings, mock_mail):
+    def test_new_user_registration_success(self, db_session, mock_settings):
         """Verify successful registration for a new user."""
-        mock_mail.return_value = (True, "")
         approved, message, download = fed.check_participant_status(
             "new_user", "hello@ethicalabs.ai", ""
         )
@@ -45,6 +50,12 @@ class TestCheckParticipantStatus:
         assert request is not None
         assert request.email == "hello@ethicalabs.ai"
 
+        # Verify the activation email was queued in the outbox
+        message = db_session.query(OutboxMessage).one()
+        assert message.recipient == "hello@ethicalabs.ai"
+        assert message.status == "pending"
+        assert request.activation_code in message.body
+
     def test_new_user_invalid_email(self, db_session, mock_settings):
         """Verify registration fails with an invalid email."""
         approved, message, download = fed.check_participant_status(
@@ -159,6 +170,22 @@ class TestManageRequest:
         assert updated_user.status == "approved"
         assert updated_user.partition_id == 10
 
+    def test_approve_partition_in_use(self, db_session, mock_settings):
+        """Verify approval fails if the partition is held by someone else."""
+        db_session.add(
+            Request(participant_id="HOLDER", status="approved", partition_id=4)
+        )
+        db_session.add(
+            Request(participant_id="PENDING4", status="pending", is_activated=1)
+        )
+        db_session.commit()
+
+        success, message = fed.manage_request("PENDING4", "4", "approve")
+        assert success is False
+        assert message == "mock_partition_in_use_warning_md"
+        request = db_session.query(Request).filter_by(participant_id="PENDING4").one()
+        assert request.status == "pending"
+
     def test_approve_not_activated(self, db_session, mock_settings):
         """Verify approval fails if the user is not activated."""
         pending_user = Request(
@@ -194,6 +221,151 @@ class TestManageRequest:
         assert updated_user.status == "denied"
 
 
+class TestManageRequestsBulk:
+    """Test suite for the manage_requests_bulk function."""
+
+    def _add_pending(self, db_session, participant_id, is_activated=1):
+        db_session.add(
+            Request(
+                participant_id=participant_id,
+                status="pending",
+                hf_handle=f"handle_{participant_id}",
+                is_activated=is_activated,
+            )
+        )
+        db_session.commit()
+
+    def test_bulk_approve_assigns_free_partitions(self, db_session, mocker):
+        """Verify bulk approval fills partition gaps and rebuilds the CSV once."""
+        rebuild = mocker.patch(
+            "blossomtune_gradio.federation.rebuild_authorized_keys_csv"
+        )
+        keygen = mocker.patch(
+            "blossomtune_gradio.federation.AuthKeyGenerator"
+        ).return_value
+        keygen.generate_participant_keys.side_effect = lambda pid: (
+            f"{pid}.key",
+            f"{pid}.pub",
+            f"ecdsa-sha2-nistp384 AAAA {pid}",
+        )
+        db_session.add(Request(participant_id="OLD", status="approved", partition_id=1))
+        for pid in ("B1", "B2", "B3"):
+            self._add_pending(db_session, pid)
+
+        results = fed.manage_requests_bulk(["B1", "B2", "B3"], "approve")
+
+        assert [r[:2] for r in results] == [("B1", True), ("B2", True), ("B3", True)]
+        partitions = {
+            r.participant_id: r.partition_id
+            for r in db_session.query(Request).filter(Request.status == "approved")
+        }
+        assert partitions == {"OLD": 1, "B1": 0, "B2": 2, "B3": 3}
+        assert keygen.generate_participant_keys.call_count == 3
+        rebuild.assert_called_once()
+
+    def test_bulk_approve_reports_per_participant_errors(
+        self, db_session, mock_settings, mocker
+    ):
+        """Verify invalid entries are reported without blocking the others."""
+        mocker.patch("blossomtune_gradio.federation.rebuild_authorized_keys_csv")
+        mocker.patch(
+            "blossomtune_gradio.federation.AuthKeyGenerator"
+        ).return_value.generate_participant_keys.return_value = ("k", "p", "pub")
+        self._add_pending(db_session, "OK1")
+        self._add_pending(db_session, "INACTIVE", is_activated=0)
+
+        results = fed.manage_requests_bulk(["OK1", "INACTIVE", "MISSING"], "approve")
+
+        assert results == [
+            ("OK1", True, "Participant OK1 approved with partition 0."),
+            ("INACTIVE", False, "mock_participant_not_activated_warning_md"),
+            ("MISSING", False, "Participant not found."),
+        ]
+
+    def test_bulk_deny(self, db_session, mocker):
+        """Verify bulk denial revokes all selected participants at once."""
+        rebuild = mocker.patch(
+            "blossomtune_gradio.federation.rebuild_authorized_keys_csv"
+        )
+        db_session.add(
+            Request(
+                participant_id="A1",
+                status="approved",
+                partition_id=0,
+                public_key_pem="ecdsa-sha2-nistp384 AAAA A1",
+            )
+        )
+        self._add_pending(db_session, "D1")
+
+        results = fed.manage_requests_bulk(["A1", "D1", "A1"], "deny")
+
+        assert [r[:2] for r in results] == [("A1", True), ("D1", True)]
+        statuses = {r.participant_id: r.status for r in db_session.query(Request)}
+        assert statuses == {"A1": "denied", "D1": "denied"}
+        rebuild.assert_called_once()
+        assert rebuild.call_args.args[1] == []
+
+    def test_bulk_empty_selection(self, db_session):
+        """Verify an empty selection is a no-op."""
+        assert fed.manage_requests_bulk([], "approve") == []
+
+
+def test_key_fingerprint_is_kept_in_sync(db_session):
+    """Verify every write of the public key updates the indexed fingerprint."""
+    request = Request(
+        participant_id="FP1",
+        status="approved",
+        public_key_pem="ecdsa-sha2-nistp384 QUJDRA== FP1",
+    )
+    db_session.add(request)
+    db_session.commit()
+
+    assert request.key_fingerprint.startswith("SHA256:")
+    found = fed.get_participant_by_fingerprint(request.key_fingerprint)
+    assert found.participant_id == "FP1"
+
+    request.public_key_pem = None
+    db_session.commit()
+    assert request.key_fingerprint is None
+    assert fed.get_participant_by_fingerprint("SHA256:unknown") is None
+
+
+def test_authorized_keys_are_a_projection_of_stored_keys(db_session, mocker):
+    """Verify the CSV gets the stored keys of approved rows with a fingerprint."""
+    rebuild = mocker.patch("blossomtune_gradio.federation.rebuild_authorized_keys_csv")
+    for pid, status, key in (
+        ("OK", "approved", "ecdsa-sha2-nistp384 QUJDRA== OK"),
+        ("BAD", "approved", "-----BEGIN PUBLIC KEY-----"),
+        ("WAIT", "pending", "ecdsa-sha2-nistp384 RUZHSA== WAIT"),
+    ):
+        db_session.add(Request(participant_id=pid, status=status, public_key_pem=key))
+    db_session.commit()
+
+    fed._rebuild_authorized_keys(db_session)
+
+    assert rebuild.call_args.args[1] == [("OK", "ecdsa-sha2-nistp384 QUJDRA== OK")]
+
+
+def test_sync_authorized_keys_drops_revoked_participants(db_session, tmp_path, mocker):
+    """Verify the startup sync rewrites the CSV from the approved keys only."""
+    mocker.patch.object(fed.cfg, "AUTH_KEYS_DIR", str(tmp_path))
+    csv_path = tmp_path / "authorized_supernodes.csv"
+    csv_path.write_text("ecdsa-sha2-nistp384 RUZHSA== REVOKED\n")
+    db_session.add(
+        Request(
+            participant_id="OK",
+            status="approved",
+            public_key_pem="ecdsa-sha2-nistp384 QUJDRA== OK",
+        )
+    )
+    db_session.add(Request(participant_id="REVOKED", status="pending"))
+    db_session.commit()
+
+    assert fed.sync_authorized_keys() is True
+    assert csv_path.read_text() == "ecdsa-sha2-nistp384 QUJDRA== OK\n"
+    assert fed.sync_authorized_keys() is False
+
+
 def test_get_next_partition_id(db_session):
     """Verify the logic for finding the next available partition ID."""
     # No approved users yet
@@ -205,7 +377,7 @@ def test_get_next_partition_id(db_session):
             participant_id="P1",
             status="approved",
             partition_id=0,
-            timestamp=datetime.utcnow(),
+            timestamp=utcnow(),
         )
     )
     db_session.add(
@@ -213,7 +385,7 @@ def test_get_next_partition_id(db_session):
             participant_id="P2",
             status="approved",
             partition_id=1,
-            timestamp=datetime.utcnow(),
+            timestamp=utcnow(),
         )
     )
     db_session.commit()
@@ -225,8 +397,150 @@ def test_get_next_partition_id(db_session):
             participant_id="P3",
             status="approved",
             partition_id=3,
-            timestamp=datetime.utcnow(),
+            timestamp=utcnow(),
         )
     )
     db_session.commit()
     assert fed.get_next_partion_id() == 2
+
+
+class TestAsyncDataAccess:
+    """Test suite for the async variants used by the Gradio callbacks."""
+
+    def test_registration_and_activation(self, async_db, mock_settings):
+        """Verify a new user can register and then activate asynchronously."""
+        approved, message, download = asyncio.run(
+            fed.check_participant_status_async("async_user", "hello@ethicalabs.ai", "")
+        )
+        assert (approved, message, download) == (
+            False,
+            "mock_registration_submitted_md",
+            None,
+        )
+        request = async_db.query(Request).filter_by(hf_handle="async_user").one()
+        assert async_db.query(OutboxMessage).one().recipient == "hello@ethicalabs.ai"
+
+        _, message, _ = asyncio.run(
+            fed.check_participant_status_async(
+                "async_user", "hello@ethicalabs.ai", request.activation_code
+            )
+        )
+        assert message == "mock_activation_successful_md"
+        async_db.refresh(request)
+        assert request.is_activated == 1
+
+        _, message, _ = asyncio.run(
+            fed.check_participant_status_async(
+                "async_user", "hello@ethicalabs.ai", request.activation_code
+            )
+        )
+        assert message == "mock_status_pending_md"
+
+    def test_invalid_email(self, async_db, mock_settings):
+        """Verify the async MX check rejects unknown domains."""
+        _, message, _ = asyncio.run(
+            fed.check_participant_status_async("user", "user@missing.example", "")
+        )
+        assert message == "mock_invalid_email_md"
+        assert async_db.query(Request).count() == 0
+
+    def test_approve_and_deny(self, async_db, mock_settings, mocker, tmp_path):
+        """Verify approval generates keys and denial revokes them."""
+        mocker.patch.object(cfg, "AUTH_KEYS_DIR", str(tmp_path))
+        async_db.add(Request(participant_id="ASYNC1", status="pending", is_activated=1))
+        async_db.commit()
+
+        success, message = asyncio.run(
+            fed.manage_request_async("ASYNC1", "3", "approve")
+        )
+        assert success is True
+        request = async_db.query(Request).filter_by(participant_id="ASYNC1").one()
+        assert (request.status, request.partition_id) == ("approved", 3)
+        assert request.key_fingerprint is not None
+        assert "ASYNC1" in (tmp_path / "authorized_supernodes.csv").read_text()
+
+        success, _ = asyncio.run(fed.manage_request_async("ASYNC1", "", "deny"))
+        assert success is True
+        async_db.refresh(request)
+        assert (request.status, request.partition_id) == ("denied", None)
+        assert (tmp_path / "authorized_supernodes.csv").read_text() == "\n"
+
+    def test_approve_partition_in_use(self, async_db, mock_settings):
+        """Verify the async approval refuses a partition held by someone else."""
+        async_db.add(
+            Request(participant_id="HOLDER", status="approved", partition_id=4)
+        )
+        async_db.add(Request(participant_id="ASYNC2", status="pending", is_activated=1))
+        async_db.commit()
+
+        success, message = asyncio.run(
+            fed.manage_request_async("ASYNC2", "4", "approve")
+        )
+        assert success is False
+        assert message == "mock_partition_in_use_warning_md"
+
+
+class TestFederationRevision:
+    """Test suite for the revision stamp of the participant tables."""
+
+    def test_bumped_on_every_request_write(self, db_session):
+        """Verify inserts, updates and deletes of requests bump the revision."""
+        assert fed.get_federation_revision() == 0
+
+        request = Request(participant_id="REV1", status="pending")
+        db_session.add(request)
+        db_session.commit()
+        assert fed.get_federation_revision() == 1
+
+        request = db_session.get(Request, "REV1")
+        request.is_activated = 1
+        db_session.commit()
+        assert fed.get_federation_revision() == 2
+
+        db_session.delete(db_session.get(Request, "REV1"))
+        db_session.commit()
+        assert fed.get_federation_revision() == 3
+
+    def test_unchanged_without_request_writes(self, db_session):
+        """Verify reads and unrelated writes leave the revision alone."""
+        db_session.add(Request(participant_id="REV2", status="pending"))
+        db_session.commit()
+        revision = fed.get_federation_revision()
+
+        request = db_session.get(Request, "REV2")
+        request.status = "pending"  # same value, not a modification
+        db_session.query(Request).all()
+        db_session.add(OutboxMessage(recipient="a@b.c", subject="s", body="b"))
+        db_session.commit()
+        assert fed.get_federation_revision() == revision
+
+    def test_bumped_with_a_single_statement(self, db_session):
+        """Verify a flush bumps the revision with one upsert and no read."""
+        statements = []
+        engine = db_session.get_bind()
+
+        def record(conn, cursor, statement, *args):
+            if "config" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            db_session.add(Request(participant_id="REV4", status="pending"))
+            db_session.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert len(statements) == 1
+        assert fed.get_federation_revision() == 1
+
+    def test_hooks_are_scoped_to_app_sessions(self, db_session):
+        """Verify sessions outside SessionLocal do not run the Request hooks."""
+        with Session(bind=db_session.get_bind()) as other:
+            other.add(Request(participant_id="REV5", status="pending"))
+            other.commit()
+        assert fed.get_federation_revision() == 0
+
+    def test_async_matches_sync(self, async_db):
+        """Verify the async reader sees the same revision."""
+        async_db.add(Request(participant_id="REV3", status="pending"))
+        async_db.commit()
+        assert asyncio.run(fed.get_federation_revision_async()) == 1
@@ -0,0 +1,125 @@
+from blossomtune_gradio.logs import Budget, Log, LogTail, format_record, source_label
+
+
+def test_records_are_numbered_across_sources():
+    log = Log()
+    log("up", source="superlink")
+    log("hello", source="runner:run_1")
+    record = log.warning("slow", source="superlink")
+
+    assert record.seq == 3
+    assert (record.source, record.level, record.msg) == ("superlink", "WARNING", "slow")
+    assert log.last_seq == 3
+    assert log.sources() == ["runner:run_1", "superlink"]
+
+
+def test_format_record_labels_the_source():
+    assert source_label("superlink") == "Superlink"
+    assert source_label("runner:run_1") == "Runner run_1"
+    record = Log().record("Process finished.", source="runner:run_1")
+    assert format_record(record) == "[Runner run_1] Process finished."
+
+
+def test_each_source_keeps_its_own_line_budget():
+    log = Log(max_lines=3, budgets={"runner": (2, 1000)})
+    for i in range(10):
+        log(f"run {i}", source="runner:a")
+    log("superlink up", source="superlink")
+
+    # A chatty run does not evict the Superlink's history.
+    assert [r.msg for r in log.view(sources=["runner:a"])] == ["run 8", "run 9"]
+    assert [r.msg for r in log.view(sources=["superlink"])] == ["superlink up"]
+    assert log.stats["runner:a"] == {"lines": 2, "bytes": 10, "dropped": 8}
+
+
+def test_byte_budget_evicts_the_oldest_but_keeps_the_newest():
+    log = Log(budgets={"email": Budget(100, 10)})
+    log("aaaa", source="email")
+    log("bbbb", source="email")
+    log("cccc", source="email")
+    assert [r.msg for r in log.view()] == ["bbbb", "cccc"]
+
+    # A single record over budget is still kept.
+    log("x" * 50, source="email")
+    assert [r.msg for r in log.view()] == ["x" * 50]
+    assert log.stats["email"]["bytes"] == 50
+
+
+def test_budget_lookup_prefers_the_full_source_name():
+    log = Log(max_lines=5, budgets={"runner": (2, 100), "runner:big": (9, 100)})
+    assert log.budget("runner:big") == Budget(9, 100)
+    assert log.budget("runner:small") == Budget(2, 100)
+    assert log.budget("superlink").lines == 5
+
+
+def test_view_merges_sources_in_sequence_order():
+    log = Log()
+    for i in range(3):
+        log(f"s{i}", source="superlink")
+        log(f"a{i}", source="runner:a")
+        log(f"b{i}", source="runner:b", level="ERROR" if i == 1 else "INFO")
+
+    assert [r.msg for r in log.view(sources=["superlink", "runner:b"])] == [
+        "s0",
+        "b0",
+        "s1",
+        "b1",
+        "s2",
+        "b2",
+    ]
+    # Only the records after a sequence number, e.g. what a client has not seen.
+    assert [r.msg for r in log.view(after=6)] == ["s2", "a2", "b2"]
+    assert [r.msg for r in log.view(min_level="ERROR")] == ["b1"]
+    assert [r.msg for r in log.view(limit=2)] == ["a2", "b2"]
+    assert log.view(sources=["runner:missing"]) == []
+
+
+def test_output_and_drop_source():
+    log = Log()
+    log("up", source="superlink")
+    log("done", source="runner:a")
+    assert log.output == "[Superlink] up\n[Runner a] done"
+
+    log.drop_source("runner:a")
+    assert log.output == "[Superlink] up"
+    assert log.text(sources=["runner:a"]) == ""
+
+
+def test_since_returns_only_new_records():
+    log = Log()
+    assert log.since(0) == ([], 0)
+    log("one", source="superlink")
+    log("two", source="runner:a")
+
+    records, cursor = log.since(0)
+    assert [r.msg for r in records] == ["one", "two"]
+    assert log.since(cursor) == ([], cursor)
+
+    log("three", source="superlink")
+    records, cursor = log.since(cursor)
+    assert ([r.msg for r in records], cursor) == (["three"], 3)
+
+    # Records of other sources still move the cursor past them.
+    log("four", source="runner:a")
+    assert log.since(cursor, sources=["superlink"]) == ([], 4)
+
+
+def test_log_tail_only_extends_its_text():
+    log = Log()
+    tail = LogTail(log, max_lines=2)
+    assert tail.poll() is None
+
+    log("up", source="superlink")
+    assert tail.poll() == "[Superlink] up"
+    assert tail.poll() is None
+
+    log("a", source="runner:a")
+    assert tail.poll() == "[Superlink] up\n[Runner a] a"
+
+    # Past twice max_lines, the text is trimmed to the newest lines.
+    log("b", source="runner:a")
+    log("c", source="runner:a")
+    lines = ["[Superlink] up", "[Runner a] a", "[Runner a] b", "[Runner a] c"]
+    assert tail.poll() == "\n".join(lines)
+    log("d", source="runner:a")
+    assert tail.poll() == "[Runner a] c\n[Runner a] d"
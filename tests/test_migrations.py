@@ -0,0 +1,219 @@
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from sqlalchemy import create_engine, text
+
+from blossomtune_gradio import config
+from blossomtune_gradio import database
+from blossomtune_gradio.auth_keys import key_fingerprint
+
+
+def _alembic_config(db_url):
+    alembic_cfg = Config()
+    alembic_cfg.set_main_option("script_location", "alembic")
+    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
+    return alembic_cfg
+
+
+def test_public_keys_are_normalized_to_openssh(mocker, tmp_path):
+    """Verify legacy PEM keys are converted and fingerprinted on upgrade."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_cfg = _alembic_config(db_url)
+    command.upgrade(alembic_cfg, "3c5f2a9d81b4")
+
+    public_key = ec.generate_private_key(ec.SECP384R1()).public_key()
+    pem_key = public_key.public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode("utf-8")
+    ssh_key = public_key.public_bytes(
+        encoding=serialization.Encoding.OpenSSH,
+        format=serialization.PublicFormat.OpenSSH,
+    ).decode("utf-8")
+
+    engine = create_engine(db_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO requests (participant_id, status, is_activated, "
+                "public_key_pem) VALUES (:pid, 'approved', 1, :key)"
+            ),
+            [
+                {"pid": "PEM1", "key": pem_key},
+                {"pid": "BAD1", "key": "not-a-key"},
+                # OpenSSH prefix, but no key body or a body that is not base64.
+                {"pid": "BAD2", "key": "ecdsa-sha2-nistp384"},
+                {"pid": "BAD3", "key": "ecdsa-sha2-nistp384 not*base64 BAD3"},
+            ],
+        )
+
+    command.upgrade(alembic_cfg, "head")
+
+    with engine.connect() as conn:
+        rows = dict(
+            (row[0], row[1:])
+            for row in conn.execute(
+                text(
+                    "SELECT participant_id, public_key_pem, key_fingerprint "
+                    "FROM requests"
+                )
+            )
+        )
+    assert rows["PEM1"] == (f"{ssh_key} PEM1", key_fingerprint(ssh_key))
+    assert rows["BAD1"] == ("not-a-key", None)
+    assert rows["BAD2"] == ("ecdsa-sha2-nistp384", None)
+    assert rows["BAD3"] == ("ecdsa-sha2-nistp384 not*base64 BAD3", None)
+    engine.dispose()
+
+
+def test_duplicate_approvals_are_demoted_without_keys(mocker, tmp_path):
+    """Verify a demoted duplicate approval loses its key and fingerprint."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_cfg = _alembic_config(db_url)
+    command.upgrade(alembic_cfg, "9a4e6b7c2d10")
+
+    engine = create_engine(db_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO requests (participant_id, status, is_activated, "
+                "partition_id, timestamp, public_key_pem, key_fingerprint) "
+                "VALUES (:pid, 'approved', 1, 0, :ts, :key, :fp)"
+            ),
+            [
+                {"pid": "FIRST", "ts": "2025-01-01 00:00:00", "key": "k1", "fp": "f1"},
+                {"pid": "DUP", "ts": "2025-01-02 00:00:00", "key": "k2", "fp": "f2"},
+            ],
+        )
+
+    command.upgrade(alembic_cfg, "5d2c8e1f7a36")
+
+    with engine.connect() as conn:
+        rows = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                text(
+                    "SELECT participant_id, status, partition_id, public_key_pem, "
+                    "key_fingerprint FROM requests"
+                )
+            )
+        }
+    assert rows["FIRST"] == ("approved", 0, "k1", "f1")
+    assert rows["DUP"] == ("pending", None, None, None)
+    engine.dispose()
+
+
+def test_hot_query_indexes_round_trip(mocker, tmp_path):
+    """Verify the requests hot-query indexes are created and dropped."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_cfg = _alembic_config(db_url)
+    expected = {
+        "ix_requests_handle_email_code",
+        "ix_requests_status_activated_timestamp",
+        "ix_requests_status_timestamp",
+    }
+    engine = create_engine(db_url)
+
+    def index_names():
+        with engine.connect() as conn:
+            return {
+                row[0]
+                for row in conn.execute(
+                    text(
+                        "SELECT name FROM sqlite_master "
+                        "WHERE type = 'index' AND tbl_name = 'requests'"
+                    )
+                )
+            }
+
+    command.upgrade(alembic_cfg, "b81f0d3e6c52")
+    assert expected <= index_names()
+
+    command.downgrade(alembic_cfg, "5d2c8e1f7a36")
+    assert not expected & index_names()
+    engine.dispose()
+
+
+def test_requests_archive_round_trip(mocker, tmp_path):
+    """Verify the requests_archive table is created and dropped."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_cfg = _alembic_config(db_url)
+    engine = create_engine(db_url)
+
+    def table_names():
+        with engine.connect() as conn:
+            return {
+                row[0]
+                for row in conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'table'")
+                )
+            }
+
+    command.upgrade(alembic_cfg, "d8a3f51c9e27")
+    assert "requests_archive" in table_names()
+
+    command.downgrade(alembic_cfg, "c4d7e2a9f013")
+    assert "requests_archive" not in table_names()
+    engine.dispose()
+
+
+def test_runs_round_trip(mocker, tmp_path):
+    """Verify the runs table and its indexes are created and dropped."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_cfg = _alembic_config(db_url)
+    engine = create_engine(db_url)
+
+    def index_names():
+        with engine.connect() as conn:
+            return {
+                row[0]
+                for row in conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE tbl_name = 'runs'")
+                )
+            }
+
+    command.upgrade(alembic_cfg, "e5b9c3d7a142")
+    assert {
+        "runs",
+        "ix_runs_status_priority_id",
+        "ix_runs_app_finished_at",
+        "ix_runs_run_id",
+    } <= index_names()
+
+    command.downgrade(alembic_cfg, "d8a3f51c9e27")
+    assert not index_names()
+    engine.dispose()
+
+
+def test_schema_head_matches_migration_scripts():
+    """Verify the schema head is read from the packaged migration scripts."""
+    script = ScriptDirectory.from_config(_alembic_config("sqlite://"))
+    assert script.get_current_head() == database.schema_head()
+
+
+def test_run_migrations_fast_path(mocker, tmp_path):
+    """Verify Alembic only runs when the stored revision is behind the head."""
+    db_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    mocker.patch.object(config, "SQLALCHEMY_URL", db_url)
+    alembic_main = mocker.patch("alembic.config.main")
+    engine = create_engine(db_url)
+
+    assert not database.schema_is_current(engine)
+    assert database.run_migrations(engine) is True
+
+    command.upgrade(_alembic_config(db_url), "c4d7e2a9f013")
+    assert database.current_revisions(engine) == {"c4d7e2a9f013"}
+    assert database.run_migrations(engine) is True
+
+    command.upgrade(_alembic_config(db_url), "head")
+    alembic_main.reset_mock()
+    assert database.run_migrations(engine) is False
+    alembic_main.assert_not_called()
+    engine.dispose()
@@ -0,0 +1,125 @@
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from blossomtune_gradio import outbox
+from blossomtune_gradio.database import OutboxMessage, utcnow
+
+
+@pytest.fixture
+def sender():
+    """Fixture providing a mock EmailSender that always succeeds."""
+    mock_sender = MagicMock()
+    mock_sender.send_email.return_value = (True, "")
+    return mock_sender
+
+
+def _queue(db_session, recipient="user@example.com", code="ABCDEFGH"):
+    message = outbox.enqueue_activation_email(db_session, recipient, code)
+    db_session.commit()
+    return message.id
+
+
+def test_enqueue_is_part_of_callers_transaction(db_session):
+    """Verify a queued email is discarded if the caller rolls back."""
+    outbox.enqueue_activation_email(db_session, "user@example.com", "ABCDEFGH")
+    db_session.rollback()
+    assert db_session.query(OutboxMessage).count() == 0
+
+
+def test_deliver_next_sends_and_marks_sent(db_session, sender):
+    """Verify a pending message is delivered and marked as sent."""
+    message_id = _queue(db_session)
+
+    assert outbox.deliver_next(sender) is True
+
+    sender.send_email.assert_called_once()
+    recipient, subject, body = sender.send_email.call_args.args
+    assert recipient == "user@example.com"
+    assert "ABCDEFGH" in body
+    message = db_session.get(OutboxMessage, message_id)
+    assert message.status == "sent"
+    assert message.attempts == 1
+    assert message.sent_at is not None
+
+
+def test_deliver_next_empty_outbox(db_session, sender):
+    """Verify nothing is sent when the outbox is empty."""
+    assert outbox.deliver_next(sender) is False
+    sender.send_email.assert_not_called()
+
+
+def test_failed_delivery_is_retried_with_backoff(db_session, sender, mocker):
+    """Verify a failed send is rescheduled instead of being dropped."""
+    mocker.patch("blossomtune_gradio.config.OUTBOX_MAX_ATTEMPTS", 3)
+    sender.send_email.return_value = (False, "SMTP down")
+    message_id = _queue(db_session)
+
+    assert outbox.deliver_next(sender) is True
+
+    message = db_session.get(OutboxMessage, message_id)
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert message.last_error == "SMTP down"
+    assert message.next_attempt_at > utcnow()
+    # Not due yet, so the next call finds nothing to do.
+    assert outbox.deliver_next(sender) is False
+
+
+def test_delivery_gives_up_after_max_attempts(db_session, sender, mocker):
+    """Verify a message is marked as failed once attempts are exhausted."""
+    mocker.patch("blossomtune_gradio.config.OUTBOX_MAX_ATTEMPTS", 1)
+    sender.send_email.side_effect = Exception("boom")
+    message_id = _queue(db_session)
+
+    outbox.deliver_next(sender)
+
+    message = db_session.get(OutboxMessage, message_id)
+    assert message.status == "failed"
+    assert message.last_error == "boom"
+
+
+def test_requeue_in_flight(db_session):
+    """Verify messages interrupted mid-delivery are re-queued on startup."""
+    message_id = _queue(db_session)
+    db_session.get(OutboxMessage, message_id).status = "sending"
+    db_session.commit()
+
+    assert outbox.requeue_in_flight() == 1
+    assert db_session.get(OutboxMessage, message_id).status == "pending"
+
+
+def test_due_messages_are_delivered_in_order(db_session, sender):
+    """Verify the oldest due message is claimed first."""
+    first = _queue(db_session, recipient="first@example.com")
+    _queue(db_session, recipient="second@example.com")
+    db_session.get(OutboxMessage, first).next_attempt_at = utcnow() - timedelta(
+        seconds=1
+    )
+    db_session.commit()
+
+    outbox.deliver_next(sender)
+    assert sender.send_email.call_args.args[0] == "first@example.com"
+
+
+def test_worker_pool_drains_outbox(db_session, sender, mocker):
+    """Verify the worker pool delivers queued messages in the background."""
+    mocker.patch("blossomtune_gradio.outbox.mail.get_email_sender", return_value=sender)
+    message_id = _queue(db_session)
+
+    pool = outbox.OutboxWorkerPool(num_workers=1, poll_interval=0.05)
+    pool.start()
+    pool.notify()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if db_session.get(OutboxMessage, message_id).status == "sent":
+                break
+            time.sleep(0.05)
+    finally:
+        pool.stop(timeout=5)
+
+    assert db_session.get(OutboxMessage, message_id).status == "sent"
+    assert not pool.running
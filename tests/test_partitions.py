@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from blossomtune_gradio import partitions
+from blossomtune_gradio.database import Partition, PartitionConflictError, Request
+
+
+def _approve(db_session, participant_id, partition_id):
+    request = Request(
+        participant_id=participant_id,
+        status="approved",
+        is_activated=1,
+        partition_id=partition_id,
+    )
+    db_session.add(request)
+    db_session.commit()
+    return request
+
+
+def _free_list(db_session):
+    return {
+        p.partition_id: p.participant_id
+        for p in db_session.query(Partition).order_by(Partition.partition_id)
+    }
+
+
+def test_approval_claims_partition_and_fills_gaps(db_session):
+    """Verify approving into a high partition records the skipped ones as free."""
+    _approve(db_session, "P1", 3)
+
+    assert _free_list(db_session) == {0: None, 1: None, 2: None, 3: "P1"}
+    assert partitions.next_free(db_session) == 0
+
+
+def test_denial_reclaims_partition(db_session):
+    """Verify a denied participant's partition becomes free again."""
+    _approve(db_session, "P0", 0)
+    request = _approve(db_session, "P1", 1)
+    assert partitions.next_free(db_session) == 2
+
+    request.status = "denied"
+    request.partition_id = None
+    db_session.commit()
+
+    assert _free_list(db_session)[1] is None
+    assert partitions.next_free(db_session) == 1
+
+
+def test_moving_partition_releases_old_one(db_session):
+    """Verify a participant never holds more than one partition."""
+    request = _approve(db_session, "P1", 0)
+    request.partition_id = 2
+    db_session.commit()
+
+    assert _free_list(db_session) == {0: None, 1: None, 2: "P1"}
+
+
+def test_conflicting_approval_is_rejected(db_session):
+    """Verify two approved participants cannot share a partition."""
+    _approve(db_session, "P1", 0)
+    with pytest.raises((PartitionConflictError, IntegrityError)):
+        _approve(db_session, "P2", 0)
+    db_session.rollback()
+    assert not partitions.is_available(db_session, 0, "P2")
+    assert partitions.is_available(db_session, 0, "P1")
+    assert partitions.is_available(db_session, 7, "P2")
+
+
+def test_next_free_many(db_session):
+    """Verify bulk allocation uses free rows first, then extends the list."""
+    _approve(db_session, "P1", 1)
+    _approve(db_session, "P3", 3)
+
+    assert partitions.next_free_many(db_session, 4) == [0, 2, 4, 5]
+    assert partitions.next_free_many(db_session, 0) == []
+
+
+def test_release(db_session):
+    """Verify explicit release returns the partition to the free-list."""
+    _approve(db_session, "P1", 0)
+    partitions.release(db_session, "P1")
+    db_session.commit()
+    assert partitions.next_free(db_session) == 0
@@ -1,81 +1,111 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 from blossomtune_gradio import processing
-from blossomtune_gradio.database import Config
+from blossomtune_gradio.database import FederatedRun
+from blossomtune_gradio.runs import RunScheduler
 
 
 @pytest.fixture(autouse=True)
-def reset_process_store():
+def supervisor(mocker):
     """
     Fixture that runs automatically for every test in this module.
-    It resets the process_store to its default state to ensure test isolation.
+    It replaces the shared supervisor's start/stop and running state, so no
+    process is spawned and tests stay isolated.
     """
-    processing.process_store = {"superlink": None, "runner": None}
-    yield
-    processing.process_store = {"superlink": None, "runner": None}
+    running = set()
+    mocker.patch.object(
+        processing.supervisor, "is_running", side_effect=lambda name: name in running
+    )
+    start = mocker.patch.object(
+        processing.supervisor, "start", AsyncMock(return_value=True)
+    )
+    stop = mocker.patch.object(
+        processing.supervisor, "stop", AsyncMock(return_value=True)
+    )
+    mocker.patch.object(
+        processing.runs,
+        "run_scheduler",
+        RunScheduler(processing.supervisor, max_concurrent=2, launch_interval=0),
+    )
+    yield running, start, stop
+
+
+@pytest.fixture
+def notify(mocker):
+    """Keeps the shared run dispatcher from being woken up."""
+    return mocker.patch.object(processing.runs.dispatcher, "notify")
 
 
-@patch("blossomtune_gradio.processing.threading.Thread")
 @patch(
     "blossomtune_gradio.processing.shutil.which",
     return_value="/fake/path/flower-superlink",
 )
-def test_start_superlink_success(mock_which, mock_thread):
-    """Verify that start_superlink successfully starts a thread."""
-    success, message = processing.start_superlink()
+def test_start_superlink_success(mock_which, supervisor):
+    """Verify that start_superlink hands the command to the supervisor."""
+    _, start, _ = supervisor
+    success, message = asyncio.run(processing.start_superlink())
 
     assert success is True
     assert message == "Superlink process started."
-    mock_thread.assert_called_once()
-    call_args = mock_thread.call_args
-    assert call_args.kwargs["target"] == processing.run_process
-    assert call_args.kwargs["args"][0][0] == "/fake/path/flower-superlink"
-    assert call_args.kwargs["args"][0][1] == "--ssl-ca-certfile"
+    start.assert_awaited_once()
+    name, command = start.call_args.args
+    assert name == "superlink"
+    assert command[0] == "/fake/path/flower-superlink"
+    assert command[1] == "--ssl-ca-certfile"
 
 
-def test_start_superlink_already_running(mocker):
+def test_start_superlink_already_running(supervisor):
     """Verify that start_superlink returns False if a process is already running."""
-    mock_process = MagicMock()
-    mock_process.poll.return_value = None
-    processing.process_store["superlink"] = mock_process
+    running, start, _ = supervisor
+    running.add("superlink")
 
-    success, message = processing.start_superlink()
+    success, message = asyncio.run(processing.start_superlink())
     assert success is False
     assert "already running" in message
+    start.assert_not_awaited()
+
+
+@patch("blossomtune_gradio.processing.shutil.which", return_value=None)
+def test_start_superlink_spawn_failure(mock_which, supervisor):
+    """Verify that start_superlink reports a command that could not be spawned."""
+    _, start, _ = supervisor
+    start.return_value = False
+
+    success, message = asyncio.run(processing.start_superlink())
+    assert success is False
+    assert "failed to start" in message
 
 
 @patch("blossomtune_gradio.processing.os.path.exists", return_value=True)
-@patch("blossomtune_gradio.processing.threading.Thread")
-@patch("blossomtune_gradio.processing.shutil.which", return_value="/fake/path/flwr")
-def test_start_runner_success_internal_superlink(
-    mock_which, mock_thread, mock_exists, db_session
-):
-    """Verify start_runner succeeds with an internal superlink and updates the DB."""
+def test_start_runner_queues_the_run(mock_exists, db_session, supervisor, notify):
+    """Verify start_runner records the run in the queue and wakes the dispatcher."""
     # Arrange: Mock a running internal superlink process
-    mock_superlink = MagicMock()
-    mock_superlink.poll.return_value = None
-    processing.process_store["superlink"] = mock_superlink
+    running, start, _ = supervisor
+    running.add("superlink")
 
     # Act
-    success, message = processing.start_runner("app.main", "run1", "15")
+    success, message = asyncio.run(processing.start_runner("app.main", "run1", "15", 3))
 
     # Assert
     assert success is True
     assert message == "Federation Run is starting...."
-    mock_thread.assert_called_once()
-
-    # Verify DB was updated using SQLAlchemy
-    config_entry = db_session.query(Config).filter_by(key="num_partitions").first()
-    assert config_entry is not None
-    assert config_entry.value == "15"
+    notify.assert_called_once()
+    start.assert_not_awaited()  # The dispatcher launches it.
+
+    run = db_session.query(FederatedRun).filter_by(run_id="run1").one()
+    assert (run.app, run.num_partitions, run.priority, run.status) == (
+        "app.main",
+        15,
+        3,
+        "queued",
+    )
 
 
 @patch("blossomtune_gradio.processing.os.path.exists", return_value=True)
-@patch("blossomtune_gradio.processing.threading.Thread")
-@patch("blossomtune_gradio.processing.shutil.which", return_value="/fake/path/flwr")
 def test_start_runner_success_external_superlink(
-    mock_which, mock_thread, mock_exists, db_session, mocker
+    mock_exists, db_session, mocker, notify
 ):
     """Verify start_runner succeeds with an external superlink."""
     # Arrange
@@ -83,65 +113,91 @@ def test_start_runner_success_external_superlink(
     mocker.patch("blossomtune_gradio.util.is_port_open", return_value=True)
 
     # Act
-    success, message = processing.start_runner("app.main", "run1", "10")
+    success, message = asyncio.run(processing.start_runner("app.main", "run1", "10"))
 
     # Assert
     assert success is True
     assert message == "Federation Run is starting...."
-    mock_thread.assert_called_once()
 
 
 def test_start_runner_internal_superlink_not_running(db_session):
     """Verify start_runner fails if internal superlink is not running."""
-    processing.process_store["superlink"] = None
-    success, message = processing.start_runner("app.main", "run1", "10")
+    success, message = asyncio.run(processing.start_runner("app.main", "run1", "10"))
     assert success is False
     assert "Internal Superlink is not running" in message
 
 
-def test_start_runner_missing_args(db_session):
+def test_start_runner_missing_args(db_session, supervisor):
     """Verify start_runner fails if arguments are missing."""
-    mock_superlink = MagicMock()
-    mock_superlink.poll.return_value = None
-    processing.process_store["superlink"] = mock_superlink
+    running, _, _ = supervisor
+    running.add("superlink")
 
-    success, message = processing.start_runner("", "run1", "10")
+    success, message = asyncio.run(processing.start_runner("", "run1", "10"))
     assert success is False
     assert "provide a Runner App" in message
 
 
 @patch("blossomtune_gradio.processing.os.path.exists", return_value=False)
-def test_start_runner_app_path_not_found(mock_exists, db_session):
+def test_start_runner_app_path_not_found(mock_exists, db_session, supervisor):
     """Verify start_runner fails if the app path doesn't exist."""
-    mock_superlink = MagicMock()
-    mock_superlink.poll.return_value = None
-    processing.process_store["superlink"] = mock_superlink
+    running, _, _ = supervisor
+    running.add("superlink")
 
-    success, message = processing.start_runner("non.existent.app", "run1", "10")
+    success, message = asyncio.run(
+        processing.start_runner("non.existent.app", "run1", "10")
+    )
     assert success is False
     assert "Unable to find app path" in message
 
 
-def test_stop_process_running():
-    """Verify stop_process terminates a running process."""
-    mock_process = MagicMock()
-    mock_process.poll.return_value = None
-    processing.process_store["superlink"] = mock_process
+def test_stop_process(supervisor):
+    """Verify stop_process asks the supervisor to stop the process."""
+    _, _, stop = supervisor
 
-    processing.stop_process("superlink")
+    assert asyncio.run(processing.stop_process("superlink")) is True
+    stop.assert_awaited_once_with("superlink")
 
-    mock_process.terminate.assert_called_once()
-    mock_process.wait.assert_called_once()
-    assert processing.process_store["superlink"] is None
 
+@patch("blossomtune_gradio.processing.os.path.exists", return_value=True)
+def test_start_runner_queues_behind_busy_slots(
+    mock_exists, db_session, supervisor, notify
+):
+    """Verify runs beyond the free slots are queued, and duplicates refused."""
+    running, _, _ = supervisor
+    running.update({"superlink", "runner:a", "runner:b"})
+    for run_id in ("a", "b"):
+        # Fill both slots of the scheduler, as the dispatcher would.
+        asyncio.run(processing.runs.run_scheduler.submit(run_id, "app", ["flwr"]))
+
+    success, message = asyncio.run(processing.start_runner("app.main", "c", "10"))
+    assert success is True
+    assert message == "Run 'c' queued at priority 0; 0 run(s) ahead."
+    success, message = asyncio.run(processing.start_runner("app.main", "d", "10", 5))
+    assert message == "Run 'd' queued at priority 5; 0 run(s) ahead."
+    success, message = asyncio.run(processing.start_runner("app.main", "e", "10"))
+    assert message == "Run 'e' queued at priority 0; 2 run(s) ahead."
 
-def test_stop_process_not_running(mocker):
-    """Verify stop_process does nothing if the process is not running."""
-    log_mock = mocker.patch("blossomtune_gradio.processing.log")
-    processing.process_store["superlink"] = None
+    success, message = asyncio.run(processing.start_runner("app.main", "c", "10"))
+    assert success is False
+    assert "already queued or running" in message
 
-    processing.stop_process("superlink")
 
-    log_mock.assert_any_call(
-        "[Superlink] Stop command received, but no process was running."
-    )
+def test_stop_run(supervisor):
+    """Verify stop_run stops the process of an active run."""
+    running, _, stop = supervisor
+    running.add("runner:run1")
+    asyncio.run(processing.runs.run_scheduler.submit("run1", "app", ["flwr"]))
+
+    assert asyncio.run(processing.stop_run("run1")) is True
+    stop.assert_awaited_once_with("runner:run1")
+
+
+def test_stop_run_cancels_a_queued_run(db_session, supervisor):
+    """Verify stop_run cancels a run that is still queued."""
+    _, _, stop = supervisor
+    processing.runs.enqueue_run("run1", "app.main", 10)
+
+    assert asyncio.run(processing.stop_run("run1")) is True
+    stop.assert_not_awaited()
+    run = db_session.query(FederatedRun).filter_by(run_id="run1").one()
+    assert run.status == "cancelled"
@@ -0,0 +1,166 @@
+import asyncio
+import importlib
+
+import pytest
+
+from blossomtune_gradio import config, ratelimit
+from blossomtune_gradio.ratelimit import (
+    Limit,
+    MemoryBackend,
+    RateLimiter,
+    SQLiteBackend,
+)
+
+
+class FakeClock:
+    """A controllable clock for bucket refill tests."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_factory(request, tmp_path):
+    """Fixture building either backend on a shared fake clock."""
+    clock = FakeClock()
+
+    def build():
+        if request.param == "memory":
+            return MemoryBackend(clock=clock)
+        return SQLiteBackend(str(tmp_path / "ratelimit.db"), clock=clock)
+
+    return build, clock
+
+
+def test_bucket_allows_burst_then_refills(backend_factory):
+    """Verify a bucket grants `burst` tokens, then one per refill period."""
+    build, clock = backend_factory
+    backend = build()
+    limit = Limit(burst=3, refill=10)
+
+    assert [backend.take("k", limit) for _ in range(3)] == [0, 0, 0]
+    assert backend.take("k", limit) == pytest.approx(10)
+
+    clock.now += 4
+    assert backend.take("k", limit) == pytest.approx(6)
+    clock.now += 6
+    assert backend.take("k", limit) == 0
+    assert backend.take("other", limit) == 0
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    """Verify two processes using the same file drain the same bucket."""
+    clock = FakeClock()
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteBackend(path, clock=clock), SQLiteBackend(path, clock=clock)
+    limit = Limit(burst=2, refill=60)
+
+    assert first.take("k", limit) == 0
+    assert second.take("k", limit) == 0
+    assert first.take("k", limit) > 0
+
+
+def test_sqlite_prunes_refilled_buckets(tmp_path):
+    """Verify rows of buckets that are full again are deleted."""
+    clock = FakeClock()
+    backend = SQLiteBackend(str(tmp_path / "ratelimit.db"), clock=clock, prune_every=2)
+    limit = Limit(burst=2, refill=10)
+    backend.take("old", limit)
+    clock.now += 100
+    backend.take("new", limit)
+
+    with backend.engine.connect() as conn:
+        keys = [row.key for row in conn.execute(ratelimit.buckets.select())]
+    assert keys == ["new"]
+
+
+def test_memory_backend_is_bounded():
+    """Verify the least recently used buckets are evicted."""
+    backend = MemoryBackend(maxsize=2)
+    for key in ("a", "b", "c"):
+        backend.take(key, Limit(1, 60))
+    assert list(backend._buckets) == ["b", "c"]
+
+
+def test_limiter_rejects_on_any_dimension_and_counts():
+    """Verify the first exhausted bucket rejects and is counted."""
+    limiter = RateLimiter(
+        MemoryBackend(clock=FakeClock()),
+        {"ip": Limit(10, 60), "hf_handle": Limit(1, 60), "email": Limit(1, 60)},
+    )
+
+    assert limiter.check(ip="1.2.3.4", hf_handle="Alice", email="a@x.org") == 0
+    # Handles are case-insensitive; the email is not even checked.
+    assert limiter.check(ip="1.2.3.4", hf_handle="alice", email="b@x.org") > 0
+    assert limiter.check(ip="1.2.3.4", hf_handle="bob", email="b@x.org") == 0
+    # Empty keys are not throttled.
+    assert limiter.check(ip="", hf_handle="carol", email="") == 0
+
+    assert limiter.stats == {
+        "allowed": 3,
+        "rejected": 1,
+        "rejected_ip": 0,
+        "rejected_hf_handle": 1,
+        "rejected_email": 0,
+        "errors": 0,
+    }
+
+
+def test_limiter_fails_open_on_backend_error(mocker):
+    """Verify a broken backend lets requests through and is counted."""
+    backend = mocker.Mock(blocking=False)
+    backend.take.side_effect = RuntimeError("disk I/O error")
+    limiter = RateLimiter(backend, {"ip": Limit(1, 60)})
+
+    assert limiter.check(ip="1.2.3.4") == 0
+    assert limiter.stats["errors"] == 1
+
+
+def test_check_async_runs_blocking_backends_in_thread(tmp_path):
+    """Verify the async check works with the SQLite backend."""
+    limiter = RateLimiter(
+        SQLiteBackend(str(tmp_path / "ratelimit.db")), {"ip": Limit(1, 60)}
+    )
+    assert asyncio.run(limiter.check_async(ip="1.2.3.4")) == 0
+    assert asyncio.run(limiter.check_async(ip="1.2.3.4")) > 0
+
+
+def test_client_ip_prefers_proxy_entry(mocker):
+    """Verify the last X-Forwarded-For entry is used only when trusted."""
+    headers = {"x-forwarded-for": "6.6.6.6, 10.0.0.1"}
+    mocker.patch("blossomtune_gradio.config.RATE_LIMIT_TRUST_FORWARDED", True)
+    assert ratelimit.client_ip(headers, "127.0.0.1") == "10.0.0.1"
+    assert ratelimit.client_ip({}, "127.0.0.1") == "127.0.0.1"
+    mocker.patch("blossomtune_gradio.config.RATE_LIMIT_TRUST_FORWARDED", False)
+    assert ratelimit.client_ip(headers, "127.0.0.1") == "127.0.0.1"
+
+
+def test_forwarded_header_untrusted_outside_spaces(monkeypatch):
+    """Verify X-Forwarded-For is only trusted by default when on Spaces."""
+    monkeypatch.delenv("RATE_LIMIT_TRUST_FORWARDED", raising=False)
+    try:
+        monkeypatch.delenv("SPACE_ID", raising=False)
+        importlib.reload(config)
+        assert config.RATE_LIMIT_TRUST_FORWARDED is False
+        headers = {"x-forwarded-for": "6.6.6.6"}
+        assert ratelimit.client_ip(headers, "127.0.0.1") == "127.0.0.1"
+
+        monkeypatch.setenv("SPACE_ID", "ethicalabs/BlossomTune-Orchestrator")
+        importlib.reload(config)
+        assert config.RATE_LIMIT_TRUST_FORWARDED is True
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+def test_create_rate_limiter_follows_configuration(mocker):
+    """Verify the limiter can be disabled and rejects unknown backends."""
+    mocker.patch("blossomtune_gradio.config.RATE_LIMIT_ENABLED", False)
+    assert ratelimit.create_rate_limiter() is None
+    mocker.patch("blossomtune_gradio.config.RATE_LIMIT_ENABLED", True)
+    mocker.patch("blossomtune_gradio.config.RATE_LIMIT_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        ratelimit.create_rate_limiter()
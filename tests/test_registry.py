@@ -0,0 +1,165 @@
+import asyncio
+
+from sqlalchemy import update
+
+from blossomtune_gradio import federation as fed
+from blossomtune_gradio import resolver
+from blossomtune_gradio.database import (
+    FEDERATION_REVISION_KEY,
+    Request,
+    increment_counter,
+)
+from blossomtune_gradio.registry import ParticipantRegistry, participant_registry
+
+
+class FakeClock:
+    """A controllable clock for refresh interval tests."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _add(db_session, participant_id, **kwargs):
+    values = {
+        "hf_handle": f"user-{participant_id}",
+        "email": f"{participant_id.lower()}@example.com",
+        "activation_code": "CODE",
+        **kwargs,
+    }
+    db_session.add(Request(participant_id=participant_id, **values))
+    db_session.commit()
+
+
+def test_indexes_after_load(db_session):
+    """Verify lookups by ID, handle/email, status and partition."""
+    _add(db_session, "P1")
+    _add(db_session, "P2", status="approved", is_activated=1, partition_id=0)
+    _add(db_session, "P3", status="approved", is_activated=1, partition_id=2)
+    registry = ParticipantRegistry()
+
+    assert registry.get("P1").status == "pending"
+    assert registry.find("user-P2", "p2@example.com").participant_id == "P2"
+    assert registry.find("user-P2", "p2@example.com", "WRONG") is None
+    assert registry.count("approved") == 2
+    assert registry.count("denied") == 0
+    assert registry.holder(2).participant_id == "P3"
+    assert registry.holder(1) is None
+    assert registry.next_free_partition() == 1
+    assert registry.stats == {"participants": 3, "reloads": 1, "applied": 0}
+
+
+def test_orm_writes_are_applied_without_reload(db_session):
+    """Verify committed ORM writes update the registry in place."""
+    participant_registry.refresh()
+    reloads = participant_registry.reloads
+
+    _add(db_session, "P1", is_activated=1)
+    assert participant_registry.count("pending") == 1
+
+    request = db_session.get(Request, "P1")
+    request.status = "approved"
+    request.partition_id = 0
+    db_session.commit()
+    assert participant_registry.count("pending") == 0
+    assert participant_registry.holder(0).participant_id == "P1"
+
+    db_session.delete(request)
+    db_session.commit()
+    assert participant_registry.get("P1") is None
+    assert participant_registry.next_free_partition() == 0
+    assert participant_registry.reloads == reloads
+
+
+def test_rolled_back_writes_are_discarded(db_session):
+    """Verify a rolled back write never reaches the registry."""
+    participant_registry.refresh()
+    db_session.add(Request(participant_id="P1", hf_handle="h", email="e"))
+    db_session.flush()
+    db_session.rollback()
+
+    assert participant_registry.get("P1") is None
+    assert participant_registry.count("pending") == 0
+
+
+def test_outside_writes_are_picked_up_after_interval(db_session):
+    """Verify writes that bypass the session hooks are seen on the next check."""
+    _add(db_session, "P1")
+    clock = FakeClock()
+    registry = ParticipantRegistry(refresh_interval=5, clock=clock)
+    assert registry.count("denied") == 0
+
+    # A Core UPDATE, as made by another process, with a revision bump.
+    connection = db_session.connection()
+    connection.execute(
+        update(Request).where(Request.participant_id == "P1").values(status="denied")
+    )
+    increment_counter(connection, FEDERATION_REVISION_KEY)
+    db_session.commit()
+
+    assert registry.count("denied") == 0
+    clock.now += 5
+    assert registry.count("denied") == 1
+    assert registry.reloads == 2
+
+
+def test_out_of_order_commits_are_applied_in_revision_order(db_session):
+    """Verify changes wait for earlier revisions, and gaps close on reload."""
+    _add(db_session, "P1")
+    clock = FakeClock()
+    registry = ParticipantRegistry(refresh_interval=5, clock=clock)
+    registry.refresh()
+    revision = fed.get_federation_revision()
+    p1 = registry.get("P1")
+
+    registry.apply({"P1": p1._replace(status="denied")}, revision + 2, flushes=1)
+    assert registry.get("P1").status == "pending"
+    registry.apply({"P1": p1._replace(is_activated=1)}, revision + 1, flushes=1)
+    assert registry.get("P1") == p1._replace(status="denied")
+    assert registry.applied == 2
+
+    # A revision written elsewhere is never applied here: the held back
+    # change is dropped by the reload that picks that write up.
+    registry.apply({"P2": p1}, revision + 4, flushes=1)
+    assert registry.get("P2") is None
+    connection = db_session.connection()
+    for _ in range(4):
+        increment_counter(connection, FEDERATION_REVISION_KEY)
+    db_session.commit()
+    clock.now += 5
+    assert registry.get("P1").status == "pending"
+    assert registry.get("P2") is None
+
+
+def test_federation_reads_use_registry(db_session, mock_settings, mocker):
+    """Verify a status check of an approved participant does not query the table."""
+    _add(db_session, "P1", status="approved", is_activated=1, partition_id=0)
+    participant_registry.refresh()
+    mocker.patch(
+        "blossomtune_gradio.federation.SessionLocal", side_effect=AssertionError
+    )
+
+    approved, message, _ = fed.check_participant_status(
+        "user-P1", "p1@example.com", "CODE"
+    )
+
+    assert "An error occurred" in message  # No keys on disk for P1.
+    assert fed.get_next_partion_id() == 1
+
+
+def test_async_registration_is_applied(async_db, mock_settings, mx_resolver):
+    """Verify writes from async sessions reach the registry too."""
+    mx_resolver.backend = resolver.StubResolver({"ethicalabs.ai": 300})
+    participant_registry.refresh()
+    reloads = participant_registry.reloads
+
+    asyncio.run(
+        fed.check_participant_status_async("new_user", "hello@ethicalabs.ai", "")
+    )
+
+    participant = participant_registry.find("new_user", "hello@ethicalabs.ai")
+    assert participant is not None
+    assert participant.is_activated == 0
+    assert participant_registry.reloads == reloads
@@ -0,0 +1,113 @@
+import asyncio
+
+import dns.resolver
+import pytest
+
+from blossomtune_gradio.resolver import CachingResolver, StubResolver
+from blossomtune_gradio.util import validate_email, validate_email_async
+
+
+class FakeClock:
+    """A manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def stub():
+    return StubResolver({"example.com": 300, "short.org": 5})
+
+
+def test_positive_answer_is_cached(stub, clock):
+    """Verify repeated lookups are served from the cache."""
+    resolver = CachingResolver(stub, clock=clock)
+    assert resolver.has_mx("example.com") is True
+    assert resolver.has_mx("EXAMPLE.com") is True
+    assert stub.calls == 1
+    assert resolver.stats == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_positive_answer_honors_record_ttl(stub, clock):
+    """Verify entries expire after the record TTL."""
+    resolver = CachingResolver(stub, clock=clock)
+    resolver.has_mx("short.org")
+    clock.now += 4
+    resolver.has_mx("short.org")
+    assert stub.calls == 1
+    clock.now += 2
+    resolver.has_mx("short.org")
+    assert stub.calls == 2
+
+
+def test_ttl_is_capped(stub, clock):
+    """Verify record TTLs longer than max_ttl are capped."""
+    resolver = CachingResolver(stub, max_ttl=10, clock=clock)
+    resolver.has_mx("example.com")
+    clock.now += 11
+    resolver.has_mx("example.com")
+    assert stub.calls == 2
+
+
+def test_negative_answer_is_cached_briefly(stub, clock):
+    """Verify NXDOMAIN answers are cached for negative_ttl."""
+    resolver = CachingResolver(stub, negative_ttl=30, clock=clock)
+    assert resolver.has_mx("missing.net") is False
+    clock.now += 29
+    assert resolver.has_mx("missing.net") is False
+    assert stub.calls == 1
+    clock.now += 2
+    resolver.has_mx("missing.net")
+    assert stub.calls == 2
+
+
+def test_resolver_errors_are_not_cached(mocker, clock):
+    """Verify transient resolver failures are not cached."""
+    backend = mocker.MagicMock()
+    backend.resolve.side_effect = dns.resolver.LifetimeTimeout()
+    resolver = CachingResolver(backend, clock=clock)
+    assert resolver.has_mx("example.com") is False
+    assert resolver.has_mx("example.com") is False
+    assert backend.resolve.call_count == 2
+
+
+def test_lru_eviction(clock):
+    """Verify the least recently used entry is evicted when full."""
+    stub = StubResolver({"a.com": 300, "b.com": 300, "c.com": 300})
+    resolver = CachingResolver(stub, maxsize=2, clock=clock)
+    resolver.has_mx("a.com")
+    resolver.has_mx("b.com")
+    resolver.has_mx("a.com")  # a.com is now the most recently used
+    resolver.has_mx("c.com")  # evicts b.com
+    assert resolver.stats["size"] == 2
+    resolver.has_mx("a.com")
+    assert stub.calls == 3
+    resolver.has_mx("b.com")
+    assert stub.calls == 4
+
+
+def test_async_lookup_shares_cache(stub, clock):
+    """Verify the async variant uses and fills the same cache."""
+    resolver = CachingResolver(stub, clock=clock)
+    assert asyncio.run(resolver.has_mx_async("example.com")) is True
+    assert resolver.has_mx("example.com") is True
+    assert asyncio.run(resolver.has_mx_async("missing.net")) is False
+    assert stub.calls == 2
+
+
+def test_validate_email_uses_given_resolver(stub):
+    """Verify validate_email and its async variant accept a resolver."""
+    resolver = CachingResolver(stub)
+    assert validate_email("user@example.com", resolver) is True
+    assert validate_email("user@missing.net", resolver) is False
+    assert asyncio.run(validate_email_async("user@example.com", resolver)) is True
+    assert asyncio.run(validate_email_async("not-an-email", resolver)) is False
+    assert stub.calls == 2
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+from blossomtune_gradio import federation as fed
+from blossomtune_gradio import retention
+from blossomtune_gradio.database import Request, RequestArchive
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _add(db_session, participant_id, status="pending", activated=0, age_days=0):
+    db_session.add(
+        Request(
+            participant_id=participant_id,
+            status=status,
+            is_activated=activated,
+            hf_handle=f"user-{participant_id}",
+            email=f"{participant_id.lower()}@example.com",
+            activation_code="CODE",
+            timestamp=NOW - timedelta(days=age_days),
+        )
+    )
+    db_session.commit()
+
+
+def _ids(db_session, model):
+    return {row.participant_id for row in db_session.query(model)}
+
+
+def test_policies_follow_configuration(mocker):
+    """Verify a policy with a zero age is disabled."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_UNACTIVATED_DAYS", 7)
+    mocker.patch("blossomtune_gradio.config.RETENTION_DENIED_DAYS", 0)
+    mocker.patch("blossomtune_gradio.config.RETENTION_ABANDONED_DAYS", 90)
+
+    assert [p.name for p in retention.policies()] == ["unactivated", "abandoned"]
+
+
+def test_run_retention_archives_stale_requests(db_session, mocker):
+    """Verify only requests matching a policy and past its age are moved."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_UNACTIVATED_DAYS", 7)
+    mocker.patch("blossomtune_gradio.config.RETENTION_DENIED_DAYS", 30)
+    mocker.patch("blossomtune_gradio.config.RETENTION_ABANDONED_DAYS", 0)
+    _add(db_session, "OLDPENDING", age_days=8)
+    _add(db_session, "NEWPENDING", age_days=1)
+    _add(db_session, "OLDDENIED", status="denied", activated=1, age_days=31)
+    _add(db_session, "NEWDENIED", status="denied", activated=1, age_days=10)
+    _add(db_session, "OLDACTIVE", activated=1, age_days=365)
+    _add(db_session, "APPROVED", status="approved", activated=1, age_days=365)
+
+    archived = retention.run_retention(now=NOW)
+
+    assert archived == {"unactivated": 1, "denied": 1}
+    assert _ids(db_session, Request) == {
+        "NEWPENDING",
+        "NEWDENIED",
+        "OLDACTIVE",
+        "APPROVED",
+    }
+    rows = {r.participant_id: r for r in db_session.query(RequestArchive)}
+    assert set(rows) == {"OLDPENDING", "OLDDENIED"}
+    assert rows["OLDDENIED"].archive_reason == "denied"
+    assert rows["OLDDENIED"].hf_handle == "user-OLDDENIED"
+    assert rows["OLDPENDING"].archived_at == NOW
+
+
+def test_run_retention_moves_in_batches(db_session, mocker):
+    """Verify every stale request is moved when there are more than a batch."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_ABANDONED_DAYS", 0)
+    for i in range(5):
+        _add(db_session, f"P{i}", age_days=30)
+    archive_batch = mocker.spy(retention, "archive_batch")
+
+    archived = retention.run_retention(now=NOW, batch_size=2)
+
+    assert archived["unactivated"] == 5
+    assert db_session.query(Request).count() == 0
+    # Batches of 2, 2 and 1, each in its own transaction.
+    assert archive_batch.spy_return_list[:3] == [2, 2, 1]
+
+
+def test_archiving_bumps_federation_revision(db_session, mocker):
+    """Verify the admin tables see that rows were archived."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_UNACTIVATED_DAYS", 7)
+    _add(db_session, "STALE", age_days=8)
+    before = fed.get_federation_revision()
+
+    retention.run_retention(now=NOW)
+
+    assert fed.get_federation_revision() > before
+
+
+def test_restore_moves_request_back(db_session, mocker):
+    """Verify a restored request is back in the requests table, unchanged."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_DENIED_DAYS", 30)
+    _add(db_session, "DENIED", status="denied", activated=1, age_days=31)
+    retention.run_retention(now=NOW)
+    before = fed.get_federation_revision()
+
+    assert retention.restore(["DENIED", "UNKNOWN"]) == ["DENIED"]
+
+    db_session.expire_all()
+    request = db_session.get(Request, "DENIED")
+    assert request.status == "denied"
+    assert request.timestamp == NOW - timedelta(days=31)
+    assert db_session.query(RequestArchive).count() == 0
+    assert fed.get_federation_revision() > before
+
+
+def test_restore_skips_participants_who_registered_again(db_session, mocker):
+    """Verify a restore never duplicates a participant's handle and email."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_UNACTIVATED_DAYS", 7)
+    _add(db_session, "OLD", age_days=8)
+    retention.run_retention(now=NOW)
+    db_session.add(
+        Request(
+            participant_id="NEW",
+            hf_handle="user-OLD",
+            email="old@example.com",
+            timestamp=NOW,
+        )
+    )
+    db_session.commit()
+
+    assert retention.restore(["OLD"]) == []
+    assert _ids(db_session, RequestArchive) == {"OLD"}
+
+
+def test_move_without_delete_returning(db_session, mocker):
+    """Verify the insert-select fallback for dialects without RETURNING."""
+    mocker.patch("blossomtune_gradio.config.RETENTION_DENIED_DAYS", 30)
+    mocker.patch.object(db_session.get_bind().dialect, "delete_returning", False)
+    _add(db_session, "DENIED", status="denied", activated=1, age_days=31)
+
+    assert retention.run_retention(now=NOW)["denied"] == 1
+    assert retention.restore(["DENIED"]) == ["DENIED"]
+    assert _ids(db_session, Request) == {"DENIED"}
+
+
+def test_worker_disabled_without_interval():
+    """Verify a zero interval leaves the worker stopped."""
+    worker = retention.RetentionWorker(interval=0)
+    worker.start()
+    assert not worker.running
@@ -0,0 +1,70 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from blossomtune_gradio import config as cfg
+from blossomtune_gradio import federation as fed
+from blossomtune_gradio.blossomfile import BlossomfileCache
+from blossomtune_gradio.database import Request
+from blossomtune_gradio.routes import routes
+
+
+@pytest.fixture
+def client(db_session, mocker, tmp_path):
+    """A client for the extra routes, with an approved participant's files."""
+    keys_dir = tmp_path / "keys"
+    keys_dir.mkdir()
+    (keys_dir / "PID456.key").write_text("---BEGIN EC PRIVATE KEY---")
+    (keys_dir / "PID456.pub").write_text("ecdsa-sha2-nistp384 AAAA PID456")
+    ca_cert = tmp_path / "ca.crt"
+    ca_cert.write_text("---BEGIN CERTIFICATE---")
+    mocker.patch.object(cfg, "AUTH_KEYS_DIR", str(keys_dir))
+    mocker.patch.object(cfg, "BLOSSOMTUNE_TLS_CA_CERTFILE", str(ca_cert))
+    mocker.patch.object(
+        fed, "blossomfile_cache", BlossomfileCache(str(tmp_path / "cache"))
+    )
+    db_session.add_all(
+        [
+            Request(
+                participant_id="PID456",
+                status="approved",
+                hf_handle="approved_user",
+                email="approved@example.com",
+                activation_code="GHIJKL",
+                is_activated=1,
+                partition_id=5,
+            ),
+            Request(participant_id="PEND1", status="pending", is_activated=1),
+        ]
+    )
+    db_session.commit()
+    return TestClient(Starlette(routes=routes))
+
+
+def test_approved_participant_downloads_their_blossomfile(client, mock_settings):
+    """Verify the status link serves the archive from memory with an ETag."""
+    approved, _, link = fed.check_participant_status(
+        "approved_user", "approved@example.com", "GHIJKL"
+    )
+    assert approved is True
+
+    response = client.get(f"/{link}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert response.headers["content-length"] == str(len(response.content))
+    assert "PID456-blossomfile.zip" in response.headers["content-disposition"]
+
+    etag = response.headers["etag"]
+    cached = client.get(f"/{link}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+
+def test_download_requires_a_valid_link_for_an_approved_participant(client):
+    """Verify forged links and participants that are not approved get nothing."""
+    link = fed.download_url("PID456")
+    forged = link.replace("blossomfile/PID456", "blossomfile/PEND1")
+    assert client.get(f"/{forged}").status_code == 403
+    assert client.get("/blossomfile/PID456").status_code == 403
+    assert client.get(f"/{fed.download_url('PEND1')}").status_code == 404
@@ -0,0 +1,296 @@
+import sys
+import asyncio
+
+import pytest
+
+from blossomtune_gradio import runs
+from blossomtune_gradio.config_store import config_store
+from blossomtune_gradio.database import FederatedRun
+from blossomtune_gradio.logs import Log
+from blossomtune_gradio.runs import RunScheduler, process_name
+from blossomtune_gradio.supervisor import ProcessSupervisor
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+# Prints a line, then keeps running until stopped.
+WAIT = "print('started', flush=True); import time; time.sleep(30)"
+
+
+@pytest.fixture
+def supervisor():
+    sup = ProcessSupervisor(sink=lambda name, line, level: None, stop_timeout=5)
+    yield sup
+    sup.close(timeout=10)
+
+
+@pytest.fixture
+def scheduler(supervisor):
+    return RunScheduler(
+        supervisor, max_concurrent=2, launch_interval=0, log=Log(), history=1
+    )
+
+
+async def wait_until_ended(scheduler: RunScheduler, run_id: str, timeout=10):
+    async with asyncio.timeout(timeout):
+        while scheduler.status(run_id).running:
+            await asyncio.sleep(0.01)
+
+
+def test_runs_have_their_own_log_and_status(scheduler):
+    async def scenario():
+        assert await scheduler.submit("a", "app.one", python("print('from a')"))
+        assert await scheduler.submit("b", "app.two", python("print('from b')"))
+        await wait_until_ended(scheduler, "a")
+        await wait_until_ended(scheduler, "b")
+
+    asyncio.run(scenario())
+
+    assert "from a" in scheduler.logs("a")
+    assert "from b" not in scheduler.logs("a")
+    assert "from b" in scheduler.logs("b")
+    status = scheduler.status("a")
+    assert (status.app, status.state, status.returncode) == ("app.one", "exited", 0)
+    assert [status.run_id for status in scheduler.runs()] == ["b", "a"]
+
+
+def test_admission_control_caps_concurrent_runs(scheduler):
+    async def scenario():
+        assert (await scheduler.submit("a", "app", python(WAIT)))[0]
+        assert (await scheduler.submit("b", "app", python(WAIT)))[0]
+
+        success, message = await scheduler.submit("c", "app", python(WAIT))
+        assert success is False
+        assert "slots are busy" in message
+        success, message = await scheduler.submit("a", "app", python(WAIT))
+        assert success is False
+        assert "already running" in message
+        assert scheduler.active() == ["a", "b"]
+
+        # Stopping a run frees its slot.
+        assert await scheduler.stop("a")
+        assert scheduler.admission_error("c") is None
+        assert (await scheduler.submit("c", "app", python(WAIT)))[0]
+        await scheduler.stop_all()
+
+    asyncio.run(scenario())
+    assert scheduler.active() == []
+    assert scheduler.status("a").state == "stopped"
+    assert scheduler.stats["launched"] == 3
+    assert scheduler.stats["rejected"] == 2
+
+
+def test_launches_are_spaced_by_the_interval(supervisor):
+    scheduler = RunScheduler(
+        supervisor, max_concurrent=3, launch_interval=0.3, log=Log()
+    )
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(
+            *(
+                scheduler.submit(run_id, "app", python("pass"))
+                for run_id in ("a", "b", "c")
+            )
+        )
+        return loop.time() - start
+
+    # Three launches need two intervals; all three slots are held meanwhile.
+    assert asyncio.run(scenario()) >= 0.55
+    started = sorted(status.started_at for status in scheduler.runs())
+    assert started[2] - started[0] >= 0.55
+
+
+def test_finished_runs_beyond_history_are_forgotten(scheduler, supervisor):
+    async def scenario():
+        for run_id in ("a", "b", "c"):
+            await scheduler.submit(run_id, "app", python("pass"))
+            await wait_until_ended(scheduler, run_id)
+
+    asyncio.run(scenario())
+
+    # Admitting "c" dropped "a", the oldest of the two finished runs.
+    assert scheduler.status("a") is None
+    assert scheduler.logs("a") is None
+    assert scheduler.log.sources() == ["runner:b", "runner:c"]
+    assert supervisor.info(process_name("a")) is None
+    assert [status.run_id for status in scheduler.runs()] == ["c", "b"]
+
+
+def test_failed_spawn_releases_the_slot(scheduler):
+    success, message = asyncio.run(
+        scheduler.submit("a", "app", ["/nonexistent/flwr", "run"])
+    )
+    assert success is False
+    assert "failed to start" in message
+    assert scheduler.status("a").state == "failed"
+    assert scheduler.active() == []
+
+
+# Persistent queue and dispatcher
+
+
+@pytest.fixture
+def dispatcher(scheduler, db_session, mocker):
+    """A dispatcher launching Python one-liners instead of `flwr run`."""
+    mocker.patch("blossomtune_gradio.runs.superlink_error", return_value=None)
+    mocker.patch(
+        "blossomtune_gradio.runs.runner_command",
+        side_effect=lambda app: python(f"print({app!r})"),
+    )
+    return runs.RunDispatcher(scheduler, poll_interval=0.05)
+
+
+def test_queued_runs_are_claimed_by_priority_then_age(db_session):
+    for run_id, priority in (("low", 0), ("high", 5), ("low2", 0), ("high2", 5)):
+        runs.enqueue_run(run_id, "app", 10, priority)
+
+    claimed = [runs._claim_next().run_id for _ in range(4)]
+    assert claimed == ["high", "high2", "low", "low2"]
+    assert runs._claim_next() is None
+    assert db_session.query(FederatedRun).filter_by(status="running").count() == 4
+
+
+def test_interrupted_runs_fail_and_queued_runs_survive_a_restart(db_session):
+    runs.enqueue_run("interrupted", "app", 10)
+    runs.enqueue_run("waiting", "app", 10)
+    runs._claim_next()
+
+    assert runs.interrupt_in_flight() == 1
+
+    db_session.expire_all()
+    statuses = dict(db_session.query(FederatedRun.run_id, FederatedRun.status).all())
+    assert statuses == {"interrupted": "failed", "waiting": "queued"}
+
+
+def test_dispatcher_launches_queued_runs_and_records_results(
+    dispatcher, scheduler, db_session
+):
+    for run_id in ("a", "b", "c"):
+        runs.enqueue_run(run_id, f"app.{run_id}", 10)
+
+    # Two slots: "c" waits for one of the first two to end.
+    assert dispatcher.dispatch() == 2
+    assert scheduler.active() == ["a", "b"]
+
+    async def drain():
+        async with asyncio.timeout(10):
+            while True:
+                dispatcher.dispatch()
+                statuses = {run.status for run in db_session.query(FederatedRun).all()}
+                if statuses == {"succeeded"}:
+                    return
+                db_session.expire_all()
+                await asyncio.sleep(0.02)
+
+    asyncio.run(drain())
+
+    run = db_session.query(FederatedRun).filter_by(run_id="c").one()
+    assert run.exit_code == 0
+    assert run.started_at <= run.finished_at
+    assert run.duration >= 0
+    assert "app.c" in scheduler.logs("c")
+    assert config_store.get("runner_app") == "app.c"
+
+
+def test_dispatcher_records_failed_and_cancelled_runs(
+    dispatcher, scheduler, db_session, mocker
+):
+    mocker.patch(
+        "blossomtune_gradio.runs.runner_command",
+        side_effect=lambda app: {
+            "app.exit": python("import sys; sys.exit(2)"),
+            "app.stop": python(WAIT),
+            "app.missing": ["/nonexistent/flwr"],
+        }[app],
+    )
+    for name in ("exit", "stop", "missing"):
+        runs.enqueue_run(name, f"app.{name}", 10)
+    scheduler.max_concurrent = 3
+
+    dispatcher.dispatch()
+    asyncio.run(scheduler.stop("stop"))
+
+    async def drain():
+        async with asyncio.timeout(10):
+            while scheduler.active():
+                await asyncio.sleep(0.02)
+
+    asyncio.run(drain())
+    dispatcher.dispatch()
+
+    db_session.expire_all()
+    results = {
+        run.run_id: (run.status, run.exit_code)
+        for run in db_session.query(FederatedRun).all()
+    }
+    assert results == {
+        "exit": ("failed", 2),
+        "stop": ("cancelled", -15),
+        "missing": ("failed", None),
+    }
+
+
+def test_dispatcher_waits_for_the_superlink(dispatcher, mocker):
+    probe = mocker.patch(
+        "blossomtune_gradio.runs.superlink_error", return_value="Superlink is down."
+    )
+    # Nothing queued: the Superlink is not probed at all.
+    assert dispatcher.dispatch() == 0
+    probe.assert_not_called()
+
+    runs.enqueue_run("a", "app", 10)
+    assert dispatcher.dispatch() == 0
+    assert runs.queue_position(1) == 0
+    run = runs.find_active_run("a")
+    assert (run.status, run.error) == ("queued", "Superlink is down.")
+
+    # The reason is cleared once the run is launched.
+    probe.return_value = None
+    assert dispatcher.dispatch() == 1
+    assert runs.find_active_run("a").error is None
+
+
+def test_dispatcher_thread_is_woken_by_notify(dispatcher, scheduler, db_session):
+    dispatcher.poll_interval = 60
+    dispatcher.start()
+    try:
+        runs.enqueue_run("a", "app.a", 10)
+        dispatcher.notify()
+
+        async def wait_for_success():
+            async with asyncio.timeout(10):
+                while runs.find_active_run("a") is not None:
+                    await asyncio.sleep(0.02)
+
+        asyncio.run(wait_for_success())
+    finally:
+        dispatcher.stop(timeout=5)
+    assert not dispatcher.running
+    assert db_session.query(FederatedRun).one().status == "succeeded"
+
+
+def test_app_history_covers_flower_apps(db_session, mocker):
+    mocker.patch.object(runs.cfg, "FLOWER_APPS", ["app.one", "app.idle"])
+    for run_id, status, duration in (
+        ("r1", "succeeded", 10.0),
+        ("r2", "failed", 20.0),
+        ("r3", "queued", None),
+    ):
+        db_session.add(
+            FederatedRun(
+                run_id=run_id,
+                app="app.one",
+                num_partitions=10,
+                status=status,
+                duration=duration,
+            )
+        )
+    db_session.commit()
+
+    history = {entry.app: entry for entry in runs.app_history()}
+    assert history["app.one"][:5] == ("app.one", 2, 1, 1, 15.0)
+    assert history["app.idle"][:4] == ("app.idle", 0, 0, 0)
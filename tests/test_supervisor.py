@@ -0,0 +1,157 @@
+import sys
+import asyncio
+import threading
+
+import pytest
+
+from blossomtune_gradio.supervisor import ProcessSupervisor
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+@pytest.fixture
+def lines():
+    return []
+
+
+@pytest.fixture
+def supervisor(lines):
+    """A supervisor collecting every line it emits, closed after the test."""
+    sup = ProcessSupervisor(
+        sink=lambda name, line, level: lines.append((name, line)), stop_timeout=5
+    )
+    yield sup
+    sup.close(timeout=10)
+
+
+async def wait_until_ended(sup: ProcessSupervisor, name: str, timeout: float = 10):
+    async with asyncio.timeout(timeout):
+        while (await sup.status(name)).running:
+            await asyncio.sleep(0.01)
+
+
+def test_start_reads_output_and_records_exit(supervisor, lines):
+    async def scenario():
+        started = await supervisor.start(
+            "tool", python("print('hello'); print('world', end='')")
+        )
+        assert started is True
+        await wait_until_ended(supervisor, "tool")
+
+    asyncio.run(scenario())
+
+    info = supervisor.info("tool")
+    assert info.state == "exited"
+    assert info.returncode == 0
+    assert info.pid is not None
+    assert info.ended_at >= info.started_at
+    output = [line for name, line in lines if name == "tool"]
+    assert output[0].startswith("Starting: ")
+    assert output[1:] == ["hello", "world", "Process finished."]
+
+
+def test_lines_split_across_chunks_are_reassembled(lines):
+    sup = ProcessSupervisor(
+        sink=lambda name, line, level: lines.append(line), chunk_size=4
+    )
+    try:
+
+        async def scenario():
+            await sup.start("tool", python("print('abcdefghij'); print('é' * 3)"))
+            await wait_until_ended(sup, "tool")
+
+        asyncio.run(scenario())
+    finally:
+        sup.close(timeout=10)
+
+    # Lines longer than a chunk are passed on in pieces, never mangled.
+    output = "".join(lines[1:-1])
+    assert output == "abcdefghijééé"
+    assert sup.stats["bytes_read"] == len("abcdefghij\nééé\n".encode())
+
+
+def test_nonzero_exit_is_failed(supervisor):
+    async def scenario():
+        await supervisor.start("tool", python("import sys; sys.exit(3)"))
+        await wait_until_ended(supervisor, "tool")
+
+    asyncio.run(scenario())
+    info = supervisor.info("tool")
+    assert info.state == "failed"
+    assert info.returncode == 3
+
+
+def test_spawn_error_is_recorded(supervisor, lines):
+    started = asyncio.run(supervisor.start("tool", ["/nonexistent/binary"]))
+
+    assert started is False
+    assert supervisor.info("tool").state == "failed"
+    assert any("CRITICAL ERROR" in line for _, line in lines)
+
+
+def test_start_twice_while_running_is_refused(supervisor):
+    async def scenario():
+        assert await supervisor.start("link", python("import time; time.sleep(30)"))
+        assert await supervisor.start("link", python("print('again')")) is False
+        assert supervisor.is_running("link")
+        assert await supervisor.stop("link") is True
+
+    asyncio.run(scenario())
+    info = supervisor.info("link")
+    assert info.state == "stopped"
+    assert not supervisor.is_running("link")
+
+
+def test_stop_kills_a_process_ignoring_terminate(supervisor, lines):
+    code = (
+        "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN);"
+        "print('ready', flush=True); time.sleep(30)"
+    )
+
+    async def scenario():
+        await supervisor.start("stubborn", python(code))
+        async with asyncio.timeout(10):
+            while ("stubborn", "ready") not in lines:
+                await asyncio.sleep(0.01)
+        return await supervisor.stop("stubborn", timeout=0.2)
+
+    assert asyncio.run(scenario()) is True
+    info = supervisor.info("stubborn")
+    assert info.state == "stopped"
+    assert info.returncode == -9
+    assert lines[-1] == ("stubborn", "Process stopped by user.")
+
+
+def test_stop_when_not_running(supervisor, lines):
+    assert asyncio.run(supervisor.stop("ghost")) is False
+    assert lines == [("ghost", "Stop command received, but no process was running.")]
+
+
+def test_many_processes_share_one_thread(supervisor):
+    """The supervisor adds a single thread, however many processes it runs."""
+    before = threading.active_count()
+
+    async def scenario():
+        for i in range(8):
+            assert await supervisor.start(f"p{i}", python("input()"))
+        return threading.active_count()
+
+    during = asyncio.run(scenario())
+    # The loop thread, plus asyncio's waitpid helper per child before
+    # Python 3.12 (later versions use pidfds); never a reader per process.
+    watchers = 8 if sys.version_info < (3, 12) else 0
+    assert during - before <= 1 + watchers
+    assert supervisor.stats["running"] == 8
+    assert [info.name for info in supervisor.snapshot()] == [f"p{i}" for i in range(8)]
+
+    supervisor.run(supervisor.shutdown(), timeout=10)
+    assert supervisor.stats["running"] == 0
+
+
+def test_blocking_calls_from_sync_code(supervisor):
+    assert supervisor.run(supervisor.start("tool", python("input()")), timeout=10)
+    assert supervisor.is_running("tool")
+    assert supervisor.run(supervisor.stop("tool"), timeout=10)
+    assert supervisor.info("tool").state == "stopped"
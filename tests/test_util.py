@@ -3,7 +3,12 @@ import socket
 import dns.resolver
 from unittest.mock import MagicMock
 
-from blossomtune_gradio.util import is_port_open, validate_email, strtobool
+from blossomtune_gradio.util import (
+    is_port_open,
+    parse_log_budgets,
+    validate_email,
+    strtobool,
+)
 
 
 def test_is_port_open_success(mocker):
@@ -107,3 +112,22 @@ def test_validate_email_non_existent_domain(monkeypatch):
 def test_strtobool(value, expected):
     """Tests the strtobool function with various inputs."""
     assert strtobool(value) == expected
+
+
+def test_parse_log_budgets():
+    """Tests parsing of per-source log budgets."""
+    assert parse_log_budgets("") == {}
+    assert parse_log_budgets(" superlink=5000:1048576, runner=500:131072,") == {
+        "superlink": (5000, 1048576),
+        "runner": (500, 131072),
+    }
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["superlink", "superlink=500", "superlink=a:b", "=5:5", "runner=0:100"],
+)
+def test_parse_log_budgets_rejects_malformed_entries(value):
+    """Tests that malformed budgets raise a clear configuration error."""
+    with pytest.raises(ValueError, match="Invalid LOG_SOURCE_BUDGETS entry"):
+        parse_log_budgets(value)